@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from dias_uteis import FAIXAS_PRAZO
+
+
+def agregar_por_responsavel(df_resultado):
+    """Contagens e registros por responsável, calculados num único agrupamento.
+
+    Devolve um dicionário com:
+      - "responsaveis": responsáveis na ordem em que aparecem em `df_resultado`
+      - "matriz": contagem por Responsável × Faixa de Prazo × Status
+      - "contagens": Responsável × Faixa de Prazo (zeros onde não há passagens)
+      - "registros": passagens de cada responsável, na ordem original
+    """
+    faixa = pd.Categorical(df_resultado["Faixa de Prazo"], categories=FAIXAS_PRAZO, ordered=True)
+
+    # Um só groupby: as posições de cada célula dão tanto as contagens quanto os registros
+    grupos = pd.Series(faixa).groupby(
+        [df_resultado["Responsável"].to_numpy(), faixa, df_resultado["Status"].to_numpy()],
+        sort=False,
+        observed=True,
+    )
+    posicoes = grupos.indices
+
+    chaves = list(posicoes)
+    matriz = pd.Series(
+        [len(posicoes[chave]) for chave in chaves],
+        index=pd.MultiIndex.from_arrays(
+            [[chave[nivel] for chave in chaves] for nivel in range(3)],
+            names=["Responsável", "Faixa de Prazo", "Status"],
+        ),
+        dtype=np.int64,
+    )
+
+    por_responsavel = {}
+    for (resp, _, _), linhas in posicoes.items():
+        por_responsavel.setdefault(resp, []).append(linhas)
+    por_responsavel = {resp: np.sort(np.concatenate(partes)) for resp, partes in por_responsavel.items()}
+
+    # Ordem de primeira aparição, como df["Responsável"].unique()
+    responsaveis = sorted(por_responsavel, key=lambda resp: por_responsavel[resp][0])
+
+    contagens = (
+        matriz.groupby(level=["Responsável", "Faixa de Prazo"]).sum()
+        .unstack("Faixa de Prazo")
+        .reindex(index=responsaveis, columns=FAIXAS_PRAZO, fill_value=0)
+        .fillna(0)
+        .astype(np.int64)
+    )
+
+    return {
+        "responsaveis": responsaveis,
+        "matriz": matriz,
+        "contagens": contagens,
+        "registros": {resp: df_resultado.iloc[linhas] for resp, linhas in por_responsavel.items()},
+    }
@@ -2,226 +2,340 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
-import re
+import plotly.graph_objects as go
 from datetime import datetime
+import json
 import numpy as np
-import holidays
+import math
+import os
+import tempfile
+
+from busca import buscar, construir_indice_busca, descricoes_encontradas, processos_encontrados
+from cards import CSS, assinatura_passagens, indexar_status, montar_card, montar_lista_geral, montar_processos
+from agregacoes import agregar_por_responsavel
+from dias_uteis import dia_util_de_referencia
+from exportacao import FORMATOS, exportar
+from fontes import FONTE_DADOS
+from indice_eventos import construir_indice
+from instrumentacao import iniciar_execucao, medicoes, medir
+from motor import (
+    aplicar_prazos,
+    atualizar_versao,
+    ler_manifesto as ler_manifesto_resultado,
+    ler_resultado,
+    manter_atualizado,
+)
+from particoes import ler_manifesto as ler_manifesto_particoes, ler_periodo
 
 st.set_page_config(
     page_title="Controle de Processos",
     page_icon="🧊",
     layout="wide",)
+iniciar_execucao()
 # Carrega os dados
 #df = pd.read_parquet("atividades_completas.parquet")
 
-# Função para carregar os dados (com cache)
-@st.cache_data(ttl=60*60*24)  # Cache de 1 dia
-def carregar_dados():
-    url = "https://raw.githubusercontent.com/eduardo130796/controle_processos/main/atividades_completas.parquet"
-    return pd.read_parquet(url)
-
-# Carregar os dados automaticamente ou quando expirar o cache
-df = carregar_dados()
-
-
-# Exibindo a última atualização
-ultimo_carregamento = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-
-
-usuarios_nomes = {
-    "adleide.falcao": "Adleide Falcão",
-    "amanda.levyski": "Amanda Levyski",
-    "celso.cruz": "Celso Cruz",
-    "daniela.evangelista": "Daniela Evangelista",
-    "dayane.luiz": "Dayane Luiz",
-    "diogo.melo": "Diogo Melo",
-    "eduardo.junior": "Eduardo Júnior",
-    "gabriela.bruno": "Gabriela Bruno",
-    "gelvaci.pinto": "Gelvaci Pinto",
-    "girlene.alves": "Girlene Alves",
-    "isabela.sanches": "Isabela Sanches",
-    "isabella.vasconcelos": "Isabella Vasconcelos",
-    "izabella.ferreira": "Izabella Ferreira",
-    "jerssika.nogueira": "Jerssika Nogueira",
-    "jessica.fernandes": "Jéssica Fernandes",
-    "jessica.torres": "Jessica Torres",
-    "julia.adryenne": "Julia Adryenne",
-    "karolina.espezin": "Karolina Espezin",
-    "leticia.jesus": "Letícia Jesus",
-    "luiza.lacerda": "Luiza Lacerda",
-    "maria.furtado": "Maria Furtado",
-    "rafaella.fonseca": "Rafaella Fonseca",
-    "roberto.rocha": "Roberto Rocha",
-    "samuel.novais": "Samuel Novais",
-    "sueli.vieira": "Sueli Vieira",
-    "vandeir.scheffelt": "Vandeir Scheffelt",
-    "vanessa.vaucher": "Vanessa Vaucher"
-}
-
-# Substitui os IDs de usuário pelos nomes correspondentes
-df['Usuário'] = df['Usuário'].map(usuarios_nomes)
-
-df["Data/Hora"] = pd.to_datetime(df["Data/Hora"], dayfirst=True, errors="coerce")
-
-df_original=df.copy()
-# Normaliza datas para o filtro (apenas o filtro, sem alterar o df original)
-
-# Ordena por Processo e Data
-df = df.sort_values(by=["Processo", "Data/Hora", "Descrição"], ascending=[True, True, False])
-
-# Agora vem a lógica de rastreamento por passagem
-resultados = []
-
-for processo, grupo in df.groupby("Processo"):
-    grupo = grupo.reset_index(drop=True)
-    processo_aberto = False
-    entrada_atual = {}
-    responsavel_atribuido = None
-
-    for _, row in grupo.iterrows():
-        descricao = str(row["Descrição"]).lower()
-        data = row["Data/Hora"]
-        usuario = row["Usuário"]
-        unidade = row["Unidade"]
-        tipo = row["TipoProcesso"]
-
-        if "processo atribuído para" in descricao:
-            match = re.search(r"processo atribuído para ([\w\.\-]+)", descricao)
-            if match:
-                novo_responsavel = match.group(1)
-                # Substituindo o nome pelo nome completo usando o dicionário
-                if novo_responsavel in usuarios_nomes:
-                    novo_responsavel = usuarios_nomes[novo_responsavel]
-                
-                if processo_aberto:
-                    entrada_atual["Responsável"] = novo_responsavel
-                else:
-                    responsavel_atribuido = novo_responsavel
-
-        elif any(palavra in descricao for palavra in ["recebido na unidade", "reabertura", "processo público gerado"]):
-            if not processo_aberto:
-                entrada_atual = {
-                    "Processo": processo,
-                    "Data Recebido": data,
-                    "Usuário Recebeu": usuario,
-                    "Responsável": responsavel_atribuido or usuario,
-                    "Unidade": unidade,
-                    "Tipo": tipo,
-                    "Data Conclusão": None,
-                    "Usuário Concluiu": None
-                }
-                processo_aberto = True
-                responsavel_atribuido = None
-
-        elif "conclusão" in descricao:
-            if processo_aberto:
-                entrada_atual["Data Conclusão"] = data
-                entrada_atual["Usuário Concluiu"] = usuario
-                resultados.append(entrada_atual)
-                processo_aberto = False
-                entrada_atual = {}
-                responsavel_atribuido = None
-
-    if processo_aberto and entrada_atual:
-        entrada_atual["Data Conclusão"] = None
-        entrada_atual["Usuário Concluiu"] = None
-        resultados.append(entrada_atual)
-
-
-feriados = holidays.Brazil(years=datetime.now().year)  # Pega o ano atual
-# Processa prazos
-for item in resultados:
-    data_inicio = pd.to_datetime(item["Data Recebido"], errors="coerce")
-    data_fim = pd.to_datetime(item["Data Conclusão"], errors="coerce") if item["Data Conclusão"] else datetime.now()
-    # Gerar os feriados do ano de início e do ano de fim (caso atravesse anos diferentes)
-    anos = list(range(data_inicio.year, data_fim.year + 1))
-    feriados = holidays.Brazil(years=anos, prov="DF")
-
-    # Calcular dias úteis considerando feriados
-    dias = np.busday_count(
-        data_inicio.date(),
-        data_fim.date(),
-        holidays=list(feriados.keys())  # Passar só as datas
-    )
-    status = "Concluído" if item["Data Conclusão"] else "Aberto"
-
-    if dias <= 5:
-        cor = "Verde"
-        prazo = "0-5"
-    elif dias <= 10:
-        cor = "Amarelo"
-        prazo = "6-10"
-    else:
-        cor = "Vermelho"
-        prazo = "11+"
-
-    item["Status"] = status
-    item["Dias de Prazo"] = dias
-    item["Faixa de Prazo"] = prazo
+# Modo incremental: mantém as passagens derivadas em disco (ver incremental.py)
+MODO_INCREMENTAL = os.environ.get("MODO_INCREMENTAL") == "1"
 
-# DataFrame final
-df_resultado = pd.DataFrame(resultados)
-df_resultado = df_resultado.sort_values(by="Responsável", ascending=True)
+# Modo pré-calculado: lê o resultado gravado em lote por motor.py, sem processar
+# nada durante a requisição
+MODO_PRECALCULADO = os.environ.get("MODO_PRECALCULADO") == "1"
+
+# Painel de desempenho na barra lateral, só com PAINEL_ADMIN=1; as medições
+# podem ir para um arquivo JSON lines com LOG_DESEMPENHO (ver instrumentacao.py)
+PAINEL_ADMIN = os.environ.get("PAINEL_ADMIN") == "1"
+
+# Modo particionado: lê do acervo por mês e Unidade (ver particoes.py) só o
+# período e a unidade escolhidos, em vez de processar o histórico inteiro
+MODO_PARTICIONADO = os.environ.get("MODO_PARTICIONADO") == "1"
+
+# Backend do cubo dos filtros, métricas e gráficos: "pandas" (padrão) ou "arrow",
+# com as tabelas do cubo em pyarrow (ver cubo_arrow.py); a interface é a mesma
+BACKEND_CALCULO = os.environ.get("BACKEND_CALCULO", "pandas")
+if BACKEND_CALCULO == "arrow":
+    from cubo_arrow import construir_cubo, contagem_por, fatiar, media_de_prazo_por, totais, valores_de
+else:
+    from cubo import construir_cubo, contagem_por, fatiar, media_de_prazo_por, totais, valores_de
+
+# Intervalo mínimo (segundos) entre verificações da fonte de dados (ver fontes.py)
+INTERVALO_VERIFICACAO = int(os.environ.get("INTERVALO_VERIFICACAO", 60*5))
+
+# Data de referência dos prazos em aberto: o dia útil de hoje (ou o próximo, em fins
+# de semana e feriados, que não mudam a contagem); no modo padrão vale a da versão dos dados
+data_referencia = dia_util_de_referencia(datetime.now().date())
+
+
+# Dados processados compartilhados entre as sessões (ver motor.manter_atualizado):
+# uma thread em segundo plano consulta a fonte a cada INTERVALO_VERIFICACAO e, quando
+# o conteúdo ou o dia útil mudam, prepara a nova versão e a troca de uma vez
+@st.cache_resource(show_spinner=False)
+def dados_compartilhados(endereco):
+    return manter_atualizado(endereco, INTERVALO_VERIFICACAO, MODO_INCREMENTAL)
+
+
+# Versão vigente dos dados; só a primeira carga do processo espera, depois as
+# sessões leem sempre a última versão pronta, sem cópia
+@medir
+def versao_dos_dados():
+    registro = dados_compartilhados(FONTE_DADOS)
+    if registro["versao"] is None:
+        with st.spinner("Carregando dados..."):
+            registro["pronta"].wait()
+    if registro["versao"] is None:
+        raise registro["erro"]
+    return registro["versao"]
+
+
+# Leitura de um período do acervo particionado (com cache por versão, filtros e dia)
+@medir
+@st.cache_data(max_entries=16, show_spinner="Lendo período...")
+def processar_periodo(impressao_digital, data_inicio, data_fim, unidade, data_referencia):
+    df_original, passagens = ler_periodo(data_inicio, data_fim, None if unidade == "Todas" else unidade)
+    return df_original, aplicar_prazos(passagens, data_referencia)
+
+
+# Leitura do resultado gravado pelo processamento em lote (python motor.py)
+@medir
+@st.cache_data(max_entries=4, show_spinner="Lendo resultado...")
+def ler_precalculado(impressao_digital, gerado_em, data_referencia):
+    return ler_resultado(data_referencia=data_referencia)
+
+
+# Cubo das passagens por dia, unidade, responsável, tipo, status e faixa; montado
+# uma vez por versão do resultado e compartilhado entre as sessões (sem cópia)
+@medir
+@st.cache_resource(max_entries=4, show_spinner=False)
+def cubo_de_dados(_df_resultado, versao_resultado):
+    return construir_cubo(_df_resultado)
+
+
+# Índice de eventos por processo para as linhas do tempo; construído uma vez por
+# versão dos dados e compartilhado entre as sessões (sem cópia)
+@medir
+@st.cache_resource(max_entries=2, show_spinner=False)
+def indice_de_eventos(_df_original, versao_eventos):
+    return construir_indice(_df_original)
+
+
+
+# Índice de busca nas descrições dos eventos (ver busca.py), montado na primeira
+# busca de cada versão dos dados; a versão nova reaproveita a anterior e só quebra
+# em termos as descrições que ainda não tinham sido vistas
+@st.cache_resource(show_spinner=False)
+def indices_de_busca():
+    return {"ultimo": None}
+
+
+@medir
+@st.cache_resource(max_entries=2, show_spinner="Indexando as descrições dos eventos...")
+def indice_de_busca(_df_original, versao_eventos):
+    anteriores = indices_de_busca()
+    anteriores["ultimo"] = construir_indice_busca(_df_original, anteriores["ultimo"])
+    return anteriores["ultimo"]
+
+
+if MODO_PARTICIONADO:
+    # Só o manifesto é lido aqui; o período padrão são os últimos 90 dias do acervo
+    manifesto = ler_manifesto_particoes()
+    impressao_digital = manifesto["impressao_digital"]
+    ultimo_carregamento = datetime.fromisoformat(manifesto["gravado_em"]).strftime("%d/%m/%Y %H:%M:%S")
+    fim_padrao = datetime.fromisoformat(manifesto["fim"]).date()
+    inicio_padrao = max(datetime.fromisoformat(manifesto["inicio"]).date(), fim_padrao - pd.Timedelta(days=90))
+elif MODO_PRECALCULADO:
+    # O processamento roda fora do painel; aqui só se lê o resultado gravado
+    manifesto = ler_manifesto_resultado()
+    impressao_digital = manifesto["impressao_digital"]
+    ultimo_carregamento = datetime.fromisoformat(manifesto["gerado_em"]).strftime("%d/%m/%Y %H:%M:%S")
+    df_original, df_resultado = ler_precalculado(impressao_digital, manifesto["gerado_em"], data_referencia)
+    versao_eventos = (impressao_digital, manifesto["gerado_em"])
+    inicio_padrao = df_resultado["Data Recebido"].min().date()
+    fim_padrao = df_resultado["Data Recebido"].max().date()
+else:
+    # Os widgets abaixo só recortam a tabela pronta da versão vigente; a carga e
+    # o processamento rodam em segundo plano (ver dados_compartilhados)
+    versao = versao_dos_dados()
+    impressao_digital = versao["impressao_digital"]
+    data_referencia = versao["data_referencia"]
+
+    # Exibindo a última atualização
+    ultimo_carregamento = versao["carregado_em"].strftime("%d/%m/%Y %H:%M:%S")
+
+    df_original, df_resultado = versao["eventos"], versao["resultado"]
+    versao_eventos = impressao_digital
+
+    # Se a última atualização falhou, a versão anterior continua no ar
+    if dados_compartilhados(FONTE_DADOS)["erro"] is not None:
+        st.sidebar.warning(f"Falha ao atualizar os dados; exibindo a versão de {ultimo_carregamento}.")
+    inicio_padrao = df_resultado["Data Recebido"].min().date()
+    fim_padrao = df_resultado["Data Recebido"].max().date()
 
 with st.sidebar:
     st.text(f"Última atualização: {ultimo_carregamento}")
     st.write("Filtros:")
-    data_inicio = st.date_input("Data inicial", value=df_resultado["Data Recebido"].min().date())
-    data_fim = st.date_input("Data final", value=df_resultado["Data Recebido"].max().date())
-    status = df_resultado["Status"].dropna().unique()
+    data_inicio = st.date_input("Data inicial", value=inicio_padrao)
+    data_fim = st.date_input("Data final", value=fim_padrao)
+
+    if MODO_PARTICIONADO:
+        # Período e unidade vão para a leitura; a unidade vem do estado do seletor, mais abaixo
+        unidade_lida = st.session_state.get("unidade_escolhida", "Todas")
+        df_original, df_resultado = processar_periodo(impressao_digital, data_inicio, data_fim, unidade_lida, data_referencia)
+        versao_eventos = (impressao_digital, data_inicio, data_fim, unidade_lida)
+
+    # Cubo pré-agregado: filtros, métricas e gráficos saem dele; as passagens linha a
+    # linha só são recortadas quando alguém abre a lista de processos de um card
+    cubo = cubo_de_dados(df_resultado, (versao_eventos, data_referencia))
+    status = cubo["status"]
     status_escolhido = st.selectbox("Filtrar por Status (opcional)", options=["Todas"] + list(status))
 
-if status_escolhido != "Todas":
-    df_resultado = df_resultado[df_resultado["Status"] == status_escolhido]
-
-filtro_inicio = pd.to_datetime(data_inicio).normalize()
-filtro_fim = pd.to_datetime(data_fim).normalize() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-
-# Filtra por data antes de processar os dados
-df_resultado = df_resultado[
-    (df_resultado["Data Recebido"] >= filtro_inicio) &
-    (df_resultado["Data Recebido"] <= filtro_fim)
-]
+    # Cards leves: a lista de processos de cada responsável só é montada ao expandir
+    processos_sob_demanda = st.toggle("Carregar processos sob demanda", value=True)
+
+    # Válvula de escape do modo incremental: descarta o estado salvo e refaz tudo
+    if MODO_INCREMENTAL and not (MODO_PARTICIONADO or MODO_PRECALCULADO) and st.button("🔄 Reconstruir passagens do zero"):
+        with st.spinner("Reconstruindo passagens..."):
+            atualizar_versao(
+                dados_compartilhados(FONTE_DADOS), FONTE_DADOS, MODO_INCREMENTAL, forcar=True, reconstruir=True
+            )
+        st.rerun()
+
+filtros = {
+    "status": None if status_escolhido == "Todas" else status_escolhido,
+    "inicio": data_inicio,
+    "fim": data_fim,
+}
 
 # Filtro por unidade
 with st.sidebar:
-    unidades = df_resultado["Unidade"].dropna().unique()
-    unidade_escolhida = st.selectbox("Filtrar por unidade (opcional)", options=["Todas"] + list(unidades))
+    unidades = manifesto["unidades"] if MODO_PARTICIONADO else valores_de(fatiar(cubo, **filtros), "Unidade")
+    unidade_escolhida = st.selectbox("Filtrar por unidade (opcional)", options=["Todas"] + list(unidades), key="unidade_escolhida")
+
+filtros["unidade"] = None if unidade_escolhida == "Todas" else unidade_escolhida
+fatia = fatiar(cubo, **filtros)
+
+
+# Mesmos filtros do cubo, aplicados às passagens linha a linha
+def mascara_do_recorte(df_resultado, status, inicio, fim, unidade):
+    filtro_inicio = pd.to_datetime(inicio).normalize()
+    filtro_fim = pd.to_datetime(fim).normalize() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+
+    mascara = (
+        (df_resultado["Data Recebido"] >= filtro_inicio) &
+        (df_resultado["Data Recebido"] <= filtro_fim)
+    ).to_numpy()
+    if status is not None:
+        mascara &= (df_resultado["Status"] == status).to_numpy()
+    if unidade is not None:
+        mascara &= (df_resultado["Unidade"] == unidade).to_numpy()
+    return mascara
+
+
+# Passagens do recorte, linha a linha, com a agregação por responsável e o
+# status de cada passagem; montadas na primeira vez que um card precisa delas e
+# guardadas por versão do resultado e filtros, para que as ações de um card
+# (abrir, paginar) não refaçam o recorte
+@st.cache_resource(max_entries=8, show_spinner=False)
+def detalhes_do_recorte(_df_resultado, versao_resultado, status, inicio, fim, unidade):
+    recorte = _df_resultado[mascara_do_recorte(_df_resultado, status, inicio, fim, unidade)]
+    return {
+        "agregacao": medir(agregar_por_responsavel)(recorte),
+        "status_passagens": indexar_status(recorte),
+    }
+
 
-if unidade_escolhida != "Todas":
-    df_resultado = df_resultado[df_resultado["Unidade"] == unidade_escolhida]
+def detalhar_recorte():
+    return detalhes_do_recorte(df_resultado, (versao_eventos, data_referencia), **filtros)
 
 # ==============================
 # EXIBIÇÕES
 # ==============================
 
-st.subheader("📂 Controle de Processos")
+# Cada seção recebe explicitamente o que usa: os filtros globais da barra lateral
+# rerodam a página, mas os widgets de um card só rerodam o próprio card (st.fragment)
 
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("📂 Passagens na Unidade", len(df_resultado))
-col2.metric("📁 Processos Únicos", df_resultado["Processo"].nunique())
-col3.metric("🟡 Em Aberto", df_resultado[df_resultado["Status"] == "Aberto"].shape[0])
-col4.metric("✅ Concluídos", df_resultado[df_resultado["Status"] == "Concluído"].shape[0])
+st.subheader("📂 Controle de Processos")
 
-##############################
-df_resultado["0-5"] = df_resultado["Faixa de Prazo"].apply(lambda x: 1 if x == "0-5" else 0)
-df_resultado["6-10"] = df_resultado["Faixa de Prazo"].apply(lambda x: 1 if x == "6-10" else 0)
-df_resultado["11+"] = df_resultado["Faixa de Prazo"].apply(lambda x: 1 if x == "11+" else 0)
+def metricas(fatia):
+    numeros = totais(fatia)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("📂 Passagens na Unidade", numeros["passagens"])
+    col2.metric("📁 Processos Únicos", numeros["processos"])
+    col3.metric("🟡 Em Aberto", numeros["abertos"])
+    col4.metric("✅ Concluídos", numeros["concluidos"])
+
+metricas(fatia)
+
+
+# Exportação das passagens do recorte, opcionalmente com os eventos de cada uma.
+# O arquivo é gravado num temporário, bloco a bloco, só quando alguém pede; o
+# conteúdo pronto fica na sessão (uma cópia) até o formato ou o recorte mudarem
+@st.fragment
+def exportacao_do_recorte(df_resultado, df_original, versao, filtros):
+    with st.expander("📥 Exportar passagens do recorte"):
+        formato = st.radio("Formato", list(FORMATOS), format_func=str.upper, horizontal=True)
+        com_eventos = st.checkbox("Incluir os eventos de cada passagem (uma linha por evento)")
+
+        chave = (formato, com_eventos, versao, tuple(filtros.items()))
+        pronto = st.session_state.get("arquivo_exportado")
+        if pronto is not None and pronto["chave"] != chave:
+            del st.session_state["arquivo_exportado"]
+            pronto = None
+
+        if st.button("Gerar arquivo"):
+            # Só as posições do recorte: as passagens são copiadas um bloco por vez
+            indice = indice_de_eventos(df_original, versao) if com_eventos else None
+            linhas = np.flatnonzero(mascara_do_recorte(df_resultado, **filtros))
+            with st.spinner("Gerando arquivo..."), tempfile.TemporaryFile() as arquivo:
+                exportar(df_resultado, arquivo, formato, indice, linhas=linhas)
+                arquivo.seek(0)
+                pronto = {"chave": chave, "conteudo": arquivo.read()}
+            st.session_state["arquivo_exportado"] = pronto
+
+        if pronto is not None:
+            extensao, tipo = FORMATOS[formato]
+            st.download_button(
+                "Baixar",
+                data=pronto["conteudo"],
+                file_name=f"passagens_{datetime.now():%Y-%m-%d}.{extensao}",
+                mime=tipo,
+                on_click="ignore",
+            )
+
+exportacao_do_recorte(df_resultado, df_original, versao_eventos, filtros)
 
 #####################################
-def grafico_unidade(df_resultado):
+def anotacoes_de_total(totais, deslocamento):
+    """Anotações com o total de cada barra, ao lado dela, montadas de uma vez."""
+    return [
+        dict(
+            x=total + deslocamento,  # Ajuste para colocar o texto ao lado da barra
+            y=rotulo,
+            text=str(total),
+            showarrow=False,
+            font=dict(size=12, color="black"),
+            align="left",  # Alinhar o texto à esquerda para ficar ao lado da barra
+        )
+        for rotulo, total in zip(totais.index, totais.to_numpy())
+    ]
 
-    #st.subheader("📉 Gráfico por Unidade e Faixa de Prazo")
 
-    # Categorizar a "Faixa de Prazo"
-    df_resultado["Faixa de Prazo"] = pd.Categorical(df_resultado["Faixa de Prazo"], categories=["0-5", "6-10", "11+"], ordered=True)
+def exibir_figura(figura_json):
+    # O JSON veio de uma figura já validada pelo plotly: remontar sem validar leva ~1 ms
+    st.plotly_chart(go.Figure(json.loads(figura_json), _validate=False))
 
-    # Agrupar os dados por responsável e faixa de prazo
-    grafico_df = df_resultado.groupby(["Unidade", "Faixa de Prazo"]).size().reset_index(name="Quantidade")
 
+# As figuras ficam em cache por contagem agregada, compartilhadas entre as sessões.
+# O cache guarda o JSON da figura (imutável), não a Figure: cada execução monta a
+# sua com exibir_figura, e nenhuma sessão altera o que as outras vão exibir
+@st.cache_resource(max_entries=64, show_spinner=False)
+def figura_unidade(contagens):
 
-    # Agrupar agora por responsável para obter a quantidade total de processos por responsável
-    grafico_total_df = grafico_df.groupby("Unidade")["Quantidade"].sum().reset_index(name="Quantidade Total")
+    # Quantidade por unidade e faixa de prazo
+    grafico_df = contagens.stack().reset_index(name="Quantidade")
+
+
+    # Agrupar agora por unidade para obter a quantidade total de processos por unidade
+    grafico_total = grafico_df.groupby("Unidade", observed=True)["Quantidade"].sum()
 
     # Definir cores mais suaves
     cores = {"0-5": "#1cc88a", "6-10": "#f6c23e", "11+": "#e74a3b"}
@@ -238,21 +352,10 @@ def grafico_unidade(df_resultado):
         barmode="stack",  # Empilhar as barras para facilitar a visualização proporcional
     )
 
-    # Adicionar a quantidade total de processos ao lado das barras
-    for i in range(len(grafico_total_df)):
-        fig.add_annotation(
-            x=grafico_total_df.iloc[i]["Quantidade Total"] + 5,  # Ajuste para colocar o texto ao lado da barra
-            y=grafico_total_df.iloc[i]["Unidade"],
-            text=str(grafico_total_df.iloc[i]["Quantidade Total"]),
-            showarrow=False,
-            font=dict(size=12, color="black"),
-            align="left",  # Alinhar o texto à esquerda para ficar ao lado da barra
-        )
-
     # Definindo altura com base no número de unidades
     altura_base = 300
     altura_por_unidade = 40
-    altura_final = altura_base + (len(grafico_total_df) * altura_por_unidade)
+    altura_final = altura_base + (len(grafico_total) * altura_por_unidade)
 
     fig.update_layout(
         title="Quantidade Total de Processos por Unidade e Faixa de Prazo",
@@ -273,102 +376,91 @@ def grafico_unidade(df_resultado):
             orientation='v',
             font=dict(size=12)
         ),
+        # Adicionar a quantidade total de processos ao lado das barras
+        annotations=anotacoes_de_total(grafico_total, 5),
     )
 
     # Remover os valores das barras para deixar o gráfico mais limpo
     fig.update_traces(marker=dict(line=dict(width=1, color="white")))
+    return fig.to_json()
+
+
+@medir
+def grafico_unidade(fatia):
+
+    #st.subheader("📉 Gráfico por Unidade e Faixa de Prazo")
+
+    # Quantidade por unidade e faixa de prazo, somada no recorte do cubo
+    exibir_figura(figura_unidade(contagem_por(fatia, "Unidade")))
 
-    # Exibir o gráfico
-    st.plotly_chart(fig)
 
+@st.cache_resource(max_entries=64, show_spinner=False)
+def figura_media_prazos(df_media, dimensao, titulo):
+    fig = px.bar(
+        df_media,
+        x="Dias de Prazo Médio",
+        y=dimensao,
+        orientation="h",
+        text="Dias de Prazo Médio",
+        title=titulo
+    )
+    fig.update_layout(
+        xaxis_title="Média de Dias Úteis",
+        yaxis_title=dimensao,
+        plot_bgcolor="white",
+        margin=dict(l=40, r=20, t=60, b=40)
+    )
+    fig.update_traces(textposition="outside")
+    return fig.to_json()
 
-def grafico_media_prazos(df_resultado):
+
+@medir
+def grafico_media_prazos(fatia, unidade_escolhida):
 
     # 🔵 Agrupa por Unidade e Responsável (caso esteja filtrando, agrupa só responsáveis)
     if unidade_escolhida == "Todas":
-        # Calcula média de prazo por Unidade (geral)
-        df_media = (
-            df_resultado
-            .groupby("Unidade")["Dias de Prazo"]
-            .mean()
-            .reset_index()
-            .rename(columns={"Dias de Prazo": "Dias de Prazo Médio"})
-        )
-        # Arredonda a média para 1 casa decimal (você pode ajustar esse valor conforme necessário)
-        df_media["Dias de Prazo Médio"] = df_media["Dias de Prazo Médio"].round(1)
-        
-        fig = px.bar(
-            df_media,
-            x="Dias de Prazo Médio",
-            y="Unidade",
-            orientation="h",
-            text="Dias de Prazo Médio",
-            title="Média de Dias de Prazo por Unidade"
-        )
-        fig.update_layout(
-            xaxis_title="Média de Dias Úteis",
-            yaxis_title="Unidade",
-            plot_bgcolor="white",
-            margin=dict(l=40, r=20, t=60, b=40)
-        )
-        fig.update_traces(textposition="outside")
-
+        # Média de prazo por Unidade (geral)
+        dimensao = "Unidade"
+        titulo = "Média de Dias de Prazo por Unidade"
     else:
-        # Calcula média de prazo por Responsável dentro da unidade
-        df_media = (
-            df_resultado
-            .groupby("Responsável")["Dias de Prazo"]
-            .mean()
-            .reset_index()
-            .rename(columns={"Dias de Prazo": "Dias de Prazo Médio"})
-        )
-        # Arredonda a média para 1 casa decimal (você pode ajustar esse valor conforme necessário)
-        df_media["Dias de Prazo Médio"] = df_media["Dias de Prazo Médio"].round(1)
-
-        fig = px.bar(
-            df_media,
-            x="Dias de Prazo Médio",
-            y="Responsável",
-            orientation="h",
-            text="Dias de Prazo Médio",
-            title=f"Média de Dias de Prazo dos Responsáveis - {unidade_escolhida}"
-        )
-        fig.update_layout(
-            xaxis_title="Média de Dias Úteis",
-            yaxis_title="Responsável",
-            plot_bgcolor="white",
-            margin=dict(l=40, r=20, t=60, b=40)
-        )
-        fig.update_traces(textposition="outside")
+        # Média de prazo por Responsável dentro da unidade
+        dimensao = "Responsável"
+        titulo = f"Média de Dias de Prazo dos Responsáveis - {unidade_escolhida}"
+
+    df_media = (
+        media_de_prazo_por(fatia, dimensao)
+        .rename("Dias de Prazo")
+        .reset_index()
+        .rename(columns={"Dias de Prazo": "Dias de Prazo Médio"})
+    )
+    # Arredonda a média para 1 casa decimal (você pode ajustar esse valor conforme necessário)
+    df_media["Dias de Prazo Médio"] = df_media["Dias de Prazo Médio"].round(1)
 
     # 🔵 Exibe o gráfico
-    st.plotly_chart(fig)
+    exibir_figura(figura_media_prazos(df_media, dimensao, titulo))
 
 # --- Exemplo de chamada
 col1, col2 = st.columns(2)
 
 with col1:
-    grafico_unidade(df_resultado)
+    grafico_unidade(fatia)
 with col2:
-    grafico_media_prazos(df_resultado)
+    grafico_media_prazos(fatia, unidade_escolhida)
 
 
 
 
 
     ##########################################
-def grafico_resposavel_prazo(df_resultado):
-    #st.subheader("📉 Gráfico por Responsável e Faixa de Prazo")
+@st.cache_resource(max_entries=64, show_spinner=False)
+def figura_responsavel_prazo(contagens):
 
-    # Categorizar a "Faixa de Prazo"
-    df_resultado["Faixa de Prazo"] = pd.Categorical(df_resultado["Faixa de Prazo"], categories=["0-5", "6-10", "11+"], ordered=True)
-
-    # Agrupar os dados por responsável e faixa de prazo
-    grafico_df = df_resultado.groupby(["Responsável", "Faixa de Prazo"]).size().reset_index(name="Quantidade")
+    # Quantidade por responsável e faixa de prazo
+    grafico_df = contagens.stack().reset_index(name="Quantidade")
 
 
     # Agrupar agora por responsável para obter a quantidade total de processos por responsável
-    grafico_total_df = grafico_df.groupby("Responsável")["Quantidade"].sum().reset_index(name="Quantidade Total")
+    grafico_total = grafico_df.groupby("Responsável", observed=True)["Quantidade"].sum()
 
     # Definir cores mais suaves
     cores = {"0-5": "#1cc88a", "6-10": "#f6c23e", "11+": "#e74a3b"}
@@ -384,21 +476,9 @@ def grafico_resposavel_prazo(df_resultado):
         barmode="stack",  # Empilhar as barras para facilitar a visualização proporcional
     )
 
-    # Adicionar a quantidade total de processos ao lado das barras
-    for i in range(len(grafico_total_df)):
-        fig.add_annotation(
-            x=grafico_total_df.iloc[i]["Quantidade Total"] + 3,  # Ajuste para colocar o texto ao lado da barra
-            y=grafico_total_df.iloc[i]["Responsável"],
-            text=str(grafico_total_df.iloc[i]["Quantidade Total"]),
-            showarrow=False,
-            font=dict(size=12, color="black"),
-            align="left",  # Alinhar o texto à esquerda para ficar ao lado da barra
-        )
-
-
     altura_base = 300
     altura_por_unidade = 40
-    altura_final = altura_base + (len(grafico_total_df) * altura_por_unidade)
+    altura_final = altura_base + (len(grafico_total) * altura_por_unidade)
     # Ajustes de layout para suavizar a estética
     fig.update_layout(
         title="Quantidade Total de Processos por Responsável e Faixa de Prazo",
@@ -419,415 +499,165 @@ def grafico_resposavel_prazo(df_resultado):
             font=dict(size=12)
         ),
         height=altura_final,  # Ajuste da altura para um gráfico mais equilibrado
+        # Adicionar a quantidade total de processos ao lado das barras
+        annotations=anotacoes_de_total(grafico_total, 3),
     )
 
     # Remover os valores das barras para deixar o gráfico mais limpo
     fig.update_traces(marker=dict(line=dict(width=1, color="white")))
+    return fig.to_json()
 
-    # Exibir o gráfico
-    st.plotly_chart(fig)
-
-
-def exibir_processos(processos, registros_status, df_original, faixa_prazo, prazo):
-    """Gera o HTML para exibir os processos de uma faixa de prazo específica."""
-    if not processos:
-        return ""
-    
-    html = f"<div class='processo-box'><span class='prazo-{faixa_prazo}'>Prazo {prazo} ({len(processos)} processos):</span></div>"
-    html += "<div style='display:flex; flex-wrap: wrap; gap:5px; max-height: 250px; overflow-y: auto;'>"
-    for proc in processos:
-        tipo_processo = proc["Tipo"]
-        numero_processo = proc["Processo"]
-        data = proc["Data Recebido"]
-
-
-        processo_info = registros_status[
-            (registros_status["Processo"] == numero_processo) & 
-            (registros_status["Data Recebido"] == data)
-        ].iloc[0]
-        data_entrada = pd.to_datetime(processo_info["Data Recebido"])
-        data_conclusao = pd.to_datetime(processo_info["Data Conclusão"])
-        status=processo_info["Status"]
-
-        
-        if status =="Aberto":
-            eventos_no_periodo = df_original[
-                (df_original["Processo"] == numero_processo) & 
-                (df_original["Data/Hora"] >= data_entrada)& 
-                (df_original["Data/Hora"] <= datetime.now())
-            ].sort_values(by=["Data/Hora"], ascending=[False])
-        else:    
-            eventos_no_periodo = df_original[
-                (df_original["Processo"] == numero_processo) & 
-                (df_original["Data/Hora"] >= data_entrada) & 
-                (df_original["Data/Hora"] <= data_conclusao)
-            ].sort_values(by=["Data/Hora"], ascending=[False])
-        
-            
-
-        html += f"""
-        <details>
-            <summary><span class='badge {faixa_prazo.lower()}' title='{tipo_processo}'> {numero_processo} </span></summary>
-            <div style="margin-left:10px; margin-top:5px; font-size:12px;">"""
-
-        if not eventos_no_periodo.empty:
-            for _, evento in eventos_no_periodo.iterrows():
-                data_formatada = pd.to_datetime(evento["Data/Hora"]).strftime("%d/%m/%Y %H:%M")
-                descricao_resumida = evento["Descrição"][:100] + ("..." if len(evento["Descrição"]) > 80 else "")  # Limita o texto
-                html += f"<p><strong>{data_formatada}:</strong> ({evento['Usuário']}) - {descricao_resumida}</p>"
-        else:
-            html += "<p>Sem eventos registrados neste período.</p>"
-
-        html += "</div></details>"
-    
-    html += "</div>"
-    return html
-
-def exibir_cards_por_status(df,df_original, num_colunas=3):
-
-    # CSS apenas para estilizar os cards
-    st.markdown("""
-    <style>
-    .card {
-        background-color: #fff;
-        border-radius: 12px;
-        padding: 16px;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.06);
-        height: 100%;
-    }
-    .card h4 {
-        margin-top: 0;
-    }
-    .badge {
-        background-color: #f0f0f0;
-        border-radius: 12px;
-        padding: 5px 10px;
-        font-size: 12px;
-        color: #333;
-        white-space: nowrap;
-        overflow: hidden;
-        text-overflow: ellipsis;
-        max-width: 150px;
-    }
-    .verde {
-        background-color: #28a745; /* verde */
-        color: white;
-    }
-    .laranja {
-        background-color: #ffc107; /* amarelo */
-        color: black;
-    }
-    .vermelho {
-        background-color: #FF0000; /* vermelho */
-        color: white;
-    }
-    .prazo-verde { color: #1cc88a; font-weight: bold; }
-    .prazo-laranja { color: #f6c23e; font-weight: bold; }
-    .prazo-vermelho { color: #e74a3b; font-weight: bold; }
-    .processo-box {
-        background-color: #f8f9fc;
-        padding: 5px 10px;
-        border-radius: 6px;
-        font-size: 12px;
-        margin: 2px 0;
-        border-left: 3px solid #4e73df;
-    }
-    .barra-status-container {
-        height: 30px;
-        display: flex;
-        position: relative;
-        border-radius: 5px; /* Arredondamento do contêiner */
-        overflow: hidden; /* Garante que a borda arredondada não será violada */
-    }
 
-    .barra-status {
-        height: 100%;
-        display: flex;
-        position: relative;
-    }
-
-    .barra-verde {
-        background-color: #1cc88a;
-    }
+@medir
+def grafico_resposavel_prazo(contagens):
+    #st.subheader("📉 Gráfico por Responsável e Faixa de Prazo")
 
-    .barra-amarela {
-        background-color: #f6c23e;
-    }
+    # Quantidade por responsável e faixa de prazo, somada no recorte do cubo
+    exibir_figura(figura_responsavel_prazo(contagens))
 
-    .barra-vermelha {
-        background-color: #e74a3b;
-    }
 
-    /* Lógica de arredondamento de bordas */
-    .barra-status-container > .barra-status:first-child {
-        border-radius: 5px 0 0 5px; /* Apenas para a primeira barra */
-    }
+# O HTML de cada card fica em cache pelas passagens que ele mostra, compartilhado
+# entre as sessões; a versão dos eventos entra na chave por causa das linhas do tempo
+@st.cache_data(max_entries=4096, show_spinner=False)
+def html_do_card(resp, contagem, assinatura=None, versao_eventos=None, _registros=None, _status_passagens=None, _indice=None):
+    return montar_card(resp, _registros, _status_passagens, _indice, com_processos=assinatura is not None, contagem=contagem)
 
-    .barra-status-container > .barra-status:last-child {
-        border-radius: 0 5px 5px 0; /* Apenas para a última barra */
-    }
 
-    .barra-status-container > .barra-status:nth-child(1):only-child {
-        border-radius: 5px; /* Caso seja a única barra */
-    }
-    .barra-texto {
-        position: absolute;
-        width: 100%;
-        text-align: center;
-        color: white;
-        font-size: 15px;
-        font-weight: bold;
-        line-height: 30px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+@st.cache_data(max_entries=4096, show_spinner=False)
+def html_dos_processos(assinatura, versao_eventos, inicio, fim, contagem, _registros, _status_passagens, _indice):
+    return montar_processos(_registros, _status_passagens, _indice, inicio, fim, contagem)
 
 
-    
-    responsaveis = df["Responsável"].unique()
+@medir
+def exibir_cards_por_status(contagens, detalhar, indice, versao, num_colunas=3, sob_demanda=True):
     colunas = st.columns(num_colunas)
 
-    for i, resp in enumerate(responsaveis):
-        registros = df[df["Responsável"] == resp]
-
-        processos_verde = registros.loc[registros["Faixa de Prazo"] == "0-5", ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records")
-        processos_amarelo = registros.loc[registros["Faixa de Prazo"] == "6-10", ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records")
-        processos_vermelho = registros.loc[registros["Faixa de Prazo"] == "11+", ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records")
-
-        verde = len(processos_verde)
-        amarelo = len(processos_amarelo)
-        vermelho = len(processos_vermelho)
-        total_processos = verde + amarelo + vermelho
-
-        pct_verde = verde / total_processos if total_processos else 0
-        pct_amarelo = amarelo / total_processos if total_processos else 0
-        pct_vermelho = vermelho / total_processos if total_processos else 0
-
-        barra_texto = []
-        if pct_verde > 0:
-            barra_texto.append(f"0-5: {int(pct_verde * 100)}%")
-        if pct_amarelo > 0:
-            barra_texto.append(f"6-10: {int(pct_amarelo * 100)}%")
-        if pct_vermelho > 0:
-            barra_texto.append(f"11+: {int(pct_vermelho * 100)}%")
-
-        texto_barra = " | ".join(barra_texto)
-
-        
-        
-
-        card_html = f"""<div class="card">
-                            <h4>{resp}</h4>
-                            <div style="display:flex; gap:20px;">
-                                <div style="flex:1;">
-                                    <div class="barra-status-container">
-                                        <div class="barra-status barra-verde" style="width: {pct_verde * 100}%;"></div>
-                                        <div class="barra-status barra-amarela" style="width: {pct_amarelo * 100}%;"></div>
-                                        <div class="barra-status barra-vermelha" style="width: {pct_vermelho * 100}%;"></div>
-                                        <div class="barra-texto">{texto_barra}</div>
-                                    </div>
-                                    <div style="display: flex; justify-content: space-between; flex-wrap: wrap; gap: 10px; margin-top: 6px;">
-                                        <div class="processo-box">
-                                            <span class='prazo-verde'>0-5 dias:</span> {verde}
-                                        </div>
-                                        <div class="processo-box">
-                                            <span class='prazo-laranja'>6-10 dias:</span> {amarelo}
-                                        </div>
-                                        <div class="processo-box">
-                                            <span class='prazo-vermelho'>11+ dias:</span> {vermelho}
-                                        </div>
-                                    </div>
-                                    <p><strong>📋 Total de Processos:</strong> {total_processos}</p>
-                                </div>
-                            </div>
-                            <div>
-                                <details>
-                                    <summary><strong>📜 Processos</strong></summary>
-                                    <div style="margin-top: 10px;">
-                                       <ul>"""
-        
-        
-        # Chama a função para cada faixa de prazo
-        card_html += exibir_processos(processos_verde, df, df_original, "verde", "0-5")
-        card_html += exibir_processos(processos_amarelo, df, df_original, "laranja","6-10")
-        card_html += exibir_processos(processos_vermelho, df,  df_original, "vermelho", "11+")
-
-        card_html += "</ul></div></details></div></div>"
-
-        # --- Acima você precisa definir os contadores no seu loop, assim:
-        
-
-        colunas[i % num_colunas].markdown(card_html, unsafe_allow_html=True)
-
-
-def lista_geral_prazo(df_resultado):
-
-    # CSS para estilizar a lista e as barras
-    st.markdown("""
-    <style>
-        .container {
-            background-color: #fff;
-            margin-bottom: 1px;
-            display: flex;
-            flex-direction: column;
-            gap: 5px; /* Espaçamento entre as linhas ajustado */
-            box-shadow: 0 4px 10px rgba(0, 0, 0, 0.1);
-            border-radius: 10px;
-            padding: 4px;
-        }
-        .lista-item {
-            
-            border-radius: 8px;
-            padding: 4px;
-            
-            display: flex;
-            justify-content: flex-start;
-            align-items: center;
-            gap: 10px; /* Reduzi o gap entre os itens */
-            width: 100%;
-            font-size: 10px;
-        }
-        .lista-item .nome {
-            flex: 1;
-            text-align: left;
-            font-size: 15px; /* Fonte do nome bem menor */
-            font-weight: bold;
-            overflow: hidden;
-            text-overflow: ellipsis;
-            padding-left: 5px;
-            margin-bottom: 2px; /* Menos espaçamento entre nome e barra */
-        }
-        .barra-status-container {
-            height: 20px; /* Menor altura para a barra */
-            display: flex;
-            position: relative;
-            border-radius: 5px;
-            overflow: hidden;
-            flex: 10;
-            background-color: #e0e0e0;
-        }
-        .barra-status {
-            height: 100%;
-        }
-        .barra-verde {
-            background-color: #1cc88a;
-        }
-        .barra-amarela {
-            background-color: #f6c23e;
-        }
-        .barra-vermelha {
-            background-color: #e74a3b;
-        }
-        .barra-texto {
-            position: absolute;
-            width: 100%;
-            text-align: center;
-            color: white;
-            font-size: 12px; /* Texto dentro da barra ajustado */
-            font-weight: bold;
-            line-height: 20px; /* Alinhamento vertical ajustado */
-        }
-        .faixa-label {
-            position: absolute;
-            top: -15px;
-            font-size: 10px;
-            font-weight: normal;
-            color: #333;
-        }
-        .total-processos {
-            flex:1;
-            display: flex;
-            font-size: 12px;
-            color: #555;
-            font-weight: bold;
-            min-width: 60px;
-            text-align: right;
-            margin: 0px 1em 0 5px;
-            justify-content: center 
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    # Exemplo de como os dados seriam filtrados e agrupados
-    responsaveis = df_resultado["Responsável"].unique()
-    max_processos = df_resultado.groupby("Responsável").size().max()
-
-
-    # Exibir lista de responsáveis com barras de progresso
-
-    lista_html = """
-            <div class="container">
-            """
-    for resp in responsaveis:
-        registros = df_resultado[df_resultado["Responsável"] == resp]
-
-        processos_verde = registros.loc[registros["Faixa de Prazo"] == "0-5", ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records")
-        processos_amarelo = registros.loc[registros["Faixa de Prazo"] == "6-10", ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records")
-        processos_vermelho = registros.loc[registros["Faixa de Prazo"] == "11+", ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records")
-
-        verde = len(processos_verde)
-        amarelo = len(processos_amarelo)
-        vermelho = len(processos_vermelho)
-        total_processos = verde + amarelo + vermelho
-
-        largura_barra = (total_processos / max_processos) * 100
-
-        pct_verde = verde / max_processos if max_processos else 0
-        pct_amarelo = amarelo / max_processos if max_processos else 0
-        pct_vermelho = vermelho / max_processos if max_processos else 0
-        
-
-        barra_texto = []
-        if pct_verde > 0:
-            barra_texto.append(f"0-5: {verde}")
-        if pct_amarelo > 0:
-            barra_texto.append(f"6-10: {amarelo}")
-        if pct_vermelho > 0:
-            barra_texto.append(f"11+: {vermelho}")
-
-        texto_barra = " | ".join(barra_texto)
-
-        
-
-        lista_html += f"""
-        <div class="lista-item">
-                <div class="nome">
-                    {resp}
-                </div>
-                <div class="barra-status-container" style="width: {largura_barra}%;">
-                    <div class="barra-status barra-verde" style="width: {pct_verde * 100}%;"></div>
-                    <div class="barra-status barra-amarela" style="width: {pct_amarelo * 100}%;"></div>
-                    <div class="barra-status barra-vermelha" style="width: {pct_vermelho * 100}%;"></div>
-                    <div class="barra-texto">{texto_barra}</div>
-                </div>
-                <div class="total-processos">
-                    {total_processos} processos
-                </div>
-            </div>
-        """
-
-        # Fechar o contêiner da lista
-    lista_html += "</div>"
-
-    # Exibir a lista no Streamlit
-    st.markdown(lista_html, unsafe_allow_html=True)
-
-# Exibindo os cards
-st.subheader("👥 Painel de Responsáveis")
-
-grafico_resposavel_prazo(df_resultado)
+    for i, resp in enumerate(contagens.index):
+        contagem = dict(zip(contagens.columns, contagens.loc[resp].tolist()))
+
+        if not sob_demanda:
+            detalhes = detalhar()
+            registros = detalhes["agregacao"]["registros"][resp]
+            card_html = html_do_card(
+                resp, contagem, assinatura_passagens(registros), versao,
+                registros, detalhes["status_passagens"], indice,
+            )
+            colunas[i % num_colunas].markdown(card_html, unsafe_allow_html=True)
+            continue
+
+        with colunas[i % num_colunas]:
+            card_sob_demanda(resp, contagem, detalhar, indice, versao)
+
+
+# Sob demanda: o card sai só com contadores e barra; a lista de processos e as
+# linhas do tempo só são montadas quando o card é expandido, por página. Como
+# fragmento, abrir ou paginar um card reroda só ele, com o recorte já em cache
+@st.fragment
+def card_sob_demanda(resp, contagem, detalhar, indice, versao):
+    st.markdown(html_do_card(resp, contagem), unsafe_allow_html=True)
+    if st.toggle("📜 Processos", key=f"processos_{resp}"):
+        detalhes = detalhar()
+        registros = detalhes["agregacao"]["registros"][resp]
+        por_pagina = st.selectbox("Processos por página", options=[25, 50, 100, 250], key=f"por_pagina_{resp}")
+        paginas = max(math.ceil(len(registros) / por_pagina), 1)
+        # Filtros ou tamanho de página novos podem deixar a página guardada fora do intervalo
+        if st.session_state.get(f"pagina_{resp}", 1) > paginas:
+            st.session_state[f"pagina_{resp}"] = 1
+        pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, key=f"pagina_{resp}") if paginas > 1 else 1
+        inicio = (pagina - 1) * por_pagina
+        st.markdown(
+            html_dos_processos(
+                assinatura_passagens(registros), versao, inicio, inicio + por_pagina, contagem,
+                registros, detalhes["status_passagens"], indice,
+            ),
+            unsafe_allow_html=True,
+        )
 
 
+@st.cache_data(max_entries=64, show_spinner=False)
+def html_da_lista_geral(contagens):
+    return montar_lista_geral(contagens)
 
-exibir_cards_por_status(df_resultado,df_original)
-lista_geral_prazo(df_resultado)
 
+@medir
+def lista_geral_prazo(contagens):
+    # Exibir lista de responsáveis com barras de progresso, a partir das contagens do recorte do cubo
+    st.markdown(html_da_lista_geral(contagens), unsafe_allow_html=True)
 
+# Exibindo os cards
+st.subheader("👥 Painel de Responsáveis")
 
+# Estilos dos cards e da lista geral, num só bloco. Fica fora dos fragmentos: abrir
+# ou paginar um card, buscar e exportar não o reenviam. Uma execução completa
+# (filtros da barra lateral) precisa reenviá-lo, pois o Streamlit retira da página
+# o que a execução não emitir de novo
+st.markdown(CSS, unsafe_allow_html=True)
 
+contagens_responsaveis = contagem_por(fatia, "Responsável")
+grafico_resposavel_prazo(contagens_responsaveis)
 
 
 
+exibir_cards_por_status(
+    contagens_responsaveis, detalhar_recorte, indice_de_eventos(df_original, versao_eventos), versao_eventos,
+    sob_demanda=processos_sob_demanda,
+)
+lista_geral_prazo(contagens_responsaveis)
 
 
+# Busca nos eventos: digitar ou escolher um processo só reroda esta seção
+@st.fragment
+def busca_nos_eventos(df_original, df_resultado, indice, versao):
+    consulta = st.text_input(
+        "Buscar nas descrições dos eventos",
+        placeholder='ex.: reabertura "termo de referência"',
+        help="Todas as palavras precisam aparecer; trechos entre aspas, seguidos e na ordem. Maiúsculas e acentos não importam.",
+    )
+    if not consulta.strip():
+        return
+
+    indice_busca = indice_de_busca(df_original, versao)
+    encontrado = medir(buscar)(indice_busca, consulta)
+    eventos_encontrados = df_original.iloc[encontrado["linhas"]]
+    processos = processos_encontrados(df_original, encontrado["linhas"])
+    st.caption(f"{len(encontrado['linhas'])} eventos encontrados em {len(processos)} processos")
+    if processos.empty:
+        return
+
+    st.dataframe(processos, hide_index=True, height=250)
+    processo = st.selectbox("Ver as passagens e a linha do tempo do processo", processos["Processo"])
+
+    # Passagens do processo, com quantos dos eventos encontrados caem em cada uma
+    momentos = eventos_encontrados.loc[eventos_encontrados["Processo"] == processo, "Data/Hora"].to_numpy()
+    passagens = df_resultado[df_resultado["Processo"] == processo].sort_values("Data Recebido", ascending=False)
+    recebido = passagens["Data Recebido"].to_numpy()[:, None]
+    concluido = passagens["Data Conclusão"].fillna(pd.Timestamp.max).to_numpy()[:, None]
+    passagens = passagens.assign(**{
+        "Eventos encontrados": ((momentos >= recebido) & (momentos <= concluido)).sum(axis=1),
+    })
+    st.dataframe(
+        passagens[["Data Recebido", "Unidade", "Responsável", "Status", "Data Conclusão", "Dias de Prazo", "Eventos encontrados"]],
+        hide_index=True,
+    )
 
+    # Linha do tempo completa do processo, do mais recente ao mais antigo
+    inicio, fim = indice["intervalos"].get(processo, (0, 0))
+    colunas = {coluna: valores[inicio:fim] for coluna, valores in indice["colunas"].items()}
+    linha_do_tempo = pd.DataFrame({
+        "Encontrado": descricoes_encontradas(indice_busca, encontrado, colunas["Descrição"]),
+        **colunas,
+    })
+    st.dataframe(linha_do_tempo, hide_index=True)
+
+
+st.subheader("🔎 Busca nos Eventos")
+busca_nos_eventos(df_original, df_resultado, indice_de_eventos(df_original, versao_eventos), versao_eventos)
+
+# Tempo, linhas e memória de cada etapa desta execução, para achar gargalos
+if PAINEL_ADMIN:
+    with st.sidebar.expander("⏱️ Desempenho desta execução"):
+        st.dataframe(pd.DataFrame(medicoes()), hide_index=True)
+    # O processamento roda na thread de atualização (ver motor.manter_atualizado)
+    if not (MODO_PARTICIONADO or MODO_PRECALCULADO):
+        with st.sidebar.expander("🔄 Última atualização dos dados (segundo plano)"):
+            st.dataframe(pd.DataFrame(dados_compartilhados(FONTE_DADOS)["medicoes"]), hide_index=True)
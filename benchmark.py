@@ -0,0 +1,454 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from agregacoes import agregar_por_responsavel
+from busca import buscar, construir_indice_busca
+from cards import indexar_status, montar_card, montar_processos
+import cubo
+import cubo_arrow
+from cubo import construir_cubo
+from dias_uteis import calcular_prazos, faixa_de_prazo
+from exportacao import FORMATOS, exportar
+from fontes import carregar, mapear_categorias
+from gerador import gerar_eventos
+from indice_eventos import construir_indice
+from paralelo import passagens_com_prazos
+from passagens import classificar_eventos, ordenar_eventos, padroes_de_eventos, reconstruir_passagens
+from usuarios import usuarios_nomes
+
+
+def _passagens_sinteticas(quantidade, eventos_por_passagem=5, semente=0):
+    # Passagens de um único responsável, cada uma com alguns eventos no período
+    rng = np.random.default_rng(semente)
+    recebido = pd.Timestamp("2025-01-02 08:00") + pd.to_timedelta(rng.integers(0, 300 * 24 * 60, quantidade), unit="min")
+    duracao = pd.to_timedelta(rng.integers(60, 30 * 24 * 60, quantidade), unit="min")
+    concluida = rng.random(quantidade) < 0.9
+
+    passagens = pd.DataFrame({
+        "Processo": [f"08038.{i:06d}/2025-00" for i in range(quantidade)],
+        "Data Recebido": recebido,
+        "Responsável": "Responsável Sintético",
+        "Tipo": "Contratos - Repactuação",
+        "Data Conclusão": (recebido + duracao).where(concluida),
+        "Status": np.where(concluida, "Concluído", "Aberto"),
+        "Faixa de Prazo": faixa_de_prazo(rng.integers(0, 20, quantidade)),
+    })
+
+    fracao = rng.random((quantidade, eventos_por_passagem))
+    deslocamento = (fracao * duracao.to_numpy().astype("int64")[:, None]).astype("timedelta64[ns]")
+    eventos = pd.DataFrame({
+        "Processo": np.repeat(passagens["Processo"].to_numpy(), eventos_por_passagem),
+        "Data/Hora": np.repeat(recebido.to_numpy(), eventos_por_passagem) + deslocamento.ravel(),
+        "Usuário": "Responsável Sintético",
+        "Descrição": "Assinado Documento 0000000 (Despacho) por responsavel.sintetico",
+    })
+    return passagens, eventos
+
+
+def _medir(funcao, repeticoes=3):
+    # Melhor tempo entre as repetições, em segundos
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def benchmark_cards(tamanhos=(10, 100, 1000, 5000)):
+    """Tempo de montagem de um card conforme cresce o número de passagens do responsável.
+
+    Compara também a busca de status por varredura da tabela (como era feito
+    por badge) com a busca no dicionário indexado por (Processo, Data Recebido).
+    """
+    print(f"{'passagens':>10} {'card (s)':>10} {'varredura (s)':>14} {'dicionário (s)':>15}")
+    for quantidade in tamanhos:
+        passagens, eventos = _passagens_sinteticas(quantidade)
+        indice = construir_indice(eventos)
+        chaves = list(zip(passagens["Processo"], passagens["Data Recebido"]))
+
+        def varredura():
+            for processo, data in chaves:
+                passagens[(passagens["Processo"] == processo) & (passagens["Data Recebido"] == data)].iloc[0]
+
+        def dicionario():
+            status_passagens = indexar_status(passagens)
+            for chave in chaves:
+                status_passagens[chave]
+
+        tempo_card = _medir(lambda: montar_card("Responsável Sintético", passagens, indexar_status(passagens), indice))
+        tempo_varredura = _medir(varredura, repeticoes=1)
+        tempo_dicionario = _medir(dicionario)
+        print(f"{quantidade:>10} {tempo_card:>10.4f} {tempo_varredura:>14.4f} {tempo_dicionario:>15.4f}")
+
+
+def benchmark_classificacao(tamanhos=(100_000, 1_000_000), arquivo="atividades_completas.parquet"):
+    """Vazão (linhas/s) da classificação dos eventos sobre a base do repositório replicada.
+
+    "repetidas" mantém as descrições da base (muitas se repetem entre as cópias);
+    "distintas" acrescenta o número da linha a cada uma, o pior caso para a
+    classificação por descrição distinta.
+    """
+    base = pd.read_parquet(arquivo, columns=["Descrição"])
+    padroes = padroes_de_eventos()
+    print(f"{'linhas':>10} {'repetidas (linhas/s)':>21} {'distintas (linhas/s)':>21}")
+    for quantidade in tamanhos:
+        repetidas = base.iloc[np.arange(quantidade) % len(base)].reset_index(drop=True)
+        distintas = repetidas.assign(**{"Descrição": repetidas["Descrição"] + " #" + repetidas.index.astype(str)})
+
+        tempo_repetidas = _medir(lambda: classificar_eventos(repetidas, padroes))
+        tempo_distintas = _medir(lambda: classificar_eventos(distintas, padroes))
+        print(f"{quantidade:>10} {quantidade / tempo_repetidas:>21,.0f} {quantidade / tempo_distintas:>21,.0f}")
+
+
+def _etapas_do_pipeline(caminho, data_referencia):
+    # Etapas na ordem do painel; cada uma recebe o estado das anteriores e
+    # devolve (nome da medida de linhas, quantidade de linhas processadas)
+    estado = {}
+
+    def carga():
+        estado["dados"] = carregar(caminho)["dados"]
+        return len(estado["dados"])
+
+    def datas():
+        estado["datas"] = pd.to_datetime(estado["dados"]["Data/Hora"], dayfirst=True, errors="coerce")
+        return len(estado["datas"])
+
+    def classificacao():
+        dados = estado["dados"].assign(**{
+            "Usuário": mapear_categorias(estado["dados"]["Usuário"], usuarios_nomes),
+            "Data/Hora": estado["datas"],
+        })
+        estado["eventos"] = classificar_eventos(dados)
+        return len(dados)
+
+    def ordenacao():
+        estado["ordenados"] = ordenar_eventos(estado["eventos"])
+        return len(estado["ordenados"])
+
+    def passagens():
+        estado["passagens"] = reconstruir_passagens(estado["ordenados"], usuarios_nomes)
+        return len(estado["ordenados"])
+
+    def dias_uteis():
+        estado["resultado"] = calcular_prazos(estado["passagens"], data_referencia).sort_values(by="Responsável")
+        return len(estado["resultado"])
+
+    def agregacao():
+        estado["agregacao"] = agregar_por_responsavel(estado["resultado"])
+        return len(estado["resultado"])
+
+    def cubo():
+        estado["cubo"] = construir_cubo(estado["resultado"])
+        return len(estado["resultado"])
+
+    def indice():
+        estado["indice"] = construir_indice(estado["eventos"])
+        return len(estado["eventos"])
+
+    def cards():
+        # O que o painel monta por padrão: o card de cada responsável e a
+        # primeira página (25 processos) da lista de cada um
+        agregacao, status_passagens = estado["agregacao"], indexar_status(estado["resultado"])
+        for resp in agregacao["responsaveis"]:
+            registros, contagem = agregacao["registros"][resp], agregacao["contagens"].loc[resp]
+            montar_card(resp, registros, com_processos=False, contagem=contagem)
+            montar_processos(registros, status_passagens, estado["indice"], 0, 25, contagem)
+        return len(estado["resultado"])
+
+    return [carga, datas, classificacao, ordenacao, passagens, dias_uteis, agregacao, cubo, indice, cards]
+
+
+def benchmark_pipeline(tamanhos=(10_000, 100_000, 1_000_000, 5_000_000), saida="benchmark_pipeline.json", memoria=True):
+    """Tempo, vazão e pico de memória de cada etapa do processamento sobre logs sintéticos.
+
+    Para cada tamanho gera um log com `gerador.gerar_eventos`, grava em parquet
+    temporário e mede as etapas em sequência. O pico de memória (tracemalloc)
+    é medido numa segunda passada, para não distorcer os tempos. O resultado
+    vai para `saida` em JSON, identificado pelo commit, para comparação entre versões.
+    """
+    data_referencia = pd.Timestamp("2025-01-31")
+    resultados = []
+    print(f"{'eventos':>10} {'etapa':<14} {'tempo (s)':>10} {'linhas/s':>14} {'pico (MB)':>10}")
+    for quantidade in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "eventos.parquet")
+            gerar_eventos(quantidade).to_parquet(caminho, index=False)
+
+            tempos = {}
+            for etapa in _etapas_do_pipeline(caminho, data_referencia):
+                inicio = time.perf_counter()
+                linhas = etapa()
+                tempos[etapa.__name__] = (time.perf_counter() - inicio, linhas)
+
+            picos = {}
+            if memoria:
+                for etapa in _etapas_do_pipeline(caminho, data_referencia):
+                    tracemalloc.start()
+                    etapa()
+                    picos[etapa.__name__] = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+
+        for etapa, (segundos, linhas) in tempos.items():
+            resultado = {
+                "eventos": quantidade,
+                "etapa": etapa,
+                "segundos": round(segundos, 4),
+                "linhas": linhas,
+                "linhas_por_segundo": round(linhas / segundos) if segundos else None,
+                "pico_memoria_mb": round(picos[etapa], 1) if etapa in picos else None,
+            }
+            resultados.append(resultado)
+            pico = f"{resultado['pico_memoria_mb']:>10.1f}" if memoria else f"{'-':>10}"
+            print(f"{quantidade:>10} {etapa:<14} {segundos:>10.3f} {resultado['linhas_por_segundo']:>14,} {pico}")
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "commit": commit,
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "resultados": resultados,
+        }, arquivo, ensure_ascii=False, indent=2)
+    return resultados
+
+
+def benchmark_paralelo(quantidade=2_000_000, trabalhadores=(1, 2, 4, 8)):
+    """Reconstrução das passagens com prazos conforme o número de processos de trabalho.
+
+    Com 1 trabalhador roda o caminho serial; os demais forçam o paralelo (sem
+    o mínimo de eventos) e conferem que o resultado é idêntico ao serial.
+    """
+    data_referencia = pd.Timestamp("2025-01-31")
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "eventos.parquet")
+        gerar_eventos(quantidade).to_parquet(caminho, index=False)
+        dados = carregar(caminho)["dados"]
+    eventos = dados.assign(**{
+        "Usuário": mapear_categorias(dados["Usuário"], usuarios_nomes),
+        "Data/Hora": pd.to_datetime(dados["Data/Hora"], dayfirst=True),
+    })
+    eventos = ordenar_eventos(classificar_eventos(eventos))
+
+    serial = None
+    print(f"{os.cpu_count()} núcleos, {quantidade} eventos")
+    print(f"{'trabalhadores':>13} {'tempo (s)':>10} {'aceleração':>11}")
+    for quantidade_trabalhadores in trabalhadores:
+        inicio = time.perf_counter()
+        resultado = passagens_com_prazos(eventos, usuarios_nomes, data_referencia, quantidade_trabalhadores, minimo=0)
+        segundos = time.perf_counter() - inicio
+        if serial is None:
+            serial = (resultado, segundos)
+        else:
+            pd.testing.assert_frame_equal(resultado, serial[0].reset_index(drop=True))
+        print(f"{quantidade_trabalhadores:>13} {segundos:>10.3f} {serial[1] / segundos:>10.2f}x")
+
+
+def _resultado_sintetico(quantidade, semente=0):
+    # df_resultado com a cardinalidade da base real: unidades, responsáveis, tipos e um ano de recebimentos
+    rng = np.random.default_rng(semente)
+    unidades = np.array([f"DCONT REGIONAL {i:03d} DPGU" for i in range(12)], dtype=object)
+    responsaveis = np.array(list(usuarios_nomes.values()) + [f"usuario.{i:04d}" for i in range(150)], dtype=object)
+    tipos = np.array([f"Tipo de Processo {i:02d}" for i in range(60)], dtype=object)
+    dias = rng.integers(0, 60, quantidade)
+    return pd.DataFrame({
+        "Processo": np.char.add("08038.", np.char.zfill(rng.integers(0, quantidade // 4, quantidade).astype(str), 6)).astype(object),
+        "Data Recebido": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, quantidade), unit="min"),
+        "Responsável": responsaveis[rng.integers(0, len(responsaveis), quantidade)],
+        "Unidade": unidades[rng.integers(0, len(unidades), quantidade)],
+        "Tipo": tipos[rng.integers(0, len(tipos), quantidade)],
+        "Status": np.where(rng.random(quantidade) < 0.8, "Concluído", "Aberto").astype(object),
+        "Dias de Prazo": dias,
+        "Faixa de Prazo": faixa_de_prazo(dias).astype(object),
+    })
+
+
+def benchmark_arrow(tamanhos=(1_000_000, 5_000_000)):
+    """Cubo dos filtros e gráficos nos backends pandas (cubo.py) e Arrow (cubo_arrow.py).
+
+    "cubo" é a montagem, uma vez por versão dos dados; "recorte" é o que cada
+    execução do painel faz com os filtros da barra lateral (fatia, métricas,
+    contagens, médias e opções de unidade). Os dois backends são conferidos.
+    """
+    def recorte(modulo, dados, filtros):
+        fatia = modulo.fatiar(dados, **filtros)
+        return (
+            modulo.totais(fatia),
+            modulo.contagem_por(fatia, "Unidade"),
+            modulo.contagem_por(fatia, "Responsável"),
+            modulo.media_de_prazo_por(fatia, "Unidade"),
+            modulo.media_de_prazo_por(fatia, "Tipo"),
+            modulo.valores_de(fatia, "Unidade"),
+        )
+
+    varias = [
+        {},
+        {"inicio": "2025-03-01", "fim": "2025-05-31"},
+        {"status": "Aberto", "inicio": "2025-01-01", "fim": "2025-12-31", "unidade": "DCONT REGIONAL 003 DPGU"},
+    ]
+    print(f"{'passagens':>10} {'backend':>8} {'cubo (s)':>9} {'recorte (ms)':>13}")
+    for quantidade in tamanhos:
+        resultado = _resultado_sintetico(quantidade)
+        saidas = {}
+        for nome, modulo in (("pandas", cubo), ("arrow", cubo_arrow)):
+            dados = modulo.construir_cubo(resultado)
+            segundos_cubo = _medir(lambda: modulo.construir_cubo(resultado), repeticoes=2)
+            segundos_recorte = _medir(lambda: [recorte(modulo, dados, filtros) for filtros in varias], repeticoes=5) / len(varias)
+            saidas[nome] = [recorte(modulo, dados, filtros) for filtros in varias]
+            print(f"{quantidade:>10} {nome:>8} {segundos_cubo:>9.3f} {segundos_recorte * 1000:>13.2f}")
+
+        for pandas_, arrow_ in zip(saidas["pandas"], saidas["arrow"]):
+            assert pandas_[0] == arrow_[0] and pandas_[5] == arrow_[5]
+            for esperado, obtido in zip(pandas_[1:5], arrow_[1:5]):
+                (pd.testing.assert_frame_equal if isinstance(esperado, pd.DataFrame) else pd.testing.assert_series_equal)(esperado, obtido)
+
+
+def benchmark_busca(quantidade=2_000_000, consultas=("reabertura", "despacho assinado", '"retirado do bloco"', "oficio 1234567")):
+    """Índice de busca nas descrições: montagem, remontagem com 1% de eventos novos e consultas.
+
+    As consultas são comparadas com um `str.contains` por linha sobre a
+    Descrição em minúsculas (que nem desfaz os acentos).
+    """
+    eventos = gerar_eventos(quantidade)
+    base = eventos.iloc[: quantidade * 99 // 100]
+
+    inicio = time.perf_counter()
+    anterior = construir_indice_busca(base)
+    print(f"{quantidade} eventos; montagem do índice: {time.perf_counter() - inicio:.2f} s")
+    inicio = time.perf_counter()
+    indice = construir_indice_busca(eventos, anterior)
+    print(f"remontagem com 1% de eventos novos: {time.perf_counter() - inicio:.2f} s")
+
+    minusculas = eventos["Descrição"].str.lower()
+    print(f"{'consulta':>24} {'eventos':>9} {'índice (ms)':>12} {'str.contains (ms)':>18}")
+    for consulta in consultas:
+        encontrados = len(buscar(indice, consulta)["linhas"])
+        segundos_indice = _medir(lambda: buscar(indice, consulta), repeticoes=5)
+        palavras = consulta.replace('"', "").split()
+        segundos_contains = _medir(lambda: np.logical_and.reduce([minusculas.str.contains(p, regex=False).to_numpy() for p in palavras]), repeticoes=1)
+        print(f"{consulta:>24} {encontrados:>9} {segundos_indice * 1000:>12.2f} {segundos_contains * 1000:>18.1f}")
+
+
+def benchmark_exportacao(quantidade=1_000_000, formatos=tuple(FORMATOS), com_eventos=False, eventos_por_passagem=3):
+    """Exportação de `quantidade` passagens em cada formato: tempo, tamanho e pico de memória.
+
+    Com `com_eventos` cada passagem sai com `eventos_por_passagem` eventos
+    sintéticos, juntados pelo índice de eventos (montado antes da medição,
+    como no painel, onde ele fica em cache por versão dos dados). O pico é o
+    quanto o RSS do processo passou do que já ocupava com as passagens em
+    memória (só no Linux); deve ficar em torno de um bloco, qualquer que seja
+    `quantidade`.
+    """
+    resultado = _resultado_sintetico(quantidade)
+    resultado["Data Conclusão"] = resultado["Data Recebido"].where(resultado["Status"] == "Concluído") + pd.Timedelta(days=3)
+    indice = None
+    if com_eventos:
+        inicio = time.perf_counter()
+        indice = construir_indice(_eventos_das_passagens(resultado, eventos_por_passagem))
+        print(f"índice de {len(indice['chaves'])} eventos: {time.perf_counter() - inicio:.2f} s")
+    print(f"{quantidade} passagens" + (" com os eventos" if com_eventos else ""))
+    print(f"{'formato':>8} {'linhas':>10} {'tempo (s)':>10} {'arquivo (MB)':>13} {'pico (MB)':>10}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for formato in formatos:
+            caminho = os.path.join(pasta, f"passagens.{FORMATOS[formato][0]}")
+            antes = _reiniciar_pico_de_memoria()
+            inicio = time.perf_counter()
+            linhas = exportar(resultado, caminho, formato, indice)
+            segundos = time.perf_counter() - inicio
+            pico = "-" if antes is None else f"{_pico_de_memoria() - antes:.1f}"
+            print(f"{formato:>8} {linhas:>10} {segundos:>10.2f} {os.path.getsize(caminho) / 2**20:>13.1f} {pico:>10}")
+
+
+def _eventos_das_passagens(resultado, por_passagem, semente=0):
+    # Eventos dentro de cada passagem (até 3 dias após o recebimento), com descrições repetidas como no SEI
+    rng = np.random.default_rng(semente)
+    linhas = np.repeat(np.arange(len(resultado)), por_passagem)
+    descricoes = np.array([f"Documento {i} assinado por usuário" for i in range(500)], dtype=object)
+    return pd.DataFrame({
+        "Processo": resultado["Processo"].to_numpy()[linhas],
+        "Data/Hora": resultado["Data Recebido"].to_numpy()[linhas]
+        + pd.to_timedelta(rng.integers(0, 3 * 24 * 60, len(linhas)), unit="min").to_numpy(),
+        "Usuário": resultado["Responsável"].to_numpy()[linhas],
+        "Descrição": descricoes[rng.integers(0, len(descricoes), len(linhas))],
+    })
+
+
+def _pico_de_memoria():
+    # Maior RSS do processo (VmHWM), em MB
+    with open("/proc/self/status") as arquivo:
+        return next(int(linha.split()[1]) for linha in arquivo if linha.startswith("VmHWM")) / 1024
+
+
+def _reiniciar_pico_de_memoria():
+    # Zera o VmHWM para o RSS atual e o devolve; None fora do Linux
+    try:
+        with open("/proc/self/clear_refs", "w") as arquivo:
+            arquivo.write("5")
+        return _pico_de_memoria()
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Medições de desempenho do painel e do processamento dos eventos.")
+    comandos = parser.add_subparsers(dest="comando", help="sem comando, roda o de cards")
+
+    cards = comandos.add_parser("cards", help="montagem de um card conforme o número de passagens")
+    cards.add_argument("tamanhos", nargs="*", type=int, default=[10, 100, 1000, 5000], help="passagens do responsável")
+
+    classificacao = comandos.add_parser("classificacao", help="vazão da classificação dos eventos")
+    classificacao.add_argument("tamanhos", nargs="*", type=int, default=[100_000, 1_000_000], help="linhas da base replicada")
+
+    pipeline = comandos.add_parser("pipeline", help="etapas do processamento sobre logs sintéticos")
+    pipeline.add_argument(
+        "tamanhos", nargs="*", type=int, default=[10_000, 100_000, 1_000_000, 5_000_000], help="eventos de cada log"
+    )
+    pipeline.add_argument("--saida", default="benchmark_pipeline.json", help="arquivo JSON com os resultados")
+    pipeline.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória de cada etapa")
+
+    paralelo = comandos.add_parser("paralelo", help="reconstrução das passagens por número de trabalhadores")
+    paralelo.add_argument("eventos", nargs="?", type=int, default=2_000_000, help="eventos do log sintético")
+    paralelo.add_argument("trabalhadores", nargs="*", type=int, default=[1, 2, 4, 8], help="processos de trabalho")
+
+    arrow = comandos.add_parser("arrow", help="cubo dos filtros nos backends pandas e Arrow")
+    arrow.add_argument("tamanhos", nargs="*", type=int, default=[1_000_000, 5_000_000], help="passagens")
+
+    busca = comandos.add_parser("busca", help="índice de busca nas descrições dos eventos")
+    busca.add_argument("eventos", nargs="?", type=int, default=2_000_000, help="eventos do log sintético")
+
+    exportacao = comandos.add_parser("exportacao", help="exportação das passagens em cada formato")
+    exportacao.add_argument("passagens", nargs="?", type=int, default=1_000_000, help="passagens exportadas")
+    exportacao.add_argument(
+        "--formato", action="append", choices=list(FORMATOS), help="formato exportado (repetível; padrão: todos)"
+    )
+    exportacao.add_argument("--com-eventos", action="store_true", help="junta os eventos de cada passagem pelo índice")
+
+    argumentos = parser.parse_args()
+    if argumentos.comando == "classificacao":
+        benchmark_classificacao(argumentos.tamanhos)
+    elif argumentos.comando == "pipeline":
+        benchmark_pipeline(argumentos.tamanhos, argumentos.saida, not argumentos.sem_memoria)
+    elif argumentos.comando == "paralelo":
+        benchmark_paralelo(argumentos.eventos, argumentos.trabalhadores)
+    elif argumentos.comando == "arrow":
+        benchmark_arrow(argumentos.tamanhos)
+    elif argumentos.comando == "busca":
+        benchmark_busca(argumentos.eventos)
+    elif argumentos.comando == "exportacao":
+        benchmark_exportacao(argumentos.passagens, argumentos.formato or list(FORMATOS), argumentos.com_eventos)
+    else:
+        benchmark_cards(argumentos.tamanhos if argumentos.comando == "cards" else cards.get_default("tamanhos"))
@@ -0,0 +1,174 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from indice_eventos import posicoes_das_fatias
+
+# Termos: sequências de letras e dígitos do texto em minúsculas e sem acentos
+_TERMO = re.compile(r"\w+")
+_ACENTOS = re.compile("[\u0300-\u036f]")
+_PARTE_DA_CONSULTA = re.compile(r'"([^"]*)"|(\S+)')
+
+# Descrições novas quebradas em termos por vez; limita os termos guardados como texto
+TAMANHO_BLOCO = 100_000
+
+
+def termos_de(texto):
+    """Termos de `texto` como são indexados: minúsculas, sem acentos, na ordem do texto."""
+    return _TERMO.findall(_ACENTOS.sub("", unicodedata.normalize("NFKD", texto.lower())))
+
+
+def construir_indice_busca(eventos, anterior=None):
+    """Índice invertido dos termos da Descrição dos eventos.
+
+    Cada descrição distinta é quebrada em termos uma única vez; com `anterior`
+    (o índice da versão anterior dos dados) só as descrições que não estavam
+    nele são processadas. Devolve um dicionário com:
+      - "textos": as descrições distintas; "codigos": o texto de cada evento
+      - "vocabulario": os termos, cuja posição é o id do termo
+      - "termos" e "texto_do_termo": os termos de cada texto, em sequência
+      - "posicoes" / "textos_do_termo": onde cada termo ocorre e em quais textos,
+        com os limites de cada termo em "inicio_posicoes" / "inicio_textos"
+    """
+    codigos, textos = pd.factorize(eventos["Descrição"])
+    vocabulario = pd.Index([], dtype=object) if anterior is None else anterior["vocabulario"]
+    conhecidos = np.full(len(textos), -1) if anterior is None else anterior["textos"].get_indexer(textos)
+    novos = np.flatnonzero(conhecidos < 0)
+
+    # Só as descrições novas passam pela quebra em termos; os termos viram ids bloco a bloco
+    ids_novos = []
+    comprimentos = np.zeros(len(textos), dtype=np.int64)
+    for inicio in range(0, len(novos), TAMANHO_BLOCO):
+        bloco = novos[inicio:inicio + TAMANHO_BLOCO]
+        listas = [termos_de(texto) for texto in textos[bloco]]
+        comprimentos[bloco] = [len(lista) for lista in listas]
+        codigos_termos, distintos = pd.factorize(pd.Index([termo for lista in listas for termo in lista], dtype=object))
+        ids = vocabulario.get_indexer(distintos)
+        ausentes = ids < 0
+        ids[ausentes] = len(vocabulario) + np.arange(ausentes.sum())
+        vocabulario = vocabulario.append(distintos[ausentes])
+        ids_novos.append(ids[codigos_termos].astype(np.int32))
+
+    velhos = np.flatnonzero(conhecidos >= 0)
+    if len(velhos):
+        comprimentos[velhos] = anterior["comprimentos"][conhecidos[velhos]]
+    inicios = np.cumsum(comprimentos) - comprimentos
+
+    termos = np.empty(int(comprimentos.sum()), dtype=np.int32)
+    termos[posicoes_das_fatias(inicios[novos], comprimentos[novos])] = np.concatenate(ids_novos) if ids_novos else []
+    if len(velhos):
+        termos[posicoes_das_fatias(inicios[velhos], comprimentos[velhos])] = anterior["termos"][
+            posicoes_das_fatias(anterior["inicios"][conhecidos[velhos]], comprimentos[velhos])
+        ]
+    texto_do_termo = np.repeat(np.arange(len(textos), dtype=np.int32), comprimentos)
+
+    # Ocorrências agrupadas por termo; dentro de cada termo, em ordem de texto
+    posicoes = np.argsort(termos, kind="stable")
+    inicio_posicoes = np.r_[0, np.cumsum(np.bincount(termos, minlength=len(vocabulario)))]
+    termo_ordenado, texto_ordenado = termos[posicoes], texto_do_termo[posicoes]
+    distintos = np.r_[True, (termo_ordenado[1:] != termo_ordenado[:-1]) | (texto_ordenado[1:] != texto_ordenado[:-1])][:len(termos)]
+
+    return {
+        "textos": textos,
+        # Eventos sem descrição apontam para um texto a mais, que nunca é encontrado
+        "codigos": np.where(codigos >= 0, codigos, len(textos)),
+        "vocabulario": vocabulario,
+        "comprimentos": comprimentos,
+        "inicios": inicios,
+        "termos": termos,
+        "texto_do_termo": texto_do_termo,
+        "posicoes": posicoes,
+        "inicio_posicoes": inicio_posicoes,
+        "textos_do_termo": texto_ordenado[distintos],
+        "inicio_textos": np.r_[0, np.cumsum(np.bincount(termo_ordenado[distintos], minlength=len(vocabulario)))],
+    }
+
+
+def interpretar_consulta(consulta):
+    """Partes da consulta, cada uma uma sequência de termos que precisa aparecer.
+
+    Palavras soltas valem cada uma por si (E); trechos entre aspas são frases,
+    com os termos seguidos e na ordem. Uma palavra que se quebra em vários
+    termos (como um número de processo) também é procurada como frase.
+    """
+    partes = []
+    for frase, palavra in _PARTE_DA_CONSULTA.findall(consulta):
+        termos = termos_de(frase or palavra)
+        if termos:
+            partes.append(termos)
+    return partes
+
+
+def buscar(indice, consulta):
+    """Eventos cuja descrição contém todas as partes da consulta.
+
+    Devolve {"linhas": posições dos eventos no quadro indexado, em ordem,
+    "textos": ids das descrições encontradas}.
+    """
+    partes = interpretar_consulta(consulta)
+    ids = [indice["vocabulario"].get_indexer(parte) for parte in partes]
+    if not partes or any((parte < 0).any() for parte in ids):
+        return {"linhas": np.array([], dtype=np.int64), "textos": np.array([], dtype=np.int32)}
+
+    # Interseção a partir do termo mais raro, com uma marcação por texto
+    unicos = sorted(set(np.concatenate(ids).tolist()), key=lambda termo: _quantidade_de_textos(indice, termo))
+    encontrados = _textos_com_termo(indice, unicos[0])
+    for termo in unicos[1:]:
+        encontrados = encontrados[_marcar(len(indice["textos"]), _textos_com_termo(indice, termo))[encontrados]]
+
+    for parte in ids:
+        if len(parte) > 1 and len(encontrados):
+            encontrados = encontrados[_marcar(len(indice["textos"]), _textos_com_frase(indice, parte))[encontrados]]
+
+    return {
+        "linhas": np.flatnonzero(_marcar(len(indice["textos"]) + 1, encontrados)[indice["codigos"]]),
+        "textos": encontrados,
+    }
+
+
+def descricoes_encontradas(indice, resultado, descricoes):
+    """Máscara de quais `descricoes` estão entre as encontradas por `buscar`."""
+    posicoes = indice["textos"].get_indexer(descricoes)
+    return np.where(posicoes >= 0, _marcar(len(indice["textos"]), resultado["textos"])[posicoes], False)
+
+
+def processos_encontrados(eventos, linhas):
+    """Processos com eventos em `linhas`: quantos eventos e o mais recente, do mais recente ao mais antigo."""
+    encontrados = eventos.iloc[linhas]
+    return (
+        encontrados.groupby("Processo", observed=True, sort=False)["Data/Hora"]
+        .agg(["size", "max"])
+        .rename(columns={"size": "Eventos", "max": "Último evento"})
+        .sort_values("Último evento", ascending=False, kind="stable")
+        .reset_index()
+    )
+
+
+def _textos_com_termo(indice, termo):
+    return indice["textos_do_termo"][indice["inicio_textos"][termo]:indice["inicio_textos"][termo + 1]]
+
+
+def _quantidade_de_textos(indice, termo):
+    return indice["inicio_textos"][termo + 1] - indice["inicio_textos"][termo]
+
+
+def _textos_com_frase(indice, termos):
+    # Ocorrências do primeiro termo seguidas dos demais, no mesmo texto
+    termo_por_posicao, texto_por_posicao = indice["termos"], indice["texto_do_termo"]
+    inicio = indice["posicoes"][indice["inicio_posicoes"][termos[0]]:indice["inicio_posicoes"][termos[0] + 1]]
+    for deslocamento, termo in enumerate(termos[1:], start=1):
+        seguinte = np.minimum(inicio + deslocamento, len(termo_por_posicao) - 1)
+        inicio = inicio[
+            (inicio + deslocamento < len(termo_por_posicao))
+            & (termo_por_posicao[seguinte] == termo)
+            & (texto_por_posicao[seguinte] == texto_por_posicao[inicio])
+        ]
+    return np.unique(texto_por_posicao[inicio])
+
+
+def _marcar(tamanho, posicoes):
+    marcado = np.zeros(tamanho, dtype=bool)
+    marcado[posicoes] = True
+    return marcado
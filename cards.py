@@ -0,0 +1,406 @@
+import hashlib
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from indice_eventos import linhas_da_passagem
+
+# Classe CSS de cada faixa de prazo, na ordem em que aparecem no card
+CLASSES_FAIXA = {"0-5": "verde", "6-10": "laranja", "11+": "vermelho"}
+ORDEM_FAIXAS = {faixa: ordem for ordem, faixa in enumerate(CLASSES_FAIXA)}
+
+# Estilos dos cards e da lista geral, emitidos uma vez por execução antes deles
+# (fora dos fragmentos, então abrir ou paginar um card não os reenvia)
+CSS = """<style>
+.card {
+    background-color: #fff;
+    border-radius: 12px;
+    padding: 16px;
+    margin-bottom: 20px;
+    box-shadow: 0 4px 12px rgba(0,0,0,0.06);
+    height: 100%;
+}
+.card h4 {
+    margin-top: 0;
+}
+.badge {
+    background-color: #f0f0f0;
+    border-radius: 12px;
+    padding: 5px 10px;
+    font-size: 12px;
+    color: #333;
+    white-space: nowrap;
+    overflow: hidden;
+    text-overflow: ellipsis;
+    max-width: 150px;
+}
+.verde {
+    background-color: #28a745; /* verde */
+    color: white;
+}
+.laranja {
+    background-color: #ffc107; /* amarelo */
+    color: black;
+}
+.vermelho {
+    background-color: #FF0000; /* vermelho */
+    color: white;
+}
+.prazo-verde { color: #1cc88a; font-weight: bold; }
+.prazo-laranja { color: #f6c23e; font-weight: bold; }
+.prazo-vermelho { color: #e74a3b; font-weight: bold; }
+.processo-box {
+    background-color: #f8f9fc;
+    padding: 5px 10px;
+    border-radius: 6px;
+    font-size: 12px;
+    margin: 2px 0;
+    border-left: 3px solid #4e73df;
+}
+.barra-status-container {
+    height: 30px;
+    display: flex;
+    position: relative;
+    border-radius: 5px; /* Arredondamento do contêiner */
+    overflow: hidden; /* Garante que a borda arredondada não será violada */
+}
+
+.barra-status {
+    height: 100%;
+    display: flex;
+    position: relative;
+}
+
+.barra-verde {
+    background-color: #1cc88a;
+}
+
+.barra-amarela {
+    background-color: #f6c23e;
+}
+
+.barra-vermelha {
+    background-color: #e74a3b;
+}
+
+/* Lógica de arredondamento de bordas */
+.barra-status-container > .barra-status:first-child {
+    border-radius: 5px 0 0 5px; /* Apenas para a primeira barra */
+}
+
+.barra-status-container > .barra-status:last-child {
+    border-radius: 0 5px 5px 0; /* Apenas para a última barra */
+}
+
+.barra-status-container > .barra-status:nth-child(1):only-child {
+    border-radius: 5px; /* Caso seja a única barra */
+}
+.barra-texto {
+    position: absolute;
+    width: 100%;
+    text-align: center;
+    color: white;
+    font-size: 15px;
+    font-weight: bold;
+    line-height: 30px;
+}
+/* Blocos fixos dos cards (antes em style inline em cada elemento) */
+.card-corpo { display: flex; gap: 20px; }
+.card-coluna { flex: 1; }
+.faixas { display: flex; justify-content: space-between; flex-wrap: wrap; gap: 10px; margin-top: 6px; }
+.card-processos { margin-top: 10px; }
+.lista-processos { display: flex; flex-wrap: wrap; gap: 5px; max-height: 250px; overflow-y: auto; }
+.linha-do-tempo { margin-left: 10px; margin-top: 5px; font-size: 12px; }
+
+/* Lista geral; vem depois e prevalece nas classes em comum com os cards */
+.container {
+    background-color: #fff;
+    margin-bottom: 1px;
+    display: flex;
+    flex-direction: column;
+    gap: 5px; /* Espaçamento entre as linhas ajustado */
+    box-shadow: 0 4px 10px rgba(0, 0, 0, 0.1);
+    border-radius: 10px;
+    padding: 4px;
+}
+.lista-item {
+
+    border-radius: 8px;
+    padding: 4px;
+
+    display: flex;
+    justify-content: flex-start;
+    align-items: center;
+    gap: 10px; /* Reduzi o gap entre os itens */
+    width: 100%;
+    font-size: 10px;
+}
+.lista-item .nome {
+    flex: 1;
+    text-align: left;
+    font-size: 15px; /* Fonte do nome bem menor */
+    font-weight: bold;
+    overflow: hidden;
+    text-overflow: ellipsis;
+    padding-left: 5px;
+    margin-bottom: 2px; /* Menos espaçamento entre nome e barra */
+}
+.barra-status-container {
+    height: 20px; /* Menor altura para a barra */
+    display: flex;
+    position: relative;
+    border-radius: 5px;
+    overflow: hidden;
+    flex: 10;
+    background-color: #e0e0e0;
+}
+.barra-status {
+    height: 100%;
+}
+.barra-verde {
+    background-color: #1cc88a;
+}
+.barra-amarela {
+    background-color: #f6c23e;
+}
+.barra-vermelha {
+    background-color: #e74a3b;
+}
+.barra-texto {
+    position: absolute;
+    width: 100%;
+    text-align: center;
+    color: white;
+    font-size: 12px; /* Texto dentro da barra ajustado */
+    font-weight: bold;
+    line-height: 20px; /* Alinhamento vertical ajustado */
+}
+.faixa-label {
+    position: absolute;
+    top: -15px;
+    font-size: 10px;
+    font-weight: normal;
+    color: #333;
+}
+.total-processos {
+    flex:1;
+    display: flex;
+    font-size: 12px;
+    color: #555;
+    font-weight: bold;
+    min-width: 60px;
+    text-align: right;
+    margin: 0px 1em 0 5px;
+    justify-content: center 
+}
+</style>"""
+# Sem comentários nem espaços de formatação: as execuções completas reenviam o bloco
+CSS = re.sub(r"\s*([{};:,>])\s*", r"\1", re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", CSS, flags=re.S))).strip()
+
+# Modelos do HTML, já prontos para o format; cada trecho vai para uma lista
+# e o documento sai de um único join
+_CABECALHO_FAIXA = (
+    "<div class='processo-box'><span class='prazo-{classe}'>Prazo {prazo} ({total} processos):</span></div>"
+    "<div class='lista-processos'>"
+).format
+_PROCESSO = (
+    "<details><summary><span class='badge {classe}' title='{tipo}'> {processo} </span></summary>"
+    "<div class='linha-do-tempo'>"
+).format
+_EVENTO = "<p><strong>{data}:</strong> ({usuario}) - {descricao}</p>".format
+_SEM_EVENTOS = "<p>Sem eventos registrados neste período.</p>"
+
+_CARD = (
+    "<div class='card'><h4>{resp}</h4><div class='card-corpo'><div class='card-coluna'>"
+    "<div class='barra-status-container'>"
+    "<div class='barra-status barra-verde' style='width: {largura_verde:.2f}%;'></div>"
+    "<div class='barra-status barra-amarela' style='width: {largura_amarela:.2f}%;'></div>"
+    "<div class='barra-status barra-vermelha' style='width: {largura_vermelha:.2f}%;'></div>"
+    "<div class='barra-texto'>{texto_barra}</div>"
+    "</div>"
+    "<div class='faixas'>"
+    "<div class='processo-box'><span class='prazo-verde'>0-5 dias:</span> {verde}</div>"
+    "<div class='processo-box'><span class='prazo-laranja'>6-10 dias:</span> {amarelo}</div>"
+    "<div class='processo-box'><span class='prazo-vermelho'>11+ dias:</span> {vermelho}</div>"
+    "</div>"
+    "<p><strong>📋 Total de Processos:</strong> {total}</p>"
+    "</div></div>"
+).format
+_CARD_PROCESSOS = "<div><details><summary><strong>📜 Processos</strong></summary><div class='card-processos'><ul>"
+
+_ITEM_LISTA = (
+    "<div class='lista-item'><div class='nome'>{resp}</div>"
+    "<div class='barra-status-container' style='width: {largura_barra:.2f}%;'>"
+    "<div class='barra-status barra-verde' style='width: {largura_verde:.2f}%;'></div>"
+    "<div class='barra-status barra-amarela' style='width: {largura_amarela:.2f}%;'></div>"
+    "<div class='barra-status barra-vermelha' style='width: {largura_vermelha:.2f}%;'></div>"
+    "<div class='barra-texto'>{texto_barra}</div>"
+    "</div>"
+    "<div class='total-processos'>{total} processos</div></div>"
+).format
+
+
+def indexar_status(df):
+    """Status e data de conclusão de cada passagem, indexados por (Processo, Data Recebido)."""
+    # Em chaves repetidas vale a primeira passagem, como no filtro com .iloc[0] usado antes
+    unicas = df.drop_duplicates(subset=["Processo", "Data Recebido"])
+    return dict(zip(
+        zip(unicas["Processo"], unicas["Data Recebido"]),
+        zip(unicas["Status"], unicas["Data Conclusão"]),
+    ))
+
+
+def assinatura_passagens(registros):
+    """Impressão digital das passagens de um card, para chavear o cache do HTML."""
+    colunas = registros[["Processo", "Tipo", "Data Recebido", "Data Conclusão", "Status", "Faixa de Prazo"]]
+    return hashlib.sha1(pd.util.hash_pandas_object(colunas, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def exibir_processos(processos, status_passagens, indice, faixa_prazo, prazo, total=None):
+    """Gera o HTML para exibir os processos de uma faixa de prazo específica."""
+    if not processos:
+        return ""
+
+    # Na paginação, `total` traz a quantidade da faixa inteira e não só da página
+    total = len(processos) if total is None else total
+    partes = [_CABECALHO_FAIXA(classe=faixa_prazo, prazo=prazo, total=total)]
+    datas, usuarios, descricoes = (indice["colunas"][coluna] for coluna in ("Data/Hora", "Usuário", "Descrição"))
+    agora = datetime.now()
+
+    for proc in processos:
+        numero_processo = proc["Processo"]
+        data = proc["Data Recebido"]
+
+        # Status e conclusão vêm da tabela indexada por (Processo, Data Recebido)
+        status, data_conclusao = status_passagens[(numero_processo, data)]
+        fim = agora if status == "Aberto" else pd.to_datetime(data_conclusao)
+
+        # Eventos da passagem recortados do índice por processo (busca binária por data)
+        a, b = linhas_da_passagem(indice, numero_processo, pd.to_datetime(data), fim)
+
+        partes.append(_PROCESSO(classe=faixa_prazo.lower(), tipo=proc["Tipo"], processo=numero_processo))
+        if a < b:
+            for data_hora, usuario, descricao in zip(
+                datas[a:b].astype("datetime64[us]").tolist(), usuarios[a:b].tolist(), descricoes[a:b].tolist()
+            ):
+                partes.append(_EVENTO(
+                    data=data_hora.strftime("%d/%m/%Y %H:%M"),
+                    usuario=usuario,
+                    descricao=descricao[:100] + ("..." if len(descricao) > 80 else ""),  # Limita o texto
+                ))
+        else:
+            partes.append(_SEM_EVENTOS)
+        partes.append("</div></details>")
+
+    partes.append("</div>")
+    return "".join(partes)
+
+
+def montar_card(resp, registros, status_passagens=None, indice=None, com_processos=True, contagem=None):
+    """Gera o HTML do card de um responsável a partir das suas passagens.
+
+    Com `com_processos=False` o card traz só os contadores e a barra; a lista
+    de processos fica para `montar_processos`, chamada sob demanda. `contagem`
+    traz as quantidades por faixa já agregadas (ver agregacoes.py).
+    """
+    if contagem is None:
+        contagem = contar_faixas(registros)
+    verde, amarelo, vermelho = (int(contagem[faixa]) for faixa in CLASSES_FAIXA)
+    total_processos = verde + amarelo + vermelho
+
+    pct_verde = verde / total_processos if total_processos else 0
+    pct_amarelo = amarelo / total_processos if total_processos else 0
+    pct_vermelho = vermelho / total_processos if total_processos else 0
+
+    barra_texto = []
+    if pct_verde > 0:
+        barra_texto.append(f"0-5: {int(pct_verde * 100)}%")
+    if pct_amarelo > 0:
+        barra_texto.append(f"6-10: {int(pct_amarelo * 100)}%")
+    if pct_vermelho > 0:
+        barra_texto.append(f"11+: {int(pct_vermelho * 100)}%")
+
+    partes = [_CARD(
+        resp=resp,
+        largura_verde=pct_verde * 100,
+        largura_amarela=pct_amarelo * 100,
+        largura_vermelha=pct_vermelho * 100,
+        texto_barra=" | ".join(barra_texto),
+        verde=verde,
+        amarelo=amarelo,
+        vermelho=vermelho,
+        total=total_processos,
+    )]
+
+    if com_processos:
+        partes.append(_CARD_PROCESSOS)
+        partes.append(montar_processos(registros, status_passagens, indice, contagem=contagem))
+        partes.append("</ul></div></details></div>")
+
+    partes.append("</div>")
+    return "".join(partes)
+
+
+def montar_processos(registros, status_passagens, indice, inicio=0, fim=None, contagem=None):
+    """Gera o HTML da lista de processos do card, por faixa de prazo.
+
+    `inicio` e `fim` recortam a lista (na ordem 0-5, 6-10, 11+) para a paginação;
+    só os processos da página têm a linha do tempo montada.
+    """
+    ordem = registros["Faixa de Prazo"].map(ORDEM_FAIXAS).to_numpy(dtype=float)
+    pagina = registros.iloc[np.argsort(ordem, kind="stable")[inicio:fim]]
+
+    if contagem is None:
+        contagem = contar_faixas(registros)
+
+    # Chama a função para cada faixa de prazo
+    return "".join(
+        exibir_processos(
+            pagina.loc[pagina["Faixa de Prazo"] == faixa, ["Processo", "Tipo", "Data Recebido"]].to_dict(orient="records"),
+            status_passagens, indice, classe, faixa, int(contagem[faixa]),
+        )
+        for faixa, classe in CLASSES_FAIXA.items()
+    )
+
+
+def montar_lista_geral(contagens):
+    """Gera o HTML da lista geral: uma barra por responsável, proporcional ao maior total."""
+    max_processos = contagens.sum(axis=1).max()
+
+    partes = ["<div class='container'>"]
+    for resp, verde, amarelo, vermelho in zip(
+        contagens.index, contagens["0-5"].tolist(), contagens["6-10"].tolist(), contagens["11+"].tolist()
+    ):
+        total_processos = verde + amarelo + vermelho
+
+        pct_verde = verde / max_processos if max_processos else 0
+        pct_amarelo = amarelo / max_processos if max_processos else 0
+        pct_vermelho = vermelho / max_processos if max_processos else 0
+
+        barra_texto = []
+        if pct_verde > 0:
+            barra_texto.append(f"0-5: {verde}")
+        if pct_amarelo > 0:
+            barra_texto.append(f"6-10: {amarelo}")
+        if pct_vermelho > 0:
+            barra_texto.append(f"11+: {vermelho}")
+
+        partes.append(_ITEM_LISTA(
+            resp=resp,
+            largura_barra=(total_processos / max_processos) * 100,
+            largura_verde=pct_verde * 100,
+            largura_amarela=pct_amarelo * 100,
+            largura_vermelha=pct_vermelho * 100,
+            texto_barra=" | ".join(barra_texto),
+            total=total_processos,
+        ))
+
+    partes.append("</div>")
+    return "".join(partes)
+
+
+def contar_faixas(registros):
+    """Quantidade de passagens em cada faixa de prazo."""
+    return {faixa: int((registros["Faixa de Prazo"] == faixa).sum()) for faixa in CLASSES_FAIXA}
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from dias_uteis import FAIXAS_PRAZO
+
+# Dimensões do cubo; cada célula guarda a quantidade de passagens e a soma dos
+# Dias de Prazo, de onde saem contagens, somas e médias de qualquer recorte
+DIMENSOES = ["Dia Recebido", "Unidade", "Responsável", "Tipo", "Status", "Faixa de Prazo"]
+
+
+def construir_cubo(df_resultado):
+    """Cubo pré-agregado das passagens, montado uma vez por versão dos dados.
+
+    Devolve um dicionário com:
+      - "celulas": uma linha por combinação das DIMENSOES, com Quantidade e
+        Soma Dias, na ordem em que cada combinação aparece em `df_resultado`
+      - "processos": pares distintos (Dia Recebido, Unidade, Status, Processo),
+        para contar processos únicos, que não se somam entre células
+      - "status", "inicio" e "fim": opções e limites dos filtros da barra lateral
+    """
+    dados = df_resultado.assign(**{"Dia Recebido": df_resultado["Data Recebido"].dt.normalize()})
+
+    celulas = (
+        dados.groupby(DIMENSOES, sort=False, observed=True, dropna=False)["Dias de Prazo"]
+        .agg(["size", "sum"])
+        .rename(columns={"size": "Quantidade", "sum": "Soma Dias"})
+        .reset_index()
+    )
+
+    processos = dados[["Dia Recebido", "Unidade", "Status", "Processo"]].drop_duplicates()
+    processos = processos.assign(Processo=pd.factorize(processos["Processo"])[0])
+
+    return {
+        "celulas": celulas,
+        "processos": processos.reset_index(drop=True),
+        "status": list(pd.unique(df_resultado["Status"].dropna())),
+        "inicio": df_resultado["Data Recebido"].min(),
+        "fim": df_resultado["Data Recebido"].max(),
+    }
+
+
+def fatiar(cubo, status=None, inicio=None, fim=None, unidade=None):
+    """Recorte do cubo pelos filtros da barra lateral (None deixa a dimensão livre).
+
+    `inicio` e `fim` são datas, inclusive, comparadas com o dia de recebimento.
+    """
+    fatia = {}
+    for chave in ("celulas", "processos"):
+        tabela = cubo[chave]
+        filtro = np.ones(len(tabela), dtype=bool)
+        if status is not None:
+            filtro &= (tabela["Status"] == status).to_numpy()
+        if inicio is not None:
+            filtro &= (tabela["Dia Recebido"] >= pd.Timestamp(inicio).normalize()).to_numpy()
+        if fim is not None:
+            filtro &= (tabela["Dia Recebido"] <= pd.Timestamp(fim).normalize()).to_numpy()
+        if unidade is not None:
+            filtro &= (tabela["Unidade"] == unidade).to_numpy()
+        fatia[chave] = tabela[filtro]
+    return fatia
+
+
+def totais(fatia):
+    """Números dos cartões de métricas: passagens, processos únicos, em aberto e concluídos."""
+    celulas = fatia["celulas"]
+    por_status = celulas.groupby("Status", observed=True)["Quantidade"].sum()
+    return {
+        "passagens": int(celulas["Quantidade"].sum()),
+        "processos": int(fatia["processos"]["Processo"].nunique()),
+        "abertos": int(por_status.get("Aberto", 0)),
+        "concluidos": int(por_status.get("Concluído", 0)),
+    }
+
+
+def contagem_por(fatia, dimensao):
+    """Quantidade de passagens por `dimensao` × Faixa de Prazo, com zeros, ordenada pela dimensão."""
+    return (
+        fatia["celulas"].groupby([dimensao, "Faixa de Prazo"], observed=True)["Quantidade"].sum()
+        .unstack("Faixa de Prazo")
+        .reindex(columns=FAIXAS_PRAZO, fill_value=0)
+        .fillna(0)
+        .astype(np.int64)
+    )
+
+
+def media_de_prazo_por(fatia, dimensao):
+    """Média dos Dias de Prazo por `dimensao`, ordenada pela dimensão."""
+    somas = fatia["celulas"].groupby(dimensao, observed=True)[["Soma Dias", "Quantidade"]].sum()
+    return somas["Soma Dias"] / somas["Quantidade"]
+
+
+def valores_de(fatia, dimensao):
+    """Valores distintos de `dimensao` no recorte, na ordem em que aparecem nas passagens."""
+    return list(pd.unique(fatia["celulas"][dimensao].dropna()))
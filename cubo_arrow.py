@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from cubo import DIMENSOES
+from dias_uteis import FAIXAS_PRAZO
+
+# Mesma interface de cubo.py, com as tabelas do cubo em Arrow: filtros, agrupamentos
+# e somas rodam em pyarrow.compute e só os totais agrupados viram pandas, na
+# entrada dos gráficos. Ativado no painel com BACKEND_CALCULO=arrow
+
+
+def construir_cubo(df_resultado):
+    """Cubo pré-agregado das passagens, como `cubo.construir_cubo`, em tabelas Arrow.
+
+    "celulas" e "processos" são `pyarrow.Table`, nas mesmas ordens da versão
+    pandas; "status", "inicio" e "fim" são iguais aos dela.
+    """
+    passagens = pa.Table.from_pandas(
+        df_resultado[[*DIMENSOES[1:], "Data Recebido", "Dias de Prazo", "Processo"]], preserve_index=False
+    )
+    passagens = passagens.append_column("Dia Recebido", pc.floor_temporal(passagens["Data Recebido"], unit="day"))
+    passagens = passagens.append_column("Linha", pa.array(np.arange(len(passagens))))
+
+    # Os grupos saem ordenados pela primeira linha de cada um, como no sort=False do pandas
+    celulas = passagens.group_by(DIMENSOES, use_threads=False).aggregate([
+        ("Dias de Prazo", "count", pc.CountOptions(mode="all")),
+        ("Dias de Prazo", "sum"),
+        ("Linha", "min"),
+    ]).sort_by("Linha_min")
+    celulas = pa.table({
+        **{dimensao: celulas[dimensao] for dimensao in DIMENSOES},
+        "Quantidade": celulas["Dias de Prazo_count"],
+        "Soma Dias": celulas["Dias de Prazo_sum"],
+    })
+
+    chaves = ["Dia Recebido", "Unidade", "Status", "Processo"]
+    processos = passagens.group_by(chaves, use_threads=False).aggregate([("Linha", "min")]).sort_by("Linha_min")
+    processos = pa.table({
+        **{chave: processos[chave] for chave in chaves[:-1]},
+        "Processo": pc.dictionary_encode(processos["Processo"]).combine_chunks().indices,
+    })
+
+    limites = pc.min_max(passagens["Data Recebido"])
+    return {
+        "celulas": celulas,
+        "processos": processos,
+        "status": pc.unique(passagens["Status"]).drop_null().to_pylist(),
+        "inicio": pd.Timestamp(limites["min"].as_py()),
+        "fim": pd.Timestamp(limites["max"].as_py()),
+    }
+
+
+def fatiar(cubo, status=None, inicio=None, fim=None, unidade=None):
+    """Recorte do cubo pelos filtros da barra lateral (None deixa a dimensão livre).
+
+    `inicio` e `fim` são datas, inclusive, comparadas com o dia de recebimento.
+    """
+    fatia = {}
+    for chave in ("celulas", "processos"):
+        tabela = cubo[chave]
+        tipo_dia = tabela.schema.field("Dia Recebido").type
+        condicoes = []
+        if status is not None:
+            condicoes.append(pc.equal(tabela["Status"], status))
+        if inicio is not None:
+            condicoes.append(pc.greater_equal(tabela["Dia Recebido"], pa.scalar(pd.Timestamp(inicio).normalize(), tipo_dia)))
+        if fim is not None:
+            condicoes.append(pc.less_equal(tabela["Dia Recebido"], pa.scalar(pd.Timestamp(fim).normalize(), tipo_dia)))
+        if unidade is not None:
+            condicoes.append(pc.equal(tabela["Unidade"], unidade))
+        for condicao in condicoes[1:]:
+            condicoes[0] = pc.and_kleene(condicoes[0], condicao)
+        # Comparações com nulo ficam fora do recorte, como na versão pandas
+        fatia[chave] = tabela.filter(condicoes[0], null_selection_behavior="drop") if condicoes else tabela
+    return fatia
+
+
+def totais(fatia):
+    """Números dos cartões de métricas: passagens, processos únicos, em aberto e concluídos."""
+    celulas = fatia["celulas"]
+    return {
+        "passagens": pc.sum(celulas["Quantidade"]).as_py() or 0,
+        "processos": pc.count_distinct(fatia["processos"]["Processo"], mode="all").as_py(),
+        "abertos": _soma_onde(celulas, "Status", "Aberto"),
+        "concluidos": _soma_onde(celulas, "Status", "Concluído"),
+    }
+
+
+def contagem_por(fatia, dimensao):
+    """Quantidade de passagens por `dimensao` × Faixa de Prazo, com zeros, ordenada pela dimensão."""
+    somas = _agrupar(fatia["celulas"], [dimensao, "Faixa de Prazo"], ["Quantidade"])
+    dimensoes, posicoes = np.unique(somas[dimensao].to_numpy(zero_copy_only=False), return_inverse=True)
+    faixas = pd.Index(FAIXAS_PRAZO).get_indexer(somas["Faixa de Prazo"].to_numpy(zero_copy_only=False))
+
+    # As faixas fora de FAIXAS_PRAZO são descartadas, como no reindex da versão pandas
+    matriz = np.zeros((len(dimensoes), len(FAIXAS_PRAZO)), dtype=np.int64)
+    conhecidas = faixas >= 0
+    matriz[posicoes[conhecidas], faixas[conhecidas]] = somas["Quantidade"].to_numpy()[conhecidas]
+    return pd.DataFrame(
+        matriz,
+        index=pd.Index(dimensoes, name=dimensao, dtype=object),
+        columns=pd.Index(FAIXAS_PRAZO, name="Faixa de Prazo", dtype=object),
+    )
+
+
+def media_de_prazo_por(fatia, dimensao):
+    """Média dos Dias de Prazo por `dimensao`, ordenada pela dimensão."""
+    somas = _agrupar(fatia["celulas"], [dimensao], ["Soma Dias", "Quantidade"]).sort_by(dimensao)
+    media = pc.divide(pc.cast(somas["Soma Dias"], pa.float64()), pc.cast(somas["Quantidade"], pa.float64()))
+    return pd.Series(
+        media.to_numpy(), index=pd.Index(somas[dimensao].to_numpy(zero_copy_only=False), name=dimensao, dtype=object)
+    )
+
+
+def valores_de(fatia, dimensao):
+    """Valores distintos de `dimensao` no recorte, na ordem em que aparecem nas passagens."""
+    return pc.unique(fatia["celulas"][dimensao]).drop_null().to_pylist()
+
+
+def _agrupar(tabela, chaves, colunas):
+    # Somas de `colunas` por `chaves`, sem os grupos de chave nula (como o groupby do pandas)
+    somas = tabela.group_by(chaves, use_threads=False).aggregate([(coluna, "sum") for coluna in colunas])
+    somas = pa.table({
+        **{chave: somas[chave] for chave in chaves},
+        **{coluna: somas[f"{coluna}_sum"] for coluna in colunas},
+    })
+    validas = pc.is_valid(somas[chaves[0]])
+    for chave in chaves[1:]:
+        validas = pc.and_(validas, pc.is_valid(somas[chave]))
+    return somas.filter(validas)
+
+
+def _soma_onde(tabela, coluna, valor):
+    return pc.sum(tabela["Quantidade"].filter(pc.equal(tabela[coluna], valor))).as_py() or 0
@@ -0,0 +1,114 @@
+import os
+from functools import lru_cache
+
+import holidays
+import numpy as np
+import pandas as pd
+
+# Arquivo opcional com dias sem expediente próprios do órgão (recessos, pontos
+# facultativos). CSV com a coluna "Data" em formato AAAA-MM-DD.
+ARQUIVO_RECESSOS = os.environ.get("ARQUIVO_RECESSOS", "recessos.csv")
+
+FAIXAS_PRAZO = ["0-5", "6-10", "11+"]
+
+# Colunas acrescentadas por `calcular_prazos`
+COLUNAS_PRAZO = ["Status", "Dias de Prazo", "Faixa de Prazo"]
+
+
+def calendario_util(ano_inicial, ano_final, arquivo_recessos=ARQUIVO_RECESSOS):
+    """Calendário de dias úteis (feriados nacionais, do DF e recessos locais) para o intervalo de anos."""
+    # A data de modificação entra na chave para que edições no arquivo invalidem o cache
+    versao = os.path.getmtime(arquivo_recessos) if os.path.exists(arquivo_recessos) else None
+    return _calendario(ano_inicial, ano_final, arquivo_recessos, versao)
+
+
+@lru_cache(maxsize=16)
+def _calendario(ano_inicial, ano_final, arquivo_recessos, versao):
+    feriados = holidays.Brazil(years=range(ano_inicial, ano_final + 1), prov="DF")
+    datas = np.array(list(feriados.keys()), dtype="datetime64[D]")
+
+    if versao is not None:
+        recessos = pd.to_datetime(pd.read_csv(arquivo_recessos)["Data"]).to_numpy(dtype="datetime64[D]")
+        datas = np.concatenate([datas, recessos])
+
+    return np.busdaycalendar(holidays=datas)
+
+
+def contar_dias_uteis(inicio, fim):
+    """Conta os dias úteis entre as datas de `inicio` e `fim` numa única chamada vetorizada.
+
+    Pares com alguma data nula (NaT) ficam como NaN; nesse caso o resultado é
+    float, senão int64.
+    """
+    inicio = np.asarray(inicio, dtype="datetime64[D]")
+    fim = np.asarray(fim, dtype="datetime64[D]")
+    validas = ~(np.isnat(inicio) | np.isnat(fim))
+    if not validas.any():
+        return np.zeros(inicio.shape, dtype=np.int64) if validas.all() else np.full(inicio.shape, np.nan)
+
+    # NaT viraria o ano INT64_MIN e o calendário pediria feriados de bilhões de anos
+    anos = np.concatenate([inicio[validas], fim[validas]]).astype("datetime64[Y]").astype(int) + 1970
+    calendario = calendario_util(int(anos.min()), int(anos.max()))
+    if validas.all():
+        return np.busday_count(inicio, fim, busdaycal=calendario)
+
+    dias = np.full(inicio.shape, np.nan)
+    dias[validas] = np.busday_count(inicio[validas], fim[validas], busdaycal=calendario)
+    return dias
+
+
+def faixa_de_prazo(dias):
+    """Enquadra os dias de prazo nas faixas 0-5, 6-10 e 11+."""
+    dias = np.asarray(dias)
+    return np.select([dias <= 5, dias <= 10], FAIXAS_PRAZO[:2], default=FAIXAS_PRAZO[2])
+
+
+def dia_util_de_referencia(data):
+    """Primeiro dia útil a partir de `data`.
+
+    A contagem de dias úteis até um sábado, domingo ou feriado é a mesma que até
+    o dia útil seguinte; usar este dia como referência evita recalcular prazos
+    quando a data muda sem que mude a contagem.
+    """
+    dia = np.datetime64(pd.Timestamp(data).date(), "D")
+    ano = pd.Timestamp(data).year
+    return pd.Timestamp(np.busday_offset(dia, 0, roll="forward", busdaycal=calendario_util(ano, ano + 1))).date()
+
+
+def calcular_prazos(passagens, data_referencia):
+    """Acrescenta Status, Dias de Prazo e Faixa de Prazo às passagens.
+
+    Passagens em aberto contam os dias úteis até `data_referencia`. Se as
+    passagens já trazem os prazos, as concluídas mantêm os seus (não mudam
+    mais) e só as abertas, ou as que vierem sem prazo, são recalculadas; as
+    demais colunas não são copiadas.
+    """
+    concluida = passagens["Data Conclusão"].notna().to_numpy()
+
+    if all(coluna in passagens for coluna in COLUNAS_PRAZO):
+        linhas = np.flatnonzero(~concluida | passagens["Dias de Prazo"].isna().to_numpy())
+        status = passagens["Status"].to_numpy(dtype=object, copy=True)
+        dias = passagens["Dias de Prazo"].fillna(0).to_numpy(dtype=np.int64, copy=True)
+        faixas = passagens["Faixa de Prazo"].to_numpy(dtype=object, copy=True)
+    else:
+        linhas = slice(None)
+        status = np.empty(len(passagens), dtype=object)
+        dias = np.zeros(len(passagens), dtype=np.int64)
+        faixas = np.empty(len(passagens), dtype=object)
+
+    fim = passagens["Data Conclusão"].to_numpy()[linhas].copy()
+    fim[~concluida[linhas]] = pd.Timestamp(data_referencia).to_datetime64()
+    status[linhas] = np.where(concluida[linhas], "Concluído", "Aberto")
+    contagem = contar_dias_uteis(passagens["Data Recebido"].to_numpy()[linhas], fim)
+    faixas[linhas] = faixa_de_prazo(contagem)
+    if contagem.dtype.kind == "f":
+        # Passagens sem data de recebimento ficam sem prazo (NaN) e sem faixa
+        dias = dias.astype(np.float64)
+        faixas[linhas] = np.where(np.isnan(contagem), None, faixas[linhas])
+    dias[linhas] = contagem
+
+    resultado = passagens.copy(deep=False)
+    resultado["Status"] = status
+    resultado["Dias de Prazo"] = dias
+    resultado["Faixa de Prazo"] = faixas
+    return resultado
@@ -0,0 +1,144 @@
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from indice_eventos import linhas_da_passagem, posicoes_das_fatias
+
+# Colunas exportadas das passagens e, com os eventos, as de cada evento
+COLUNAS_PASSAGENS = [
+    "Processo", "Tipo", "Unidade", "Responsável", "Usuário Recebeu", "Data Recebido",
+    "Usuário Concluiu", "Data Conclusão", "Status", "Dias de Prazo", "Faixa de Prazo",
+]
+COLUNAS_EVENTOS = ["Data/Hora", "Usuário", "Descrição"]
+
+# Extensão e tipo MIME de cada formato de exportação
+FORMATOS = {
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Passagens lidas e gravadas por vez: a memória da exportação fica em torno de um bloco
+TAMANHO_BLOCO = 50_000
+
+# Linhas de dados por aba do XLSX (o Excel aceita 1.048.576, com o cabeçalho)
+LINHAS_POR_ABA = 1_048_575
+
+
+def exportar(passagens, destino, formato, indice=None, linhas=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Grava `passagens` em `destino` (caminho ou arquivo binário aberto), bloco a bloco.
+
+    `formato` é "xlsx", "csv" ou "parquet". Com `indice` (ver
+    indice_eventos.construir_indice) cada passagem sai com os seus eventos, uma
+    linha por evento, como na lista de processos dos cards. `linhas` limita a
+    exportação a essas posições de `passagens`, sem montar o recorte antes.
+    Cada bloco é gravado antes de o próximo ser montado; o resultado inteiro
+    nunca fica em memória. Devolve a quantidade de linhas gravadas.
+    """
+    colunas = [coluna for coluna in COLUNAS_PASSAGENS if coluna in passagens] + (COLUNAS_EVENTOS if indice is not None else [])
+    blocos = blocos_de_exportacao(passagens, indice, linhas, tamanho_bloco)
+    gravar = {"xlsx": _gravar_xlsx, "csv": _gravar_csv, "parquet": _gravar_parquet}[formato]
+    return gravar(blocos, destino, colunas, _esquema(passagens, colunas))
+
+
+def blocos_de_exportacao(passagens, indice=None, linhas=None, tamanho_bloco=TAMANHO_BLOCO):
+    """DataFrames com até `tamanho_bloco` passagens cada, com os eventos se houver `indice`."""
+    colunas = passagens.columns.get_indexer([coluna for coluna in COLUNAS_PASSAGENS if coluna in passagens])
+    linhas = np.arange(len(passagens)) if linhas is None else linhas
+    agora = datetime.now()
+    for inicio in range(0, len(linhas), tamanho_bloco):
+        bloco = passagens.iloc[linhas[inicio:inicio + tamanho_bloco], colunas]
+        yield bloco if indice is None else _com_eventos(bloco, indice, agora)
+
+
+def _com_eventos(bloco, indice, agora):
+    # Eventos de cada passagem entre o recebimento e a conclusão (ou agora, se em aberto)
+    fins = bloco["Data Conclusão"].mask(bloco["Status"] == "Aberto").fillna(pd.Timestamp(agora))
+    intervalos = np.array([
+        linhas_da_passagem(indice, processo, recebido, fim) if pd.notna(recebido) else (0, 0)
+        for processo, recebido, fim in zip(bloco["Processo"], bloco["Data Recebido"], fins)
+    ], dtype=np.int64).reshape(-1, 2)
+    quantidades = intervalos[:, 1] - intervalos[:, 0]
+
+    # Passagens sem eventos ficam numa linha só, com as colunas do evento vazias
+    linhas = np.maximum(quantidades, 1)
+    juntas = bloco.iloc[np.repeat(np.arange(len(bloco)), linhas)].reset_index(drop=True)
+    destino = posicoes_das_fatias(np.cumsum(linhas) - linhas, quantidades)
+    origem = posicoes_das_fatias(intervalos[:, 0], quantidades)
+
+    datas = np.full(len(juntas), np.datetime64("NaT"), dtype="datetime64[ns]")
+    datas[destino] = indice["colunas"]["Data/Hora"][origem]
+    juntas["Data/Hora"] = datas
+    for coluna in ("Usuário", "Descrição"):
+        valores = np.full(len(juntas), None, dtype=object)
+        valores[destino] = indice["colunas"][coluna][origem]
+        juntas[coluna] = valores
+    return juntas
+
+
+def _gravar_xlsx(blocos, destino, colunas, esquema):
+    # Modo write-only: as linhas vão para o arquivo à medida que são acrescentadas
+    livro = Workbook(write_only=True)
+    aba, linhas_na_aba, total = None, LINHAS_POR_ABA, 0
+    for bloco in blocos:
+        valores = bloco.astype(object).where(bloco.notna(), None)
+        for linha in valores.itertuples(index=False, name=None):
+            if linhas_na_aba == LINHAS_POR_ABA:
+                aba = livro.create_sheet("Passagens" if aba is None else f"Passagens ({len(livro.worksheets) + 1})")
+                aba.append(colunas)
+                linhas_na_aba = 0
+            aba.append(linha)
+            linhas_na_aba += 1
+        total += len(bloco)
+    if aba is None:
+        livro.create_sheet("Passagens").append(colunas)
+    livro.save(destino)
+    return total
+
+
+def _gravar_csv(blocos, destino, colunas, esquema):
+    # Separador ";" e BOM, como o Excel em português espera ao abrir o arquivo
+    arquivo = open(destino, "wb") if isinstance(destino, str) else destino
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    total = 0
+    try:
+        texto.write(";".join(colunas) + "\r\n")
+        for bloco in blocos:
+            bloco.to_csv(texto, sep=";", header=False, index=False, date_format="%d/%m/%Y %H:%M", lineterminator="\r\n")
+            total += len(bloco)
+    finally:
+        texto.flush()
+        texto.detach()
+        if isinstance(destino, str):
+            arquivo.close()
+    return total
+
+
+def _gravar_parquet(blocos, destino, colunas, esquema):
+    total = 0
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for bloco in blocos:
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+            total += len(bloco)
+    return total
+
+
+def _esquema(passagens, colunas):
+    # Tipos fixos para todos os blocos (um bloco só de nulos não muda o tipo da coluna)
+    campos = []
+    for coluna in colunas:
+        if coluna == "Data/Hora":
+            tipo = pa.timestamp("ns")
+        elif coluna in COLUNAS_EVENTOS or not (
+            pd.api.types.is_numeric_dtype(passagens[coluna]) or pd.api.types.is_datetime64_any_dtype(passagens[coluna])
+        ):
+            tipo = pa.string()
+        else:
+            tipo = pa.from_numpy_dtype(passagens[coluna].dtype)
+        campos.append(pa.field(coluna, tipo))
+    return pa.schema(campos)
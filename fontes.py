@@ -0,0 +1,145 @@
+import hashlib
+import io
+import os
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from passagens import classificar_eventos
+
+# Origem da base de atividades: caminho local (parquet ou Arrow/Feather) ou URL HTTP(S)
+URL_PADRAO = "https://raw.githubusercontent.com/eduardo130796/controle_processos/main/atividades_completas.parquet"
+FONTE_DADOS = os.environ.get("FONTE_DADOS", URL_PADRAO)
+# Segundos de espera por uma resposta do servidor antes de desistir da atualização
+TIMEOUT_FONTE = float(os.environ.get("TIMEOUT_FONTE", 60))
+
+EXTENSOES_ARROW = (".arrow", ".feather", ".ipc")
+
+# Só as colunas usadas pelo painel são lidas; as de poucos valores distintos
+# chegam como categóricas (dicionários do Arrow), com as categorias em ordem
+# alfabética para que ordenações por elas sigam a ordem dos textos
+COLUNAS_EVENTOS = ["Processo", "Data/Hora", "Unidade", "Usuário", "Descrição", "TipoProcesso"]
+COLUNAS_CATEGORICAS = ["Processo", "Unidade", "Usuário", "TipoProcesso"]
+
+
+def carregar(endereco, anterior=None):
+    """Lê a base de `endereco`, reaproveitando `anterior` quando o conteúdo não mudou.
+
+    Devolve um dicionário com "dados" (DataFrame), "impressao_digital" (SHA-256
+    do conteúdo), "validadores" (o que a fonte usa para saber se houve mudança)
+    e "carregado_em". Se a fonte indicar que nada mudou, devolve o próprio
+    `anterior`, sem reler nem converter o arquivo.
+    """
+    if endereco.startswith(("http://", "https://")):
+        return _carregar_http(endereco, anterior)
+    if endereco.startswith("file://"):
+        endereco = endereco[len("file://"):]
+    return _carregar_local(endereco, anterior)
+
+
+def _carregar_local(caminho, anterior):
+    # Tamanho e data de modificação bastam para descartar releituras sem abrir o arquivo
+    info = os.stat(caminho)
+    validadores = {"tamanho": info.st_size, "modificado": info.st_mtime_ns}
+    if anterior is not None and anterior["validadores"] == validadores:
+        return anterior
+
+    # O arquivo é mapeado em memória: o hash e a leitura usam o mesmo buffer, sem cópia
+    with pa.memory_map(caminho) as mapa:
+        buffer = mapa.read_buffer()
+        impressao_digital = hashlib.sha256(buffer).hexdigest()
+        if anterior is not None and anterior["impressao_digital"] == impressao_digital:
+            return {**anterior, "validadores": validadores}
+        dados = _ler_tabela(caminho, pa.BufferReader(buffer))
+
+    return _nova_carga(dados, impressao_digital, validadores)
+
+
+def _carregar_http(url, anterior):
+    # Requisição condicional: o servidor responde 304 se o arquivo não mudou
+    cabecalhos = {}
+    if anterior is not None:
+        if anterior["validadores"].get("etag"):
+            cabecalhos["If-None-Match"] = anterior["validadores"]["etag"]
+        if anterior["validadores"].get("last_modified"):
+            cabecalhos["If-Modified-Since"] = anterior["validadores"]["last_modified"]
+
+    try:
+        with urlopen(Request(url, headers=cabecalhos), timeout=TIMEOUT_FONTE) as resposta:
+            conteudo = resposta.read()
+            validadores = {
+                "etag": resposta.headers.get("ETag"),
+                "last_modified": resposta.headers.get("Last-Modified"),
+            }
+    except HTTPError as erro:
+        if erro.code == 304 and anterior is not None:
+            return anterior
+        raise
+
+    # Servidores sem validadores (ou que os trocam à toa) ainda não forçam nova conversão
+    impressao_digital = hashlib.sha256(conteudo).hexdigest()
+    if anterior is not None and anterior["impressao_digital"] == impressao_digital:
+        return {**anterior, "validadores": validadores}
+
+    return _nova_carga(_ler_tabela(url, io.BytesIO(conteudo)), impressao_digital, validadores)
+
+
+def _ler_tabela(endereco, arquivo):
+    if endereco.lower().endswith(EXTENSOES_ARROW):
+        tabela = pa.ipc.open_file(arquivo).read_all().select(COLUNAS_EVENTOS)
+        for coluna in COLUNAS_CATEGORICAS:
+            i = tabela.schema.get_field_index(coluna)
+            tabela = tabela.set_column(i, coluna, tabela.column(i).dictionary_encode())
+    else:
+        tabela = pq.read_table(arquivo, columns=COLUNAS_EVENTOS, read_dictionary=COLUNAS_CATEGORICAS)
+
+    return ordenar_categorias(tabela.to_pandas())
+
+
+def ordenar_categorias(dados):
+    """Põe em ordem alfabética as categorias das colunas categóricas de `dados`."""
+    for coluna in dados.columns:
+        if isinstance(dados[coluna].dtype, pd.CategoricalDtype):
+            dados[coluna] = dados[coluna].cat.reorder_categories(dados[coluna].cat.categories.sort_values())
+    return dados
+
+
+def normalizar_eventos(dados, usuarios_nomes):
+    """Eventos prontos para a reconstrução: nomes de usuário, Data/Hora convertida e tipo do evento.
+
+    Monta um novo quadro sem copiar as colunas que não mudam; os IDs de usuário
+    são substituídos pelos nomes nas categorias, não linha a linha.
+    """
+    colunas = {coluna: dados[coluna] for coluna in dados.columns}
+    colunas["Usuário"] = mapear_categorias(dados["Usuário"], usuarios_nomes)
+    colunas["Data/Hora"] = pd.to_datetime(dados["Data/Hora"], dayfirst=True, errors="coerce")
+    # Tipo de evento e login atribuído, classificados uma vez por versão dos dados
+    return classificar_eventos(pd.DataFrame(colunas, copy=False))
+
+
+def mapear_categorias(serie, mapa):
+    """Aplica `mapa` aos rótulos de uma coluna categórica, sem percorrer as linhas.
+
+    Rótulos ausentes de `mapa` viram nulos (como em `Series.map`); rótulos que
+    passam a coincidir são fundidos numa só categoria.
+    """
+    rotulos = serie.cat.categories.map(lambda rotulo: mapa.get(rotulo, np.nan))
+    novos_codigos, categorias = pd.factorize(rotulos, sort=True)
+    codigos = serie.cat.codes.to_numpy()
+    codigos = np.where(codigos >= 0, novos_codigos[codigos], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias), index=serie.index, name=serie.name)
+
+
+def _nova_carga(dados, impressao_digital, validadores):
+    return {
+        "dados": dados,
+        "impressao_digital": impressao_digital,
+        "validadores": validadores,
+        "carregado_em": datetime.now(),
+    }
+
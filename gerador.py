@@ -0,0 +1,129 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from usuarios import usuarios_nomes
+
+# Unidades reais da base; com `unidades` maior que esta lista, as demais são
+# regionais sintéticas numeradas
+UNIDADES = [
+    "CCONT DPGU",
+    "DCONT APOIO",
+    "DCONT CENTRO-OESTE DPGU",
+    "DCONT NACIONAL DPGU",
+    "DCONT NORDESTE DPGU",
+    "DCONT NORTE DPGU",
+    "DCONT PUBLICAÇÕES",
+    "DCONT SUDESTE DPGU",
+    "DCONT SUL DPGU",
+    "DIREP DPGU",
+]
+
+TIPOS_PROCESSO = [
+    "Contratos - Repactuação",
+    "Contratos - Acompanhamento/Fiscalização",
+    "Contratos - Aditivo/Renovação/Rescisão",
+    "Pagamento - Limpeza",
+    "Pagamento - Energia elétrica",
+    "Processo Licitatório",
+    "Imóvel - Locação",
+    "Serviços de Engenharia",
+]
+
+TIPOS_DOCUMENTO = ["Despacho", "Memorando", "Ofício", "Informação", "Minuta", "E-mail"]
+
+# Frases de abertura e de conclusão de cada passagem, como aparecem no SEI
+ABERTURAS = ["Processo recebido na unidade", "Reabertura do processo na unidade", "Processo público gerado"]
+CONCLUSOES = ["Conclusão automática de processo na unidade", "Conclusão do processo na unidade"]
+
+
+def gerar_eventos(quantidade, unidades=len(UNIDADES), usuarios=None, inicio="2024-01-01", dias=365, semente=0):
+    """Log de eventos no formato de `atividades_completas.parquet`, com `quantidade` linhas.
+
+    Cada processo passa por ciclos de abertura (recebimento, reabertura ou
+    processo público gerado), atribuições, trâmites diversos e conclusão; o
+    último ciclo pode ficar em aberto. `usuarios` acrescenta logins sintéticos
+    aos de `usuarios_nomes` (que ficam sem nome no painel, como logins novos).
+    """
+    rng = np.random.default_rng(semente)
+    nomes_unidades = np.array(UNIDADES + [f"DCONT REGIONAL {i:03d} DPGU" for i in range(unidades - len(UNIDADES))])[:unidades]
+    logins = np.array(list(usuarios_nomes) + [f"usuario.{i:04d}" for i in range(max(0, (usuarios or 0) - len(usuarios_nomes)))])
+
+    # Eventos por processo com média próxima à da base real (~33), somando `quantidade`
+    tamanhos = np.clip(rng.geometric(1 / 33, size=quantidade // 10 + 10), 1, 400)
+    tamanhos = tamanhos[:np.searchsorted(np.cumsum(tamanhos), quantidade) + 1]
+    tamanhos[-1] -= tamanhos.sum() - quantidade
+    processos = len(tamanhos)
+
+    processo = np.repeat(np.arange(processos), tamanhos)
+    inicio_processo = np.cumsum(tamanhos) - tamanhos
+    posicao = np.arange(quantidade) - inicio_processo[processo]
+
+    # Ciclos de tamanho fixo por processo: abertura, atribuição, trâmites e conclusão
+    ciclo = rng.integers(4, 16, size=processos)[processo]
+    no_ciclo = posicao % ciclo
+    primeiro_ciclo = posicao < ciclo
+
+    papel = np.select(
+        [no_ciclo == 0, (no_ciclo == 1) | ((no_ciclo == 3) & (rng.random(quantidade) < 0.2)), no_ciclo == ciclo - 1],
+        [0, 1, 3],
+        default=2,
+    )
+    abertura = np.where(primeiro_ciclo, np.where(rng.random(quantidade) < 0.15, 2, 0), np.where(rng.random(quantidade) < 0.5, 1, 0))
+
+    login = logins[rng.integers(0, len(logins), quantidade)]
+    atribuido = logins[rng.integers(0, len(logins), quantidade)]
+    unidade = nomes_unidades[rng.integers(0, len(nomes_unidades), processos)][processo]
+    numero = rng.integers(1_000_000, 9_999_999, quantidade).astype(str)
+    bloco = rng.integers(100_000, 999_999, quantidade).astype(str)
+    documento = np.array(TIPOS_DOCUMENTO)[rng.integers(0, len(TIPOS_DOCUMENTO), quantidade)]
+
+    tramites = [
+        "Documento " + numero + " (" + documento + ") inserido no bloco " + bloco,
+        "Documento " + numero + " (" + documento + ") retirado do bloco " + bloco,
+        "Assinado Documento " + numero + " (" + documento + ") por " + login,
+        "Gerado documento público " + numero + " (" + documento + ")",
+        "Bloco " + bloco + " disponibilizado para " + unidade,
+        "Processo remetido pela unidade " + unidade,
+        np.full(quantidade, "Alterada ordem dos protocolos", dtype=object),
+    ]
+    tramite = rng.integers(0, len(tramites), quantidade)
+    descricao = np.choose(tramite, [np.asarray(t, dtype=object) for t in tramites])
+    descricao = np.where(papel == 0, np.array(ABERTURAS, dtype=object)[abertura], descricao)
+    descricao = np.where(papel == 1, "Processo atribuído para " + atribuido.astype(object), descricao)
+    descricao = np.where(papel == 3, np.array(CONCLUSOES, dtype=object)[rng.integers(0, 2, quantidade)], descricao)
+
+    # Minutos entre eventos; o relógio de cada processo parte de um instante aleatório
+    passo = rng.exponential(6 * 60, quantidade).astype(np.int64)
+    passo[inicio_processo] = rng.integers(0, dias * 24 * 60, processos)
+    minutos = np.cumsum(passo) - np.repeat(np.cumsum(passo)[inicio_processo] - passo[inicio_processo], tamanhos)
+    data_hora = pd.Timestamp(inicio) + pd.to_timedelta(minutos, unit="min")
+
+    # A formatação de texto roda só nos instantes distintos
+    codigos, instantes = pd.factorize(data_hora)
+    texto_data_hora = np.asarray(instantes.strftime("%d/%m/%Y %H:%M"), dtype=object)[codigos]
+
+    numero_processo = np.char.add(
+        np.char.add("08038.", np.char.zfill(np.arange(processos).astype(str), 6)),
+        "/2025-" + np.char.zfill(rng.integers(0, 100, processos).astype(str), 2),
+    )
+
+    eventos = pd.DataFrame({
+        "Processo": numero_processo.astype(object)[processo],
+        "Data/Hora": texto_data_hora,
+        "Unidade": unidade.astype(object),
+        "Usuário": login.astype(object),
+        "Descrição": descricao,
+        "TipoProcesso": np.array(TIPOS_PROCESSO, dtype=object)[rng.integers(0, len(TIPOS_PROCESSO), processos)][processo],
+    })
+    # Como na base exportada, os eventos não vêm ordenados
+    return eventos.iloc[rng.permutation(quantidade)].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # python gerador.py <eventos> <saida.parquet>
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    saida = sys.argv[2] if len(sys.argv) > 2 else f"eventos_sinteticos_{quantidade}.parquet"
+    gerar_eventos(quantidade).to_parquet(saida, index=False)
+    print(f"{quantidade} eventos gravados em {saida}")
@@ -0,0 +1,200 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dias_uteis import COLUNAS_PRAZO, calcular_prazos
+from fontes import COLUNAS_EVENTOS
+from passagens import (
+    ATRIBUICAO,
+    COLUNAS_PASSAGEM,
+    COLUNAS_PENDENTE,
+    RECEBIMENTO,
+    classificar_eventos,
+    ordenar_eventos,
+    reconstruir_passagens,
+    reconstruir_passagens_com_estado,
+)
+
+# Diretório local onde ficam as passagens derivadas e o estado do rastreamento:
+#   fechadas/parte-*.parquet  passagens concluídas, já com os prazos (só recebem novas partes)
+#   abertas.parquet           passagens em aberto (estado de cada processo)
+#   pendentes.parquet         atribuições feitas com o processo fechado
+#   estado.json               marca d'água (maior Data/Hora já aplicada) e as chaves
+#                             dos eventos com essa Data/Hora que já foram aplicados
+DIRETORIO_ESTADO = os.environ.get("DIRETORIO_ESTADO", ".estado_passagens")
+
+
+def atualizar_passagens(eventos, usuarios_nomes, diretorio=DIRETORIO_ESTADO, reconstruir=False):
+    """Aplica ao estado salvo apenas os eventos a partir da marca d'água.
+
+    `eventos` é a base completa já normalizada (nomes mapeados e Data/Hora
+    convertida). Sem estado salvo, ou com `reconstruir=True`, refaz tudo do zero.
+    Como as datas vêm em minutos, eventos com a Data/Hora da própria marca
+    d'água ainda entram, menos os que já tinham sido aplicados (comparados pela
+    linha inteira). Eventos que chegarem com Data/Hora anterior à marca d'água
+    não são vistos pelo modo incremental; nesses casos use a reconstrução.
+    """
+    estado = _ler_estado(diretorio)
+    if reconstruir or estado is None or estado["marca_dagua"] is None:
+        return reconstruir_do_zero(eventos, usuarios_nomes, diretorio)
+
+    marca = pd.Timestamp(estado["marca_dagua"])
+    novos = eventos[eventos["Data/Hora"] >= marca]
+    # Estados gravados antes das chaves só sabem que a marca d'água inteira foi aplicada
+    aplicados = estado.get("chaves_na_marca")
+    na_marca = (novos["Data/Hora"] == marca).to_numpy()
+    if aplicados is None:
+        novos = novos[~na_marca]
+    else:
+        novos = novos[~(na_marca & np.isin(_chaves(novos), np.array(aplicados, dtype=np.uint64)))]
+    if novos.empty:
+        return ler_passagens(diretorio)
+
+    abertas = pd.read_parquet(os.path.join(diretorio, "abertas.parquet"))
+    pendentes = pd.read_parquet(os.path.join(diretorio, "pendentes.parquet"))
+
+    # Só os processos com eventos novos são retomados a partir do estado salvo
+    tocados = novos["Processo"].unique()
+    retomar_abertas = abertas["Processo"].isin(tocados)
+    retomar_pendentes = pendentes["Processo"].isin(tocados)
+
+    sementes = _sementes(abertas[retomar_abertas], pendentes[retomar_pendentes])
+    novos = ordenar_eventos(novos)
+    if "Código Evento" not in novos:
+        novos = classificar_eventos(novos)
+    lote = pd.concat([sementes, novos], ignore_index=True)
+    lote = lote.sort_values(by="Processo", kind="stable")
+    passagens, novas_pendentes = reconstruir_passagens_com_estado(lote, usuarios_nomes)
+
+    concluidas = passagens["Data Conclusão"].notna()
+    abertas = pd.concat([abertas[~retomar_abertas], passagens[~concluidas]], ignore_index=True)
+    pendentes = pd.concat([pendentes[~retomar_pendentes], novas_pendentes], ignore_index=True)
+
+    _gravar(diretorio, passagens[concluidas], abertas, pendentes, eventos)
+    return ler_passagens(diretorio)
+
+
+def reconstruir_do_zero(eventos, usuarios_nomes, diretorio=DIRETORIO_ESTADO):
+    """Descarta o estado salvo e reconstrói as passagens com toda a base."""
+    passagens, pendentes = reconstruir_passagens_com_estado(ordenar_eventos(eventos), usuarios_nomes)
+    concluidas = passagens["Data Conclusão"].notna()
+
+    _gravar(diretorio, passagens[concluidas], passagens[~concluidas], pendentes, eventos, manter_fechadas=False)
+    return ler_passagens(diretorio)
+
+
+def ler_passagens(diretorio=DIRETORIO_ESTADO):
+    """Passagens salvas (concluídas e abertas), na mesma ordem da reconstrução completa.
+
+    As concluídas trazem Status, Dias de Prazo e Faixa de Prazo gravados; nas
+    abertas essas colunas ficam vazias, para `calcular_prazos` contar só elas.
+    """
+    pasta_fechadas = os.path.join(diretorio, "fechadas")
+    partes = [
+        pd.read_parquet(os.path.join(pasta_fechadas, nome))
+        for nome in sorted(os.listdir(pasta_fechadas))
+    ]
+    partes.append(pd.read_parquet(os.path.join(diretorio, "abertas.parquet")))
+
+    passagens = pd.concat(partes, ignore_index=True)
+    passagens = passagens.sort_values(by=["Processo", "Data Recebido"], kind="stable")
+    return passagens.reset_index(drop=True).reindex(columns=COLUNAS_PASSAGEM + COLUNAS_PRAZO)
+
+
+def conferir_consistencia(eventos, usuarios_nomes, diretorio=DIRETORIO_ESTADO):
+    """Compara o estado incremental com uma reconstrução completa até a marca d'água.
+
+    Levanta AssertionError se divergirem.
+    """
+    marca = pd.Timestamp(_ler_estado(diretorio)["marca_dagua"])
+    esperado = reconstruir_passagens(ordenar_eventos(eventos[eventos["Data/Hora"] <= marca]), usuarios_nomes)
+    obtido = ler_passagens(diretorio)[COLUNAS_PASSAGEM]
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+    return len(obtido)
+
+
+def _sementes(abertas, pendentes):
+    # Eventos sintéticos que recolocam cada processo no estado em que parou:
+    # a atribuição vigente seguida do recebimento da passagem em aberto, ou
+    # apenas a atribuição pendente quando o processo está fechado
+    atribuicoes_abertas = pd.DataFrame({
+        "Processo": abertas["Processo"],
+        "Data/Hora": abertas["Data Recebido"],
+        "Código Evento": ATRIBUICAO,
+        "Atribuído": abertas["Responsável"],
+    })
+    recebimentos = pd.DataFrame({
+        "Processo": abertas["Processo"],
+        "Data/Hora": abertas["Data Recebido"],
+        "Unidade": abertas["Unidade"],
+        "Usuário": abertas["Usuário Recebeu"],
+        "TipoProcesso": abertas["Tipo"],
+        "Código Evento": RECEBIMENTO,
+    })
+    atribuicoes_pendentes = pd.DataFrame({
+        "Processo": pendentes["Processo"],
+        "Código Evento": ATRIBUICAO,
+        "Atribuído": pendentes["Responsável Atribuído"],
+    })
+
+    sementes = pd.concat([atribuicoes_abertas, recebimentos, atribuicoes_pendentes], ignore_index=True)
+    sementes["Código Evento"] = sementes["Código Evento"].astype(np.int8)
+    return sementes.sort_values(by="Processo", kind="stable")
+
+
+def _chaves(eventos):
+    # Hash da linha do evento como veio da fonte; identifica o evento entre atualizações
+    colunas = [coluna for coluna in COLUNAS_EVENTOS if coluna in eventos]
+    return pd.util.hash_pandas_object(eventos[colunas], index=False).to_numpy()
+
+
+def _ler_estado(diretorio):
+    caminho = os.path.join(diretorio, "estado.json")
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar(diretorio, concluidas, abertas, pendentes, eventos, manter_fechadas=True):
+    # O estado novo é montado ao lado e trocado inteiro no final (como em
+    # motor.gravar_resultado): uma falha no meio deixa o estado anterior intacto,
+    # sem parte nova de concluídas com a marca d'água antiga
+    marca = eventos["Data/Hora"].max()
+    temporario = diretorio + ".novo"
+    shutil.rmtree(temporario, ignore_errors=True)
+    pasta_fechadas = os.path.join(temporario, "fechadas")
+    os.makedirs(pasta_fechadas)
+
+    # As partes já gravadas não mudam: entram no estado novo por hard link, sem cópia
+    anteriores = os.path.join(diretorio, "fechadas")
+    if manter_fechadas and os.path.isdir(anteriores):
+        for nome in os.listdir(anteriores):
+            os.link(os.path.join(anteriores, nome), os.path.join(pasta_fechadas, nome))
+
+    # As concluídas não mudam mais: cada atualização só acrescenta uma parte nova,
+    # com os prazos já contados (a data de referência não conta para elas). Eventos
+    # atrasados na marca d'água repetem a data: o número de ordem evita sobrescrever
+    # (através do hard link) uma parte do estado anterior
+    if not concluidas.empty:
+        nome = f"parte-{marca:%Y%m%d%H%M%S}-{len(os.listdir(pasta_fechadas)):06d}.parquet"
+        calcular_prazos(concluidas, marca).to_parquet(os.path.join(pasta_fechadas, nome), index=False)
+
+    abertas.to_parquet(os.path.join(temporario, "abertas.parquet"), index=False)
+    pendentes.reindex(columns=COLUNAS_PENDENTE).to_parquet(os.path.join(temporario, "pendentes.parquet"), index=False)
+
+    with open(os.path.join(temporario, "estado.json"), "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "marca_dagua": None if pd.isna(marca) else marca.isoformat(),
+            "chaves_na_marca": _chaves(eventos[eventos["Data/Hora"] == marca]).tolist(),
+        }, arquivo)
+
+    antigo = diretorio + ".antigo"
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.isdir(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
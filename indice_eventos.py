@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+
+def construir_indice(eventos):
+    """Índice dos eventos por processo para o detalhamento das passagens.
+
+    Os eventos ficam ordenados por Processo e Data/Hora decrescente (a ordem
+    exibida na linha do tempo), com o intervalo de linhas de cada processo.
+    Só as colunas da linha do tempo são guardadas, como arrays.
+    """
+    eventos = eventos.loc[eventos["Data/Hora"].notna(), ["Processo", "Data/Hora", "Usuário", "Descrição"]]
+    ordenados = eventos.sort_values(by=["Processo", "Data/Hora"], ascending=[True, False], kind="stable")
+    ordenados = ordenados.reset_index(drop=True)
+
+    processos, inicios = np.unique(ordenados["Processo"].to_numpy(), return_index=True)
+    fins = np.r_[inicios[1:], len(ordenados)]
+
+    return {
+        # Datas negadas ficam em ordem crescente dentro de cada processo, como o searchsorted exige
+        "chaves": -ordenados["Data/Hora"].to_numpy().astype("datetime64[ns]").astype("int64"),
+        "intervalos": dict(zip(processos, zip(inicios.tolist(), fins.tolist()))),
+        # Colunas da linha do tempo como arrays, recortadas por posição sem montar DataFrames
+        "colunas": {coluna: ordenados[coluna].to_numpy() for coluna in ("Data/Hora", "Usuário", "Descrição")},
+    }
+
+
+def linhas_da_passagem(indice, processo, inicio, fim):
+    """Intervalo [início, fim) das linhas do índice com os eventos do processo
+    entre `inicio` e `fim` (inclusive), do mais recente ao mais antigo."""
+    intervalo = indice["intervalos"].get(processo)
+    if intervalo is None:
+        return 0, 0
+
+    a, b = intervalo
+    chaves = indice["chaves"][a:b]
+    i = np.searchsorted(chaves, -pd.Timestamp(fim).value, side="left")
+    j = np.searchsorted(chaves, -pd.Timestamp(inicio).value, side="right")
+    return a + int(i), a + int(j)
+
+
+def posicoes_das_fatias(inicios, comprimentos):
+    """Posições das fatias [início, início + comprimento), uma após a outra, num só array."""
+    deslocamentos = np.cumsum(comprimentos) - comprimentos
+    return np.repeat(inicios - deslocamentos, comprimentos) + np.arange(int(np.sum(comprimentos)))
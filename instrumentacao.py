@@ -0,0 +1,86 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+# Arquivo opcional (JSON lines) onde cada medição também é acrescentada
+ARQUIVO_LOG = os.environ.get("LOG_DESEMPENHO")
+
+# Cada execução do script roda na sua própria thread: as medições ficam por thread
+_execucao = threading.local()
+_trava_log = threading.Lock()
+
+
+def iniciar_execucao():
+    """Começa uma nova lista de medições para a execução atual do script."""
+    _execucao.id = uuid.uuid4().hex[:12]
+    _execucao.medicoes = []
+
+
+def medicoes():
+    """Medições registradas na execução atual, na ordem em que terminaram."""
+    return list(getattr(_execucao, "medicoes", []))
+
+
+def medir(funcao=None, nome=None):
+    """Decorador que registra tempo, linhas de entrada/saída e variação de memória de `funcao`.
+
+    Linhas de entrada: o primeiro argumento DataFrame. Linhas de saída: o
+    resultado, se for DataFrame, ou o último DataFrame de uma tupla. A memória
+    é a variação do RSS do processo, em MB (só no Linux; nos demais fica vazia).
+    Funções com cache do Streamlit continuam com `.clear()`.
+    """
+    if funcao is None:
+        return functools.partial(medir, nome=nome)
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        memoria_antes = _memoria_residente()
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        segundos = time.perf_counter() - inicio
+        memoria_depois = _memoria_residente()
+
+        _registrar({
+            "etapa": nome or funcao.__name__,
+            "segundos": round(segundos, 4),
+            "linhas_entrada": _linhas(next((valor for valor in args if isinstance(valor, pd.DataFrame)), None)),
+            "linhas_saida": _linhas(resultado),
+            "memoria_mb": None if memoria_antes is None else round(memoria_depois - memoria_antes, 1),
+        })
+        return resultado
+
+    if hasattr(funcao, "clear"):
+        medida.clear = funcao.clear
+    return medida
+
+
+def _linhas(valor):
+    if isinstance(valor, tuple):
+        valor = next((item for item in reversed(valor) if isinstance(item, pd.DataFrame)), None)
+    return len(valor) if isinstance(valor, pd.DataFrame) else None
+
+
+def _memoria_residente():
+    try:
+        with open("/proc/self/statm") as arquivo:
+            paginas = int(arquivo.read().split()[1])
+    except OSError:
+        return None
+    return paginas * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _registrar(medicao):
+    if not hasattr(_execucao, "medicoes"):
+        iniciar_execucao()
+    _execucao.medicoes.append(medicao)
+
+    if ARQUIVO_LOG:
+        linha = {"momento": datetime.now().isoformat(timespec="milliseconds"), "execucao": _execucao.id, **medicao}
+        with _trava_log, open(ARQUIVO_LOG, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(linha, ensure_ascii=False) + "\n")
@@ -0,0 +1,235 @@
+# Processamento dos eventos do SEI sem interface: carga → normalização →
+# passagens → prazos. Pode ser importado (nada roda na importação) ou executado
+# em lote, gravando o resultado em parquet para o painel só ler:
+#
+#   python motor.py [--fonte ENDERECO] [--saida DIRETORIO] [--data AAAA-MM-DD] [--incremental] [--trabalhadores N]
+import argparse
+import json
+import os
+import shutil
+import threading
+import weakref
+from datetime import date, datetime
+
+import pandas as pd
+
+from agregacoes import agregar_por_responsavel
+from dias_uteis import calcular_prazos, dia_util_de_referencia
+from fontes import FONTE_DADOS, carregar, normalizar_eventos, ordenar_categorias
+from incremental import DIRETORIO_ESTADO, atualizar_passagens
+from instrumentacao import iniciar_execucao, medicoes, medir
+from paralelo import TRABALHADORES, passagens_com_prazos
+from passagens import ordenar_eventos
+from usuarios import usuarios_nomes
+
+# Diretório com o resultado do processamento em lote:
+#   eventos.parquet     eventos normalizados (linhas do tempo dos cards)
+#   resultado.parquet   passagens com Status, Dias de Prazo e Faixa de Prazo
+#   agregados.parquet   quantidade por Responsável × Faixa de Prazo × Status
+#   manifesto.json      versão dos dados, data de referência e momento da geração
+DIRETORIO_RESULTADO = os.environ.get("DIRETORIO_RESULTADO", "resultado")
+
+
+def processar(fonte=FONTE_DADOS, data_referencia=None, incremental=False, trabalhadores=TRABALHADORES):
+    """Executa o processamento completo a partir da fonte de dados.
+
+    Devolve um dicionário com "eventos", "resultado", "impressao_digital",
+    "carregado_em" e "data_referencia" (hoje, se não informada).
+    """
+    carga = medir(carregar)(fonte)
+    data_referencia = data_referencia or date.today()
+    eventos, resultado = processar_eventos(
+        carga["dados"], data_referencia, incremental=incremental, trabalhadores=trabalhadores
+    )
+    return {
+        "eventos": eventos,
+        "resultado": resultado,
+        "impressao_digital": carga["impressao_digital"],
+        "carregado_em": carga["carregado_em"],
+        "data_referencia": data_referencia,
+    }
+
+
+def processar_eventos(
+    dados, data_referencia, usuarios_nomes=usuarios_nomes, incremental=False, diretorio_estado=DIRETORIO_ESTADO,
+    trabalhadores=TRABALHADORES, reconstruir=False,
+):
+    """Dos eventos como vêm da fonte até o df_resultado; devolve (eventos normalizados, resultado).
+
+    Com `incremental=True` só os eventos posteriores à marca d'água salva em
+    `diretorio_estado` são aplicados (ver incremental.py); `reconstruir=True`
+    descarta esse estado e refaz as passagens do zero. A reconstrução
+    completa usa até `trabalhadores` processos em bases grandes (ver paralelo.py).
+    """
+    eventos = medir(normalizar_eventos)(dados, usuarios_nomes)
+    if incremental:
+        passagens = medir(atualizar_passagens)(eventos, usuarios_nomes, diretorio_estado, reconstruir)
+        return eventos, aplicar_prazos(passagens, data_referencia)
+    resultado = passagens_com_prazos(medir(ordenar_eventos)(eventos), usuarios_nomes, data_referencia, trabalhadores)
+    return eventos, resultado.sort_values(by="Responsável", ascending=True)
+
+
+def aplicar_prazos(passagens, data_referencia):
+    """Prazos das passagens (itens em aberto contam até a data de referência), por Responsável."""
+    resultado = medir(calcular_prazos)(passagens, data_referencia)
+    return resultado.sort_values(by="Responsável", ascending=True)
+
+
+def manter_atualizado(fonte=FONTE_DADOS, intervalo=300, incremental=False):
+    """Versão processada dos dados, compartilhada no processo e atualizada em segundo plano.
+
+    Devolve o registro {"versao", "pronta", "parar", "erro", "medicoes", "trava"}. Uma thread
+    chama `atualizar_versao` a cada `intervalo` segundos; quem lê pega
+    registro["versao"] inteira, sem esperar a atualização nem copiar os
+    DataFrames (que devem ser tratados como somente leitura). "pronta" é
+    sinalizado após a primeira tentativa; "parar" encerra a thread, o que também
+    acontece quando o registro é descartado ou o processo termina. Se uma
+    atualização falha, a versão anterior continua valendo e o erro fica em "erro".
+    As etapas medidas na última rodada ficam em "medicoes" (ver instrumentacao.py).
+    """
+    registro = _Registro(
+        versao=None,
+        pronta=threading.Event(),
+        parar=threading.Event(),
+        erro=None,
+        medicoes=[],
+        trava=threading.Lock(),
+    )
+
+    # A thread só guarda uma referência fraca ao registro: termina quando ele é
+    # descartado (ex.: cache do Streamlit limpo) e, pelo finalize, ao fim do processo
+    referencia = weakref.ref(registro)
+    parar = registro["parar"]
+    weakref.finalize(registro, parar.set)
+
+    def ciclo():
+        while not parar.is_set():
+            atual = referencia()
+            if atual is None:
+                return
+            # Cada rodada é uma execução própria nas medições (e no LOG_DESEMPENHO)
+            iniciar_execucao()
+            try:
+                medir(atualizar_versao, nome="atualizacao_em_segundo_plano")(atual, fonte, incremental)
+                atual["erro"] = None
+            except Exception as erro:
+                atual["erro"] = erro
+            atual["medicoes"] = medicoes()
+            atual["pronta"].set()
+            del atual
+            parar.wait(intervalo)
+
+    threading.Thread(target=ciclo, name="atualizacao-dados", daemon=True).start()
+    return registro
+
+
+# Um dict comum não aceita referência fraca; o registro de manter_atualizado precisa
+class _Registro(dict):
+    pass
+
+
+def atualizar_versao(registro, fonte=FONTE_DADOS, incremental=False, forcar=False, reconstruir=False):
+    """Consulta a fonte e troca registro["versao"] (numa única atribuição) se algo mudou.
+
+    Conteúdo novo, ou `forcar=True`, refaz o processamento; se só virou o dia
+    útil, só os prazos das passagens em aberto são recontados. `reconstruir=True`
+    (com `forcar`) também descarta o estado do modo incremental; como tudo roda
+    sob registro["trava"], não disputa o diretório com a thread de atualização.
+    A versão traz
+    "eventos", "resultado", "impressao_digital", "carregado_em",
+    "data_referencia" e a "carga" (sem os dados brutos, para a próxima consulta).
+    """
+    with registro["trava"]:
+        atual = registro["versao"]
+        carga = medir(carregar)(fonte, None if forcar or atual is None else atual["carga"])
+        data_referencia = dia_util_de_referencia(date.today())
+
+        if forcar or atual is None or carga["impressao_digital"] != atual["impressao_digital"]:
+            eventos, resultado = processar_eventos(
+                carga["dados"], data_referencia, incremental=incremental, reconstruir=reconstruir
+            )
+        elif data_referencia != atual["data_referencia"]:
+            eventos, resultado = atual["eventos"], medir(calcular_prazos)(atual["resultado"], data_referencia)
+        else:
+            # Mesmo conteúdo com validadores novos: guarda-os para não refazer o hash
+            if carga is not atual["carga"]:
+                registro["versao"] = {**atual, "carga": {**carga, "dados": None}}
+            return registro["versao"]
+
+        registro["versao"] = {
+            "carga": {**carga, "dados": None},
+            "eventos": eventos,
+            "resultado": resultado,
+            "impressao_digital": carga["impressao_digital"],
+            "carregado_em": carga["carregado_em"],
+            "data_referencia": data_referencia,
+        }
+        return registro["versao"]
+
+
+def gravar_resultado(processamento, diretorio=DIRETORIO_RESULTADO):
+    """Grava o resultado de `processar` em parquet, trocando o diretório inteiro no final."""
+    temporario = diretorio + ".novo"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    resultado = processamento["resultado"]
+    processamento["eventos"].to_parquet(os.path.join(temporario, "eventos.parquet"), index=False)
+    resultado.to_parquet(os.path.join(temporario, "resultado.parquet"), index=False)
+    agregar_por_responsavel(resultado)["matriz"].rename("Quantidade").reset_index().to_parquet(
+        os.path.join(temporario, "agregados.parquet"), index=False
+    )
+
+    manifesto = {
+        "impressao_digital": processamento["impressao_digital"],
+        "data_referencia": pd.Timestamp(processamento["data_referencia"]).date().isoformat(),
+        "gerado_em": datetime.now().isoformat(),
+        "passagens": len(resultado),
+    }
+    with open(os.path.join(temporario, "manifesto.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo)
+
+    antigo = diretorio + ".antigo"
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.isdir(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return manifesto
+
+
+def ler_manifesto(diretorio=DIRETORIO_RESULTADO):
+    with open(os.path.join(diretorio, "manifesto.json"), encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def ler_resultado(diretorio=DIRETORIO_RESULTADO, data_referencia=None):
+    """Eventos e df_resultado gravados por `gravar_resultado`.
+
+    Se `data_referencia` for outro dia que o do processamento, os prazos das
+    passagens em aberto são recontados para ele; os das concluídas ficam como
+    foram gravados.
+    """
+    manifesto = ler_manifesto(diretorio)
+    eventos = ordenar_categorias(pd.read_parquet(os.path.join(diretorio, "eventos.parquet")))
+    resultado = pd.read_parquet(os.path.join(diretorio, "resultado.parquet"))
+
+    if data_referencia is not None and pd.Timestamp(data_referencia).date().isoformat() != manifesto["data_referencia"]:
+        resultado = calcular_prazos(resultado, data_referencia)
+    return eventos, resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processa os eventos do SEI e grava o resultado em parquet.")
+    parser.add_argument("--fonte", default=FONTE_DADOS, help="caminho local ou URL da base de atividades")
+    parser.add_argument("--saida", default=DIRETORIO_RESULTADO, help="diretório do resultado")
+    parser.add_argument("--data", type=date.fromisoformat, default=None, help="data de referência dos prazos (padrão: hoje)")
+    parser.add_argument("--incremental", action="store_true", help="aplica só os eventos novos ao estado salvo")
+    parser.add_argument("--trabalhadores", type=int, default=TRABALHADORES, help="processos na reconstrução completa (1 = serial)")
+    argumentos = parser.parse_args()
+
+    manifesto = gravar_resultado(
+        processar(argumentos.fonte, argumentos.data, argumentos.incremental, argumentos.trabalhadores),
+        argumentos.saida,
+    )
+    print(f"{manifesto['passagens']} passagens gravadas em {argumentos.saida} (referência {manifesto['data_referencia']})")
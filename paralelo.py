@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dias_uteis import calcular_prazos
+from instrumentacao import medir
+from passagens import classificar_eventos, reconstruir_passagens
+
+# Processos de trabalho usados na reconstrução em paralelo (padrão: um por núcleo)
+TRABALHADORES = int(os.environ.get("TRABALHADORES", os.cpu_count() or 1))
+
+# Abaixo deste número de eventos o custo de abrir os processos não compensa
+MINIMO_PARALELO = int(os.environ.get("MINIMO_PARALELO", 2_000_000))
+
+# Colunas de que a reconstrução precisa depois da classificação (a Descrição fica de fora)
+COLUNAS_RECONSTRUCAO = ["Processo", "Data/Hora", "Unidade", "Usuário", "TipoProcesso", "Código Evento", "Atribuído"]
+
+
+def passagens_com_prazos(eventos, usuarios_nomes, data_referencia, trabalhadores=TRABALHADORES, minimo=MINIMO_PARALELO):
+    """Reconstrói as passagens e calcula os prazos, em paralelo quando compensa.
+
+    Espera os eventos já ordenados por `ordenar_eventos`. Os processos são
+    repartidos entre `trabalhadores` pelo hash do número do processo e o
+    resultado sai na mesma ordem da execução serial.
+    """
+    if trabalhadores <= 1 or len(eventos) < minimo:
+        passagens = medir(reconstruir_passagens)(eventos, usuarios_nomes)
+        return medir(calcular_prazos)(passagens, data_referencia)
+    return medir(_em_paralelo, nome="passagens_com_prazos_em_paralelo")(eventos, usuarios_nomes, data_referencia, trabalhadores)
+
+
+def _em_paralelo(eventos, usuarios_nomes, data_referencia, trabalhadores):
+    # Nos trabalhadores, reconstrução e prazos rodam juntos: são medidos como uma etapa só
+    if "Código Evento" not in eventos:
+        eventos = classificar_eventos(eventos)
+    eventos = eventos[COLUNAS_RECONSTRUCAO]
+
+    # Cada processo cai numa única fatia; a fatia preserva a ordem dos eventos
+    processo = eventos["Processo"]
+    if isinstance(processo.dtype, pd.CategoricalDtype):
+        codigos = processo.cat.codes.to_numpy()
+        hashes = pd.util.hash_array(processo.cat.categories.to_numpy())[codigos]
+    else:
+        hashes = pd.util.hash_array(processo.to_numpy())
+    fatia = (hashes % np.uint64(trabalhadores)).astype(np.int64)
+    ordem = np.argsort(fatia, kind="stable")
+    limites = np.cumsum(np.bincount(fatia, minlength=trabalhadores))[:-1]
+    fatias = [eventos.iloc[posicoes] for posicoes in np.split(ordem, limites) if len(posicoes)]
+
+    with ProcessPoolExecutor(max_workers=len(fatias), mp_context=_contexto()) as executor:
+        partes = list(executor.map(
+            _reconstruir_fatia,
+            fatias,
+            [usuarios_nomes] * len(fatias),
+            [data_referencia] * len(fatias),
+        ))
+
+    # Junta as partes na ordem dos processos no log, como na execução serial
+    passagens = pd.concat(partes, ignore_index=True)
+    ordem_processos = pd.Index(pd.unique(processo.to_numpy()))
+    posicao = ordem_processos.get_indexer(passagens["Processo"].to_numpy())
+    return passagens.iloc[np.argsort(posicao, kind="stable")].reset_index(drop=True)
+
+
+def _contexto():
+    # Com forkserver os trabalhadores saem de um servidor que já importou
+    # pandas e este módulo; sem ele (Windows), cada trabalhador importa do zero
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context("forkserver")
+        contexto.set_forkserver_preload([__name__])
+        return contexto
+    return multiprocessing.get_context("spawn")
+
+
+def _reconstruir_fatia(eventos, usuarios_nomes, data_referencia):
+    return calcular_prazos(reconstruir_passagens(eventos, usuarios_nomes), data_referencia)
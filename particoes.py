@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import sys
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from dias_uteis import COLUNAS_PRAZO, calcular_prazos
+from fontes import FONTE_DADOS, carregar, normalizar_eventos, ordenar_categorias
+from passagens import COLUNAS_PASSAGEM, ordenar_eventos, reconstruir_passagens
+
+# Diretório do acervo particionado (Hive) por mês e Unidade:
+#   eventos/mes=AAAA-MM/Unidade=.../*.parquet    eventos normalizados, pelo mês da Data/Hora
+#   passagens/mes=AAAA-MM/Unidade=.../*.parquet  passagens com prazos, pelo mês da Data Recebido
+#   manifesto.json                               versão dos dados, período e unidades
+DIRETORIO_PARTICOES = os.environ.get("DIRETORIO_PARTICOES", "particoes")
+
+PARTICIONAMENTO = ds.partitioning(pa.schema([("mes", pa.string()), ("Unidade", pa.string())]), flavor="hive")
+
+
+def gravar_particoes(eventos, passagens, impressao_digital, diretorio=DIRETORIO_PARTICOES):
+    """Grava eventos e passagens como datasets parquet particionados por mês e Unidade.
+
+    O acervo é montado num diretório ao lado e trocado de uma vez no final,
+    para que leitores nunca vejam uma gravação pela metade.
+    """
+    temporario = diretorio + ".novo"
+    shutil.rmtree(temporario, ignore_errors=True)
+    _gravar_dataset(eventos, "Data/Hora", os.path.join(temporario, "eventos"))
+    _gravar_dataset(passagens, "Data Recebido", os.path.join(temporario, "passagens"))
+
+    manifesto = {
+        "impressao_digital": impressao_digital,
+        "gravado_em": datetime.now().isoformat(),
+        "inicio": passagens["Data Recebido"].min().date().isoformat(),
+        "fim": passagens["Data Recebido"].max().date().isoformat(),
+        "unidades": sorted(passagens["Unidade"].dropna().unique().tolist()),
+    }
+    with open(os.path.join(temporario, "manifesto.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+
+    antigo = diretorio + ".antigo"
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.isdir(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return manifesto
+
+
+def ler_manifesto(diretorio=DIRETORIO_PARTICOES):
+    with open(os.path.join(diretorio, "manifesto.json"), encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def ler_periodo(inicio, fim, unidade=None, diretorio=DIRETORIO_PARTICOES):
+    """Passagens recebidas entre `inicio` e `fim` (datas, inclusive) e os eventos dos seus processos.
+
+    Os filtros de mês e Unidade descartam partições inteiras; o de Data Recebido
+    usa as estatísticas dos row groups. Dos eventos só são lidos os meses a
+    partir de `inicio`, que cobrem as linhas do tempo dessas passagens.
+    """
+    inicio = pd.Timestamp(inicio).normalize()
+    fim = pd.Timestamp(fim).normalize() + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    meses = (ds.field("mes") >= f"{inicio:%Y-%m}") & (ds.field("mes") <= f"{fim:%Y-%m}")
+
+    filtro = meses & (ds.field("Data Recebido") >= inicio) & (ds.field("Data Recebido") <= fim)
+    if unidade is not None:
+        filtro &= ds.field("Unidade") == unidade
+    passagens = _ler_dataset(os.path.join(diretorio, "passagens"), filtro)
+    # Acervos gravados com os prazos trazem os das concluídas prontos (ver calcular_prazos)
+    passagens = passagens[[coluna for coluna in COLUNAS_PASSAGEM + COLUNAS_PRAZO if coluna in passagens]]
+
+    processos = pa.array(passagens["Processo"].unique().tolist(), type=pa.string())
+    filtro = (ds.field("mes") >= f"{inicio:%Y-%m}") & ds.field("Processo").cast(pa.string()).isin(processos)
+    eventos = _ler_dataset(os.path.join(diretorio, "eventos"), filtro)
+    return eventos, passagens
+
+
+def _gravar_dataset(df, coluna_data, destino):
+    # Ordenado pela data, cada row group cobre um intervalo curto e o filtro por data o descarta inteiro
+    df = df.sort_values(by=coluna_data, kind="stable")
+    # Unidade sem valor continua nula: vai para a partição padrão do Hive e volta nula na leitura
+    df = df.assign(mes=df[coluna_data].dt.strftime("%Y-%m"), Unidade=df["Unidade"].astype(object))
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        destino,
+        format="parquet",
+        partitioning=PARTICIONAMENTO,
+        max_rows_per_group=64 * 1024,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def _ler_dataset(caminho, filtro):
+    tabela = ds.dataset(caminho, format="parquet", partitioning=PARTICIONAMENTO).to_table(filter=filtro)
+    return ordenar_categorias(tabela.drop_columns(["mes"]).to_pandas())
+
+
+if __name__ == "__main__":
+    # python particoes.py [fonte] [diretorio]: reconstrói as passagens e regrava o acervo
+    from usuarios import usuarios_nomes
+
+    carga = carregar(sys.argv[1] if len(sys.argv) > 1 else FONTE_DADOS)
+    eventos = normalizar_eventos(carga["dados"], usuarios_nomes)
+    passagens = calcular_prazos(reconstruir_passagens(ordenar_eventos(eventos), usuarios_nomes), date.today())
+    manifesto = gravar_particoes(eventos, passagens, carga["impressao_digital"], *sys.argv[2:3])
+    print(f"{len(eventos)} eventos e {len(passagens)} passagens gravados ({manifesto['inicio']} a {manifesto['fim']})")
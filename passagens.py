@@ -0,0 +1,269 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Códigos dos tipos de evento usados na reconstrução das passagens
+OUTRO = 0
+ATRIBUICAO = 1
+RECEBIMENTO = 2
+CONCLUSAO = 3
+
+COLUNAS_PASSAGEM = [
+    "Processo",
+    "Data Recebido",
+    "Usuário Recebeu",
+    "Responsável",
+    "Unidade",
+    "Tipo",
+    "Data Conclusão",
+    "Usuário Concluiu",
+]
+
+COLUNAS_PENDENTE = ["Processo", "Responsável Atribuído"]
+
+# Frases do SEI (em minúsculas) que identificam cada tipo de evento. A ordem dos
+# tipos é a prioridade quando uma descrição casa com mais de um. Logo após a
+# frase de atribuição vem o login do novo responsável.
+PADROES_EVENTOS = {
+    "atribuicao": ["processo atribuído para"],
+    "recebimento": ["recebido na unidade", "reabertura", "processo público gerado"],
+    "conclusao": ["conclusão"],
+}
+CODIGOS_PADRAO = {"atribuicao": ATRIBUICAO, "recebimento": RECEBIMENTO, "conclusao": CONCLUSAO}
+
+# Arquivo opcional com frases adicionais, no mesmo formato de PADROES_EVENTOS
+# (JSON), para acompanhar novas redações do SEI sem mexer no código
+ARQUIVO_PADROES = os.environ.get("ARQUIVO_PADROES_EVENTOS", "padroes_eventos.json")
+
+
+def ordenar_eventos(df):
+    """Ordena os eventos na ordem esperada pela reconstrução das passagens."""
+    return df.sort_values(by=["Processo", "Data/Hora", "Descrição"], ascending=[True, True, False])
+
+
+def padroes_de_eventos(arquivo_padroes=ARQUIVO_PADROES):
+    """Tabela de frases compilada: PADROES_EVENTOS mais as frases de `arquivo_padroes`."""
+    # A data de modificação entra na chave para que edições no arquivo invalidem o cache
+    versao = os.path.getmtime(arquivo_padroes) if os.path.exists(arquivo_padroes) else None
+    return _compilar_padroes(arquivo_padroes, versao)
+
+
+@lru_cache(maxsize=4)
+def _compilar_padroes(arquivo_padroes, versao):
+    tabela = {tipo: list(frases) for tipo, frases in PADROES_EVENTOS.items()}
+    if versao is not None:
+        with open(arquivo_padroes, encoding="utf-8") as arquivo:
+            adicionais = json.load(arquivo)
+        desconhecidos = sorted(set(adicionais) - set(CODIGOS_PADRAO))
+        if desconhecidos:
+            raise ValueError(
+                f"Tipo de evento desconhecido em {arquivo_padroes}: {', '.join(desconhecidos)} "
+                f"(tipos aceitos: {', '.join(CODIGOS_PADRAO)})"
+            )
+        for tipo, frases in adicionais.items():
+            tabela[tipo].extend(frase.lower() for frase in frases if frase.lower() not in tabela[tipo])
+
+    return {
+        "tipos": [(CODIGOS_PADRAO[tipo], tuple(frases)) for tipo, frases in tabela.items()],
+        "atribuido": re.compile(r"(?:%s) ([\w\.\-]+)" % "|".join(map(re.escape, tabela["atribuicao"]))),
+    }
+
+
+def classificar_eventos(df, padroes=None):
+    """Acrescenta o código do tipo de evento e o login atribuído (quando houver).
+
+    Cada descrição distinta é classificada uma única vez e o resultado é
+    espalhado pelas linhas; descrições nulas ficam como OUTRO.
+    """
+    padroes = padroes or padroes_de_eventos()
+    posicao, descricoes = pd.factorize(df["Descrição"])
+    descricoes = pd.Series(descricoes.astype(str)).str.lower()
+
+    # A ordem dos tipos reproduz a cadeia if/elif do rastreamento original
+    condicoes = []
+    for _, frases in padroes["tipos"]:
+        casa = np.zeros(len(descricoes), dtype=bool)
+        for frase in frases:
+            casa |= descricoes.str.contains(frase, regex=False).to_numpy()
+        condicoes.append(casa)
+    codigos = np.select(condicoes, [codigo for codigo, _ in padroes["tipos"]], default=OUTRO).astype(np.int8)
+
+    logins = pd.Series(np.nan, index=descricoes.index, dtype=object)
+    atribuicao = codigos == ATRIBUICAO
+    logins[atribuicao] = descricoes[atribuicao].str.extract(padroes["atribuido"], expand=False)
+    posicao_login, logins = pd.factorize(logins)
+
+    # A posição -1 (descrição nula) cai no último elemento: OUTRO, sem login
+    codigos = np.append(codigos, np.int8(OUTRO))
+    posicao_login = np.append(posicao_login, -1)
+    return df.assign(**{
+        "Código Evento": codigos[posicao],
+        "Atribuído": pd.Categorical.from_codes(posicao_login[posicao], categories=logins),
+    })
+
+
+def _inicio_de_bloco(valores):
+    # Marca as posições em que o valor difere do anterior (códigos não negativos)
+    return np.diff(valores, prepend=-1) != 0
+
+
+def reconstruir_passagens(eventos, usuarios_nomes):
+    """Reconstrói as passagens recebimento → conclusão com operações colunares.
+
+    Espera os eventos já ordenados por `ordenar_eventos`.
+    """
+    return reconstruir_passagens_com_estado(eventos, usuarios_nomes)[0]
+
+
+def reconstruir_passagens_com_estado(eventos, usuarios_nomes):
+    """Como `reconstruir_passagens`, devolvendo também as atribuições pendentes.
+
+    Pendente é a última atribuição feita depois da última conclusão de um
+    processo sem passagem aberta, que vira o responsável do próximo recebimento.
+    """
+    if "Código Evento" not in eventos:
+        eventos = classificar_eventos(eventos)
+    eventos = eventos.reset_index(drop=True)
+
+    if eventos.empty:
+        return pd.DataFrame(columns=COLUNAS_PASSAGEM), pd.DataFrame(columns=COLUNAS_PENDENTE)
+
+    codigo = eventos["Código Evento"].to_numpy()
+    # Os eventos estão ordenados por processo, então cada grupo é um bloco contíguo
+    grupo = pd.factorize(eventos["Processo"])[0]
+    inicio_grupo = _inicio_de_bloco(grupo)
+    grupo_inicio = np.flatnonzero(inicio_grupo)
+
+    # Recebimentos e conclusões; repetições seguidas do mesmo tipo não mudam o estado
+    pos = np.flatnonzero((codigo == RECEBIMENTO) | (codigo == CONCLUSAO))
+    cod, grp = codigo[pos], grupo[pos]
+    muda = _inicio_de_bloco(grp) | _inicio_de_bloco(cod)
+    pos, cod, grp = pos[muda], cod[muda], grp[muda]
+
+    # Conclusão sem passagem aberta (a primeira do processo) é ignorada
+    efetivo = ~(_inicio_de_bloco(grp) & (cod == CONCLUSAO))
+    pos, cod = pos[efetivo], cod[efetivo]
+
+    # Agora os eventos alternam recebimento/conclusão dentro de cada processo
+    i_receb = np.flatnonzero(cod == RECEBIMENTO)
+    i_prox = i_receb + 1
+    concluida = i_prox < len(pos)
+    concluida[concluida] = cod[i_prox[concluida]] == CONCLUSAO
+    pos_receb = pos[i_receb]
+    pos_concl = pos[i_prox[concluida]]
+
+    # Janela de atribuição: conclusões efetivas anteriores ao evento no mesmo processo
+    fechamento = np.zeros(len(eventos), dtype=np.int64)
+    fechamento[pos_concl] = 1
+    anteriores = np.cumsum(fechamento) - fechamento
+    base = np.maximum.accumulate(np.where(inicio_grupo, anteriores, 0))
+    janela = anteriores - base
+
+    # Última atribuição válida de cada janela define o responsável da passagem
+    largura = janela.max() + 1
+    chave = grupo.astype(np.int64) * largura + janela
+    atribuido = eventos["Atribuído"]
+    validas = np.flatnonzero((codigo == ATRIBUICAO) & atribuido.notna().to_numpy())
+    ultima = pd.Series(atribuido.to_numpy()[validas]).groupby(chave[validas]).last()
+    ultima = ultima.map(lambda login: usuarios_nomes.get(login, login))
+    responsavel = ultima.reindex(chave[pos_receb])
+
+    # Janelas sem recebimento só podem ser a última de cada processo (após a última conclusão)
+    pendente = ultima[~ultima.index.isin(chave[pos_receb])]
+    pendentes = pd.DataFrame({
+        "Processo": eventos["Processo"].to_numpy()[grupo_inicio[pendente.index // largura]],
+        "Responsável Atribuído": pendente.to_numpy(),
+    })
+
+    receb = eventos.iloc[pos_receb]
+    concl = eventos.iloc[pos_concl]
+
+    data_conclusao = pd.Series(pd.NaT, index=range(len(pos_receb)), dtype=eventos["Data/Hora"].dtype)
+    data_conclusao[concluida] = concl["Data/Hora"].to_numpy()
+    usuario_concluiu = np.full(len(pos_receb), None, dtype=object)
+    usuario_concluiu[concluida] = concl["Usuário"].to_numpy()
+
+    usuario_recebeu = receb["Usuário"].to_numpy()
+    return pd.DataFrame({
+        "Processo": receb["Processo"].to_numpy(),
+        "Data Recebido": receb["Data/Hora"].to_numpy(),
+        "Usuário Recebeu": usuario_recebeu,
+        "Responsável": np.where(responsavel.notna(), responsavel.to_numpy(), usuario_recebeu),
+        "Unidade": receb["Unidade"].to_numpy(),
+        "Tipo": receb["TipoProcesso"].to_numpy(),
+        "Data Conclusão": data_conclusao,
+        "Usuário Concluiu": usuario_concluiu,
+    }), pendentes
+
+
+def reconstruir_passagens_iterativo(eventos, usuarios_nomes):
+    """Versão original (groupby + iterrows), mantida como referência de paridade."""
+    resultados = []
+
+    for processo, grupo in eventos.groupby("Processo", observed=True):
+        grupo = grupo.reset_index(drop=True)
+        processo_aberto = False
+        entrada_atual = {}
+        responsavel_atribuido = None
+
+        for _, row in grupo.iterrows():
+            descricao = str(row["Descrição"]).lower()
+            data = row["Data/Hora"]
+            usuario = row["Usuário"]
+            unidade = row["Unidade"]
+            tipo = row["TipoProcesso"]
+
+            if "processo atribuído para" in descricao:
+                match = re.search(r"processo atribuído para ([\w\.\-]+)", descricao)
+                if match:
+                    novo_responsavel = match.group(1)
+                    if novo_responsavel in usuarios_nomes:
+                        novo_responsavel = usuarios_nomes[novo_responsavel]
+
+                    if processo_aberto:
+                        entrada_atual["Responsável"] = novo_responsavel
+                    else:
+                        responsavel_atribuido = novo_responsavel
+
+            elif any(palavra in descricao for palavra in ["recebido na unidade", "reabertura", "processo público gerado"]):
+                if not processo_aberto:
+                    entrada_atual = {
+                        "Processo": processo,
+                        "Data Recebido": data,
+                        "Usuário Recebeu": usuario,
+                        "Responsável": responsavel_atribuido or usuario,
+                        "Unidade": unidade,
+                        "Tipo": tipo,
+                        "Data Conclusão": None,
+                        "Usuário Concluiu": None
+                    }
+                    processo_aberto = True
+                    responsavel_atribuido = None
+
+            elif "conclusão" in descricao:
+                if processo_aberto:
+                    entrada_atual["Data Conclusão"] = data
+                    entrada_atual["Usuário Concluiu"] = usuario
+                    resultados.append(entrada_atual)
+                    processo_aberto = False
+                    entrada_atual = {}
+                    responsavel_atribuido = None
+
+        if processo_aberto and entrada_atual:
+            resultados.append(entrada_atual)
+
+    return pd.DataFrame(resultados, columns=COLUNAS_PASSAGEM)
+
+
+def conferir_paridade(eventos, usuarios_nomes):
+    """Compara o motor vetorizado com o laço original; levanta AssertionError se divergirem."""
+    esperado = reconstruir_passagens_iterativo(eventos, usuarios_nomes)
+    obtido = reconstruir_passagens(eventos, usuarios_nomes)
+    esperado["Data Conclusão"] = pd.to_datetime(esperado["Data Conclusão"])
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+    return len(obtido)
+
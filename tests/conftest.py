@@ -0,0 +1,13 @@
+import pytest
+
+from fontes import carregar, normalizar_eventos
+from gerador import gerar_eventos
+from usuarios import usuarios_nomes
+
+
+@pytest.fixture(scope="session")
+def eventos(tmp_path_factory):
+    """Log sintético lido como no painel: parquet, `carregar` e `normalizar_eventos`."""
+    caminho = str(tmp_path_factory.mktemp("fonte") / "eventos.parquet")
+    gerar_eventos(20_000, dias=120).to_parquet(caminho, index=False)
+    return normalizar_eventos(carregar(caminho)["dados"], usuarios_nomes)
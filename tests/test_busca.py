@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from busca import buscar, construir_indice_busca, descricoes_encontradas, interpretar_consulta, termos_de
+
+
+def _varredura(eventos, consulta):
+    """Busca ingênua: cada parte da consulta procurada com `str.contains` no texto normalizado."""
+    textos = " " + eventos["Descrição"].map(lambda texto: " ".join(termos_de(texto)), na_action="ignore").fillna("") + " "
+    partes = interpretar_consulta(consulta)
+    encontrado = pd.Series(bool(partes), index=eventos.index)
+    for parte in partes:
+        encontrado &= textos.str.contains(" " + " ".join(parte) + " ", regex=False)
+    return np.flatnonzero(encontrado.to_numpy())
+
+
+@pytest.fixture(scope="module")
+def indice(eventos):
+    return construir_indice_busca(eventos)
+
+
+def _consultas(eventos):
+    # Usuários e números tirados do próprio log, para que as consultas encontrem algo
+    assinado = eventos["Descrição"][eventos["Descrição"].str.startswith("Assinado Documento", na=False)].iloc[0]
+    usuario, numero = assinado.split()[-1], assinado.split()[2]
+    return [
+        "recebido",
+        "PROCESSO unidade",
+        "conclusao automatica",
+        '"remetido pela unidade"',
+        '"unidade pela"',
+        'dcont "sul dpgu"',
+        "atribuído " + usuario,
+        usuario,
+        numero,
+        f'"documento {numero}"',
+        "termo-que-nao-existe",
+        "",
+    ]
+
+
+def test_igual_a_varredura(eventos, indice):
+    for consulta in _consultas(eventos):
+        esperado = _varredura(eventos, consulta)
+        assert buscar(indice, consulta)["linhas"].tolist() == esperado.tolist(), consulta
+
+
+def test_textos_encontrados(eventos, indice):
+    resultado = buscar(indice, '"remetido pela unidade" dcont')
+    descricoes = eventos["Descrição"].iloc[_varredura(eventos, '"remetido pela unidade" dcont')]
+    assert descricoes_encontradas(indice, resultado, descricoes).all()
+    assert sorted(indice["textos"][resultado["textos"]]) == sorted(descricoes.unique())
+
+
+def test_indice_incremental(eventos, indice):
+    # Um prefixo do log indexado primeiro; o índice do log inteiro parte dele
+    prefixo = eventos.iloc[: len(eventos) // 3]
+    incremental = construir_indice_busca(eventos, anterior=construir_indice_busca(prefixo))
+
+    assert list(incremental["textos"]) == list(indice["textos"])
+    assert sorted(incremental["vocabulario"]) == sorted(indice["vocabulario"])
+    for consulta in _consultas(eventos):
+        assert buscar(incremental, consulta)["linhas"].tolist() == _varredura(eventos, consulta).tolist(), consulta
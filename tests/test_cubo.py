@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+import cubo
+import cubo_arrow
+from dias_uteis import calcular_prazos
+from passagens import ordenar_eventos, reconstruir_passagens
+from usuarios import usuarios_nomes
+
+FILTROS = [
+    {},
+    {"status": "Aberto"},
+    {"inicio": "2024-02-01", "fim": "2024-03-15"},
+    {"status": "Concluído", "inicio": "2024-01-15", "fim": "2024-04-30", "unidade": "DCONT SUL DPGU"},
+    {"unidade": "unidade que não existe"},
+]
+
+
+@pytest.fixture(scope="module")
+def resultado(eventos):
+    passagens = calcular_prazos(reconstruir_passagens(ordenar_eventos(eventos), usuarios_nomes), pd.Timestamp("2024-06-03"))
+    # Uma passagem sem data de recebimento, como sai de uma linha malformada na fonte
+    return pd.concat([passagens, passagens.iloc[[0]].assign(**{"Data Recebido": pd.NaT})], ignore_index=True)
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_backends_iguais(resultado, filtros):
+    fatias = [modulo.fatiar(modulo.construir_cubo(resultado), **filtros) for modulo in (cubo, cubo_arrow)]
+    assert cubo.totais(fatias[0]) == cubo_arrow.totais(fatias[1])
+    for dimensao in ("Unidade", "Responsável", "Tipo"):
+        pd.testing.assert_frame_equal(cubo.contagem_por(fatias[0], dimensao), cubo_arrow.contagem_por(fatias[1], dimensao))
+        pd.testing.assert_series_equal(
+            cubo.media_de_prazo_por(fatias[0], dimensao), cubo_arrow.media_de_prazo_por(fatias[1], dimensao)
+        )
+        assert cubo.valores_de(fatias[0], dimensao) == cubo_arrow.valores_de(fatias[1], dimensao)
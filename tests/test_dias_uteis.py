@@ -0,0 +1,63 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dias_uteis
+from dias_uteis import calcular_prazos, contar_dias_uteis
+
+
+@pytest.fixture(autouse=True)
+def calendario_limitado(monkeypatch):
+    # Um NaT no intervalo de anos pediria feriados de bilhões de anos (e estouraria a memória)
+    original = dias_uteis.calendario_util
+
+    def limitado(ano_inicial, ano_final, *args, **kwargs):
+        assert ano_final - ano_inicial < 100, (ano_inicial, ano_final)
+        return original(ano_inicial, ano_final, *args, **kwargs)
+
+    monkeypatch.setattr(dias_uteis, "calendario_util", limitado)
+
+
+def _passagens():
+    return pd.DataFrame({
+        "Processo": ["1", "2", "3", "4"],
+        "Data Recebido": pd.to_datetime(["2024-03-04 10:00", None, "2024-03-01 09:00", None]),
+        "Data Conclusão": pd.to_datetime(["2024-03-08 17:00", "2024-03-08 17:00", None, None]),
+    })
+
+
+def test_contagem_com_feriados():
+    # 1º de maio de 2024 (quarta-feira) não conta
+    dias = contar_dias_uteis(np.array(["2024-04-29"], dtype="datetime64[D]"), np.array(["2024-05-03"], dtype="datetime64[D]"))
+    assert dias.dtype == np.int64
+    assert dias.tolist() == [3]
+
+
+def test_contagem_com_datas_nulas():
+    inicio = np.array(["2024-03-04", "NaT", "2024-03-01"], dtype="datetime64[D]")
+    fim = np.array(["2024-03-08", "2024-03-08", "NaT"], dtype="datetime64[D]")
+    dias = contar_dias_uteis(inicio, fim)
+    assert dias[0] == 4
+    assert np.isnan(dias[1:]).all()
+    assert np.isnan(contar_dias_uteis(inicio[1:2], fim[1:2])).all()
+
+
+def test_prazos_de_passagens_sem_data_de_recebimento():
+    resultado = calcular_prazos(_passagens(), date(2024, 3, 11))
+    assert resultado["Status"].tolist() == ["Concluído", "Concluído", "Aberto", "Aberto"]
+    assert resultado["Dias de Prazo"].iloc[[0, 2]].tolist() == [4, 6]
+    assert resultado["Dias de Prazo"].iloc[[1, 3]].isna().all()
+    assert resultado["Faixa de Prazo"].tolist() == ["0-5", None, "6-10", None]
+
+    # Recontagem a partir de prazos já gravados (como no modo incremental)
+    recontado = calcular_prazos(resultado, date(2024, 3, 18))
+    assert recontado["Dias de Prazo"].iloc[[0, 2]].tolist() == [4, 11]
+    assert recontado["Dias de Prazo"].iloc[[1, 3]].isna().all()
+    assert recontado["Faixa de Prazo"].tolist() == ["0-5", None, "11+", None]
+
+
+def test_prazos_sem_datas_nulas_continuam_inteiros():
+    passagens = _passagens().dropna(subset=["Data Recebido"])
+    assert calcular_prazos(passagens, date(2024, 3, 11))["Dias de Prazo"].dtype == np.int64
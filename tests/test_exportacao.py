@@ -0,0 +1,86 @@
+import csv
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from dias_uteis import calcular_prazos
+from exportacao import COLUNAS_EVENTOS, COLUNAS_PASSAGENS, exportar
+from indice_eventos import construir_indice, linhas_da_passagem
+from passagens import ordenar_eventos, reconstruir_passagens
+from usuarios import usuarios_nomes
+
+
+@pytest.fixture(scope="module")
+def passagens(eventos):
+    return calcular_prazos(reconstruir_passagens(ordenar_eventos(eventos), usuarios_nomes), pd.Timestamp("2024-06-03"))
+
+
+@pytest.fixture(scope="module")
+def indice(eventos):
+    return construir_indice(eventos)
+
+
+def _eventos_da_passagem(indice, processo, inicio, fim):
+    a, b = linhas_da_passagem(indice, processo, inicio, fim)
+    return pd.DataFrame({coluna: valores[a:b] for coluna, valores in indice["colunas"].items()})
+
+
+def test_eventos_exportados_sao_os_da_passagem(passagens, indice, tmp_path):
+    # Blocos pequenos e um recorte fora de ordem, para passar por várias junções
+    linhas = np.random.default_rng(0).permutation(len(passagens))[:1_500]
+    caminho = tmp_path / "passagens.parquet"
+    antes = datetime.now()
+    total = exportar(passagens, str(caminho), "parquet", indice, linhas=linhas, tamanho_bloco=97)
+    exportado = pd.read_parquet(caminho)
+    assert len(exportado) == total
+    assert list(exportado.columns) == COLUNAS_PASSAGENS + COLUNAS_EVENTOS
+
+    selecionadas = passagens.iloc[linhas]
+    fins = selecionadas["Data Conclusão"].mask(selecionadas["Status"] == "Aberto", pd.Timestamp(antes))
+    posicao = 0
+    for processo, recebido, fim in zip(selecionadas["Processo"], selecionadas["Data Recebido"], fins):
+        esperado = _eventos_da_passagem(indice, processo, recebido, fim)
+        obtido = exportado.iloc[posicao:posicao + max(len(esperado), 1)]
+        posicao += len(obtido)
+
+        assert (obtido["Processo"] == processo).all()
+        assert (obtido["Data Recebido"] == recebido).all()
+        if esperado.empty:
+            assert obtido[COLUNAS_EVENTOS].isna().all().all()
+        else:
+            pd.testing.assert_frame_equal(
+                obtido[COLUNAS_EVENTOS].reset_index(drop=True),
+                esperado[COLUNAS_EVENTOS].reset_index(drop=True).astype({"Usuário": object, "Descrição": object}),
+                check_dtype=False,
+            )
+    assert posicao == len(exportado)
+
+
+def test_formatos_gravam_as_mesmas_linhas(passagens, indice, tmp_path):
+    linhas = np.arange(0, len(passagens), 7)
+    totais = {
+        formato: exportar(passagens, str(tmp_path / f"passagens.{formato}"), formato, indice, linhas=linhas, tamanho_bloco=50)
+        for formato in ("xlsx", "csv", "parquet")
+    }
+    assert len(set(totais.values())) == 1
+
+    with open(tmp_path / "passagens.csv", encoding="utf-8-sig", newline="") as arquivo:
+        registros = list(csv.reader(arquivo, delimiter=";"))
+    assert registros[0] == COLUNAS_PASSAGENS + COLUNAS_EVENTOS
+    assert len(registros) - 1 == totais["csv"]
+
+    aba = load_workbook(tmp_path / "passagens.xlsx", read_only=True).worksheets[0]
+    assert sum(1 for _ in aba.iter_rows()) - 1 == totais["xlsx"]
+    assert len(pd.read_parquet(tmp_path / "passagens.parquet")) == totais["parquet"]
+
+
+def test_sem_indice_exporta_uma_linha_por_passagem(passagens, tmp_path):
+    caminho = tmp_path / "passagens.parquet"
+    assert exportar(passagens, str(caminho), "parquet", tamanho_bloco=333) == len(passagens)
+    exportado = pd.read_parquet(caminho)
+    pd.testing.assert_frame_equal(
+        exportado, passagens[COLUNAS_PASSAGENS].reset_index(drop=True).astype(exportado.dtypes.to_dict()), check_dtype=False
+    )
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import os
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pyarrow as pa
+import pytest
+
+import fontes
+from fontes import carregar
+from gerador import gerar_eventos
+from motor import manter_atualizado
+
+
+def _parquet(quantidade, semente=0):
+    arquivo = io.BytesIO()
+    gerar_eventos(quantidade, semente=semente).to_parquet(arquivo, index=False)
+    return arquivo.getvalue()
+
+
+@pytest.fixture
+def servidor():
+    """Servidor local; o teste escolhe o conteúdo e quais validadores ele envia."""
+    estado = {"conteudo": _parquet(2_000), "etag": True, "last_modified": True, "modificado": 1_700_000_000,
+              "requisicoes": [], "travado": False, "liberar": threading.Event()}
+
+    class Servidor(BaseHTTPRequestHandler):
+        def do_GET(self):
+            estado["requisicoes"].append(dict(self.headers))
+            if estado["travado"]:
+                estado["liberar"].wait()
+            etag = '"%s"' % hashlib.sha256(estado["conteudo"]).hexdigest()
+            desde = self.headers.get("If-Modified-Since")
+            if (estado["etag"] and self.headers.get("If-None-Match") == etag) or (
+                estado["last_modified"] and desde and parsedate_to_datetime(desde).timestamp() >= estado["modificado"]
+            ):
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if estado["etag"]:
+                self.send_header("ETag", etag)
+            if estado["last_modified"]:
+                self.send_header("Last-Modified", formatdate(estado["modificado"], usegmt=True))
+            self.send_header("Content-Length", str(len(estado["conteudo"])))
+            self.end_headers()
+            self.wfile.write(estado["conteudo"])
+
+        def log_message(self, *args):
+            pass
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Servidor)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    estado["url"] = f"http://127.0.0.1:{http.server_port}/eventos.parquet"
+    yield estado
+    estado["liberar"].set()
+    http.shutdown()
+    http.server_close()
+
+
+def test_http_etag(servidor):
+    servidor["last_modified"] = False
+    primeira = carregar(servidor["url"])
+    segunda = carregar(servidor["url"], primeira)
+
+    assert segunda is primeira
+    assert servidor["requisicoes"][1]["If-None-Match"] == primeira["validadores"]["etag"]
+    assert "If-Modified-Since" not in servidor["requisicoes"][1]
+
+
+def test_http_last_modified(servidor):
+    servidor["etag"] = False
+    primeira = carregar(servidor["url"])
+    segunda = carregar(servidor["url"], primeira)
+
+    assert segunda is primeira
+    assert primeira["validadores"] == {"etag": None, "last_modified": formatdate(servidor["modificado"], usegmt=True)}
+    assert servidor["requisicoes"][1]["If-Modified-Since"] == primeira["validadores"]["last_modified"]
+    assert "If-None-Match" not in servidor["requisicoes"][1]
+
+
+def test_http_conteudo_novo(servidor):
+    primeira = carregar(servidor["url"])
+    servidor["conteudo"], servidor["modificado"] = _parquet(2_000, semente=1), servidor["modificado"] + 60
+    segunda = carregar(servidor["url"], primeira)
+
+    assert segunda["impressao_digital"] != primeira["impressao_digital"]
+    assert segunda["validadores"]["etag"] != primeira["validadores"]["etag"]
+    assert len(segunda["dados"]) == 2_000
+
+
+def test_http_sem_validadores_nao_reconverte(servidor):
+    # Sem 304 o arquivo é baixado de novo, mas o mesmo hash reaproveita os dados convertidos
+    servidor["etag"] = servidor["last_modified"] = False
+    primeira = carregar(servidor["url"])
+    segunda = carregar(servidor["url"], primeira)
+
+    assert len(servidor["requisicoes"]) == 2
+    assert segunda is not primeira
+    assert segunda["dados"] is primeira["dados"]
+    assert segunda["impressao_digital"] == primeira["impressao_digital"]
+
+
+def test_http_servidor_travado(servidor, monkeypatch):
+    # Sem timeout, a thread de atualização (e quem espera a trava dela) ficaria presa para sempre
+    monkeypatch.setattr(fontes, "TIMEOUT_FONTE", 0.2)
+    servidor["travado"] = True
+    registro = manter_atualizado(servidor["url"], intervalo=3600)
+    try:
+        assert registro["pronta"].wait(10)
+        assert registro["versao"] is None
+        assert isinstance(registro["erro"], TimeoutError)
+        with registro["trava"]:
+            pass
+    finally:
+        registro["parar"].set()
+
+
+def test_local_tamanho_e_data_de_modificacao(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "eventos.parquet")
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(_parquet(2_000))
+    primeira = carregar(caminho)
+    assert primeira["validadores"] == {"tamanho": os.path.getsize(caminho), "modificado": os.stat(caminho).st_mtime_ns}
+
+    # Mesmos validadores: o arquivo nem é aberto
+    def nao_abrir(*args, **kwargs):
+        raise AssertionError("o arquivo não deveria ser lido")
+
+    with monkeypatch.context() as m:
+        m.setattr(fontes.pa, "memory_map", nao_abrir)
+        assert carregar(caminho, primeira) is primeira
+
+    # Só a data mudou: o arquivo é relido para o hash, mas os dados são os mesmos
+    os.utime(caminho, ns=(primeira["validadores"]["modificado"] + 10**9,) * 2)
+    tocado = carregar(caminho, primeira)
+    assert tocado["dados"] is primeira["dados"]
+    assert tocado["validadores"]["modificado"] == primeira["validadores"]["modificado"] + 10**9
+
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(_parquet(1_000, semente=1))
+    novo = carregar(caminho, tocado)
+    assert novo["impressao_digital"] != primeira["impressao_digital"]
+    assert len(novo["dados"]) == 1_000
+
+
+def test_local_arrow_igual_ao_parquet(tmp_path):
+    eventos = gerar_eventos(1_000)
+    eventos.to_parquet(tmp_path / "eventos.parquet", index=False)
+    with pa.ipc.new_file(str(tmp_path / "eventos.arrow"), pa.Schema.from_pandas(eventos, preserve_index=False)) as escritor:
+        escritor.write_table(pa.Table.from_pandas(eventos, preserve_index=False))
+
+    parquet = carregar(str(tmp_path / "eventos.parquet"))["dados"]
+    arrow = carregar("file://" + str(tmp_path / "eventos.arrow"))["dados"]
+    assert parquet.equals(arrow)
@@ -0,0 +1,94 @@
+import json
+
+import pandas as pd
+import pytest
+
+import incremental
+from incremental import atualizar_passagens, conferir_consistencia, ler_passagens
+from passagens import COLUNAS_PASSAGEM, ordenar_eventos, reconstruir_passagens
+from usuarios import usuarios_nomes
+
+
+def _ate(eventos, fracao):
+    return eventos[eventos["Data/Hora"] <= eventos["Data/Hora"].quantile(fracao)]
+
+
+def test_metades_aplicadas_em_sequencia_igualam_a_reconstrucao(eventos, tmp_path):
+    diretorio = str(tmp_path / "estado")
+    atualizar_passagens(_ate(eventos, 0.6), usuarios_nomes, diretorio)
+    assert conferir_consistencia(_ate(eventos, 0.6), usuarios_nomes, diretorio) > 0
+
+    passagens = atualizar_passagens(eventos, usuarios_nomes, diretorio)
+    assert conferir_consistencia(eventos, usuarios_nomes, diretorio) == len(passagens)
+
+    esperado = reconstruir_passagens(ordenar_eventos(eventos), usuarios_nomes)
+    pd.testing.assert_frame_equal(passagens[COLUNAS_PASSAGEM], esperado, check_dtype=False)
+
+
+def test_varias_atualizacoes_pequenas(eventos, tmp_path):
+    diretorio = str(tmp_path / "estado")
+    for fracao in (0.2, 0.4, 0.5, 0.8, 1.0):
+        atualizar_passagens(_ate(eventos, fracao), usuarios_nomes, diretorio)
+    conferir_consistencia(eventos, usuarios_nomes, diretorio)
+
+
+def test_evento_atrasado_na_marca_dagua(eventos, tmp_path):
+    diretorio = str(tmp_path / "estado")
+    primeira = _ate(eventos, 0.5)
+    marca = primeira["Data/Hora"].max()
+    atualizar_passagens(primeira, usuarios_nomes, diretorio)
+
+    # Um recebimento posterior, de processo sem eventos na marca, chega atrasado com a
+    # mesma Data/Hora (em minutos) da marca d'água, no fim da fonte
+    na_marca = primeira.loc[primeira["Data/Hora"] == marca, "Processo"]
+    candidatos = eventos[
+        (eventos["Data/Hora"] > marca)
+        & ~eventos["Processo"].isin(na_marca)
+        & eventos["Descrição"].str.contains("recebido", case=False, na=False)
+    ]
+    atrasado = candidatos.iloc[[0]].assign(**{"Data/Hora": marca})
+    segunda = pd.concat([primeira, atrasado])
+
+    passagens = atualizar_passagens(segunda, usuarios_nomes, diretorio)
+    esperado = reconstruir_passagens(ordenar_eventos(segunda), usuarios_nomes)
+    pd.testing.assert_frame_equal(passagens[COLUNAS_PASSAGEM], esperado, check_dtype=False)
+    assert len(passagens) == len(reconstruir_passagens(ordenar_eventos(primeira), usuarios_nomes)) + 1
+
+    # Reaplicar a mesma base não repete os eventos que já estavam na marca d'água
+    atualizar_passagens(segunda, usuarios_nomes, diretorio)
+    conferir_consistencia(segunda, usuarios_nomes, diretorio)
+
+    restante = pd.concat([segunda, eventos[eventos["Data/Hora"] > marca].drop(index=atrasado.index)])
+    atualizar_passagens(restante, usuarios_nomes, diretorio)
+    conferir_consistencia(restante, usuarios_nomes, diretorio)
+
+
+def test_falha_na_gravacao_mantem_o_estado_anterior(eventos, tmp_path, monkeypatch):
+    diretorio = str(tmp_path / "estado")
+    atualizar_passagens(_ate(eventos, 0.5), usuarios_nomes, diretorio)
+    antes = ler_passagens(diretorio)
+
+    # Falha depois de a parte nova de concluídas ser gravada, antes do estado.json
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    with monkeypatch.context() as m:
+        m.setattr(incremental.json, "dump", falhar)
+        with pytest.raises(OSError):
+            atualizar_passagens(eventos, usuarios_nomes, diretorio)
+
+    pd.testing.assert_frame_equal(ler_passagens(diretorio), antes)
+    with open(tmp_path / "estado" / "estado.json", encoding="utf-8") as arquivo:
+        assert pd.Timestamp(json.load(arquivo)["marca_dagua"]) == _ate(eventos, 0.5)["Data/Hora"].max()
+
+    # A nova tentativa reaplica os mesmos eventos sem duplicar passagens
+    atualizar_passagens(eventos, usuarios_nomes, diretorio)
+    conferir_consistencia(eventos, usuarios_nomes, diretorio)
+
+
+def test_reconstruir_descarta_o_estado(eventos, tmp_path):
+    diretorio = str(tmp_path / "estado")
+    atualizar_passagens(_ate(eventos, 0.5), usuarios_nomes, diretorio)
+    atualizar_passagens(eventos, usuarios_nomes, diretorio, reconstruir=True)
+    conferir_consistencia(eventos, usuarios_nomes, diretorio)
+    assert len(list((tmp_path / "estado" / "fechadas").iterdir())) == 1
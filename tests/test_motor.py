@@ -0,0 +1,29 @@
+import json
+
+import instrumentacao
+from gerador import gerar_eventos
+from motor import manter_atualizado
+
+
+def test_atualizacao_em_segundo_plano_registra_as_etapas(tmp_path, monkeypatch):
+    fonte = str(tmp_path / "eventos.parquet")
+    gerar_eventos(5_000).to_parquet(fonte, index=False)
+    log = tmp_path / "desempenho.jsonl"
+    monkeypatch.setattr(instrumentacao, "ARQUIVO_LOG", str(log))
+
+    registro = manter_atualizado(fonte, intervalo=3600)
+    try:
+        assert registro["pronta"].wait(60)
+        assert registro["erro"] is None
+    finally:
+        registro["parar"].set()
+
+    linhas = [json.loads(linha) for linha in log.read_text(encoding="utf-8").splitlines()]
+    etapas = [linha["etapa"] for linha in linhas]
+    assert etapas == [
+        "carregar", "normalizar_eventos", "ordenar_eventos", "reconstruir_passagens", "calcular_prazos",
+        "atualizacao_em_segundo_plano",
+    ]
+    assert len({linha["execucao"] for linha in linhas}) == 1
+    assert linhas[3]["linhas_entrada"] == 5_000
+    assert [medicao["etapa"] for medicao in registro["medicoes"]] == etapas
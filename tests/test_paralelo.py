@@ -0,0 +1,17 @@
+import pandas as pd
+
+from dias_uteis import calcular_prazos
+from paralelo import passagens_com_prazos
+from passagens import ordenar_eventos, reconstruir_passagens
+from usuarios import usuarios_nomes
+
+DATA_REFERENCIA = pd.Timestamp("2024-06-03")
+
+
+def test_paralelo_igual_ao_serial(eventos):
+    # Com o mínimo zerado o log de teste já é repartido entre os trabalhadores
+    ordenados = ordenar_eventos(eventos)
+    serial = calcular_prazos(reconstruir_passagens(ordenados, usuarios_nomes), DATA_REFERENCIA)
+    for trabalhadores in (2, 3):
+        paralelo = passagens_com_prazos(ordenados, usuarios_nomes, DATA_REFERENCIA, trabalhadores, minimo=0)
+        pd.testing.assert_frame_equal(paralelo, serial.reset_index(drop=True))
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dias_uteis import calcular_prazos
+from particoes import gravar_particoes, ler_manifesto, ler_periodo
+from passagens import ordenar_eventos, reconstruir_passagens
+from usuarios import usuarios_nomes
+
+
+@pytest.fixture(scope="module")
+def acervo(eventos, tmp_path_factory):
+    # Alguns processos sem Unidade, nos eventos e nas passagens
+    sem_unidade = eventos["Processo"].drop_duplicates().iloc[:20]
+    eventos = eventos.assign(Unidade=eventos["Unidade"].astype(object).mask(eventos["Processo"].isin(sem_unidade)))
+    passagens = calcular_prazos(reconstruir_passagens(ordenar_eventos(eventos), usuarios_nomes), pd.Timestamp("2024-06-03"))
+    diretorio = str(tmp_path_factory.mktemp("acervo") / "particoes")
+    gravar_particoes(eventos, passagens, "teste", diretorio)
+    return eventos, passagens, diretorio
+
+
+def test_periodo_completo(acervo):
+    eventos, passagens, diretorio = acervo
+    manifesto = ler_manifesto(diretorio)
+    lidos, lidas = ler_periodo(manifesto["inicio"], manifesto["fim"], diretorio=diretorio)
+    assert len(lidos) == len(eventos) and len(lidas) == len(passagens)
+    assert "nan" not in manifesto["unidades"]
+
+
+def test_unidade_nula_volta_nula(acervo):
+    eventos, passagens, diretorio = acervo
+    manifesto = ler_manifesto(diretorio)
+    lidos, lidas = ler_periodo(manifesto["inicio"], manifesto["fim"], diretorio=diretorio)
+
+    assert lidas["Unidade"].isna().sum() == passagens["Unidade"].isna().sum() > 0
+    assert lidos["Unidade"].isna().sum() == eventos["Unidade"].isna().sum() > 0
+    assert not (lidas["Unidade"] == "nan").any() and not (lidos["Unidade"] == "nan").any()
+    for pasta, _, _ in os.walk(diretorio):
+        assert not pasta.endswith("Unidade=nan")
+
+    # Filtrar por uma unidade não traz as passagens sem Unidade
+    unidade = manifesto["unidades"][0]
+    _, filtradas = ler_periodo(manifesto["inicio"], manifesto["fim"], unidade, diretorio)
+    assert (filtradas["Unidade"] == unidade).all()
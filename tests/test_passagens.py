@@ -0,0 +1,122 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from fontes import carregar, normalizar_eventos
+from passagens import (
+    RECEBIMENTO,
+    classificar_eventos,
+    conferir_paridade,
+    ordenar_eventos,
+    padroes_de_eventos,
+    reconstruir_passagens,
+    reconstruir_passagens_com_estado,
+)
+from usuarios import usuarios_nomes
+
+BASE_DO_REPOSITORIO = os.path.join(os.path.dirname(os.path.dirname(__file__)), "atividades_completas.parquet")
+
+NOMES = {"ana.souza": "Ana Souza", "bruno.lima": "Bruno Lima"}
+
+
+def _eventos(*linhas):
+    # (processo, data/hora, usuário, descrição); unidade e tipo fixos
+    return ordenar_eventos(pd.DataFrame(
+        [
+            {"Processo": processo, "Data/Hora": pd.Timestamp(data), "Usuário": usuario, "Descrição": descricao,
+             "Unidade": "DCONT", "TipoProcesso": "Pagamento"}
+            for processo, data, usuario, descricao in linhas
+        ]
+    ))
+
+
+def test_paridade_com_o_laco_original(eventos):
+    assert conferir_paridade(ordenar_eventos(eventos), usuarios_nomes) > 0
+
+
+def test_paridade_na_base_do_repositorio():
+    eventos = normalizar_eventos(carregar(BASE_DO_REPOSITORIO)["dados"], usuarios_nomes)
+    assert conferir_paridade(ordenar_eventos(eventos), usuarios_nomes) > 0
+
+
+def test_datas_nulas():
+    eventos = _eventos(
+        ("1", "2024-01-02 10:00", "Ana", "Recebido na unidade DCONT"),
+        ("1", None, "Bruno", "Conclusão do processo na unidade"),
+        ("2", None, "Ana", "Recebido na unidade DCONT"),
+        ("2", "2024-01-05 09:00", "Ana", "Processo atribuído para bruno.lima"),
+    )
+    conferir_paridade(eventos, NOMES)
+    passagens = reconstruir_passagens(eventos, NOMES)
+
+    # A data nula vai para o fim do processo: a conclusão sem data ainda fecha a passagem
+    assert passagens["Usuário Concluiu"].tolist() == ["Bruno", None]
+    assert passagens["Data Conclusão"].isna().all()
+    # O recebimento sem data vem depois da atribuição, que fica para ele
+    assert pd.isna(passagens["Data Recebido"].iloc[1])
+    assert passagens["Responsável"].tolist() == ["Ana", "Bruno Lima"]
+
+
+def test_processo_sem_recebimento():
+    eventos = _eventos(
+        ("1", "2024-01-02 10:00", "Ana", "Processo atribuído para ana.souza"),
+        ("1", "2024-01-03 10:00", "Ana", "Conclusão do processo na unidade"),
+        ("2", "2024-01-02 11:00", "Bruno", "Recebido na unidade DCONT"),
+    )
+    conferir_paridade(eventos, NOMES)
+    passagens, pendentes = reconstruir_passagens_com_estado(eventos, NOMES)
+
+    # Conclusão sem passagem aberta é ignorada; a atribuição segue pendente
+    assert passagens["Processo"].tolist() == ["2"]
+    assert pendentes.to_dict("records") == [{"Processo": "1", "Responsável Atribuído": "Ana Souza"}]
+
+
+def test_reatribuicao_com_o_processo_fechado():
+    eventos = _eventos(
+        ("1", "2024-01-02 10:00", "Ana", "Recebido na unidade DCONT"),
+        ("1", "2024-01-02 11:00", "Ana", "Processo atribuído para ana.souza"),
+        ("1", "2024-01-03 10:00", "Ana", "Conclusão do processo na unidade"),
+        ("1", "2024-01-04 10:00", "Ana", "Processo atribuído para bruno.lima"),
+        ("1", "2024-01-04 11:00", "Ana", "Processo atribuído para login.sem.nome"),
+        ("1", "2024-01-05 10:00", "Ana", "Reabertura do processo na unidade"),
+        ("1", "2024-01-06 10:00", "Bruno", "Conclusão do processo na unidade"),
+        ("1", "2024-01-07 10:00", "Bruno", "Processo atribuído para bruno.lima"),
+    )
+    conferir_paridade(eventos, NOMES)
+    passagens, pendentes = reconstruir_passagens_com_estado(eventos, NOMES)
+
+    # A última atribuição com o processo fechado vale para a reabertura; a
+    # feita depois da última conclusão fica pendente para o próximo recebimento
+    assert passagens["Responsável"].tolist() == ["Ana Souza", "login.sem.nome"]
+    assert passagens["Usuário Concluiu"].tolist() == ["Ana", "Bruno"]
+    assert pendentes["Responsável Atribuído"].tolist() == ["Bruno Lima"]
+
+
+@pytest.mark.parametrize("descricao", ["Recebido na unidade DCONT", "Conclusão do processo na unidade"])
+def test_repeticoes_seguidas_nao_mudam_o_estado(descricao):
+    eventos = _eventos(
+        ("1", "2024-01-02 10:00", "Ana", "Recebido na unidade DCONT"),
+        ("1", "2024-01-03 10:00", "Ana", descricao),
+        ("1", "2024-01-04 10:00", "Bruno", "Conclusão do processo na unidade"),
+        ("1", "2024-01-05 10:00", "Bruno", "Conclusão do processo na unidade"),
+    )
+    conferir_paridade(eventos, NOMES)
+    passagens = reconstruir_passagens(eventos, NOMES)
+    assert len(passagens) == 1
+    assert passagens["Data Recebido"].iloc[0] == pd.Timestamp("2024-01-02 10:00")
+
+
+def test_frases_adicionais_do_arquivo(tmp_path):
+    arquivo = tmp_path / "padroes.json"
+    arquivo.write_text(json.dumps({"recebimento": ["Remetido à unidade"]}), encoding="utf-8")
+    eventos = pd.DataFrame({"Descrição": ["Processo remetido à unidade DCONT"]})
+    assert classificar_eventos(eventos, padroes_de_eventos(str(arquivo)))["Código Evento"].tolist() == [RECEBIMENTO]
+
+
+def test_tipo_desconhecido_no_arquivo(tmp_path):
+    arquivo = tmp_path / "padroes.json"
+    arquivo.write_text(json.dumps({"recebimento": ["remetido"], "arquivamento": ["arquivado"]}), encoding="utf-8")
+    with pytest.raises(ValueError, match="arquivamento.*atribuicao, recebimento, conclusao"):
+        padroes_de_eventos(str(arquivo))
@@ -0,0 +1,30 @@
+# Mapeamento dos logins do SEI para os nomes exibidos no painel
+usuarios_nomes = {
+    "adleide.falcao": "Adleide Falcão",
+    "amanda.levyski": "Amanda Levyski",
+    "celso.cruz": "Celso Cruz",
+    "daniela.evangelista": "Daniela Evangelista",
+    "dayane.luiz": "Dayane Luiz",
+    "diogo.melo": "Diogo Melo",
+    "eduardo.junior": "Eduardo Júnior",
+    "gabriela.bruno": "Gabriela Bruno",
+    "gelvaci.pinto": "Gelvaci Pinto",
+    "girlene.alves": "Girlene Alves",
+    "isabela.sanches": "Isabela Sanches",
+    "isabella.vasconcelos": "Isabella Vasconcelos",
+    "izabella.ferreira": "Izabella Ferreira",
+    "jerssika.nogueira": "Jerssika Nogueira",
+    "jessica.fernandes": "Jéssica Fernandes",
+    "jessica.torres": "Jessica Torres",
+    "julia.adryenne": "Julia Adryenne",
+    "karolina.espezin": "Karolina Espezin",
+    "leticia.jesus": "Letícia Jesus",
+    "luiza.lacerda": "Luiza Lacerda",
+    "maria.furtado": "Maria Furtado",
+    "rafaella.fonseca": "Rafaella Fonseca",
+    "roberto.rocha": "Roberto Rocha",
+    "samuel.novais": "Samuel Novais",
+    "sueli.vieira": "Sueli Vieira",
+    "vandeir.scheffelt": "Vandeir Scheffelt",
+    "vanessa.vaucher": "Vanessa Vaucher"
+}